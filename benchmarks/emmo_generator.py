@@ -0,0 +1,131 @@
+"""
+emmo_generator.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+Generate synthetic ontologies shaped like EMMO, to benchmark the ontology manager and ontodot
+without depending on a local checkout of EMMO:
+
+- a protege catalog-v001.xml and one turtle file per module, the modules importing each other in a chain;
+- classes and object properties with opaque EMMO_<uuid> IRIs, a skos:prefLabel, an elucidation
+  and an rdfs:comment each;
+- an rdfs:subClassOf tree over all the classes, plus owl:Restriction BNodes (someValuesFrom) as superclasses.
+
+The output is deterministic for a given seed.
+
+Example:
+    python emmo_generator.py /tmp/emmo_like --modules 10 --classes 500
+"""
+
+import argparse
+import os
+import random
+import uuid
+
+from rdflib import Graph, URIRef, Literal, BNode, Namespace
+from rdflib.namespace import RDF, RDFS, OWL, SKOS
+
+EMMO = Namespace("http://emmo.info/emmo#")
+ELUCIDATION = EMMO.EMMO_967080e5_2f42_4eb2_a3a9_c58143e835f9
+ONTOLOGY_BASE = "http://emmo.info/emmo/bench"
+
+
+def emmo_iri(rng: random.Random):
+    """
+    A new EMMO_<uuid> IRI, with the uuid written with underscores as in EMMO.
+    """
+    return EMMO["EMMO_" + str(uuid.UUID(int=rng.getrandbits(128), version=4)).replace('-', '_')]
+
+
+def generate(output_folder, modules=4, classes=100, properties=10, restrictions=1, seed=0):
+    """
+    Write an EMMO-shaped ontology to `output_folder`.
+
+    params:
+    output_folder: created if needed.
+    modules: number of modules (turtle files in the catalog).
+    classes: number of classes per module.
+    properties: number of object properties per module.
+    restrictions: number of owl:Restriction superclasses per class.
+    seed: the random seed.
+
+    return: {"catalog": catalog file name, "root": the root class IRI, "classes": all the class IRIs,
+             "properties": all the property IRIs, "triples": total number of triples}
+    """
+    rng = random.Random(seed)
+    os.makedirs(output_folder, exist_ok=True)
+
+    root = emmo_iri(rng)
+    all_classes = [root]
+    all_properties = []
+    total_triples = 0
+    catalog_lines = ['<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+                     '<catalog prefer="public" xmlns="urn:oasis:names:tc:entity:resolver:catalog">']
+
+    for m in range(modules):
+        g = Graph()
+        g.bind("emmo", EMMO)
+        g.bind("skos", SKOS)
+        ontology = URIRef(f"{ONTOLOGY_BASE}/module{m}")
+        g.add((ontology, RDF.type, OWL.Ontology))
+        if m > 0:
+            g.add((ontology, OWL.imports, URIRef(f"{ONTOLOGY_BASE}/module{m - 1}")))
+        else:
+            _add_entity(g, root, OWL.Class, "EMMO")
+
+        module_properties = []
+        for i in range(properties):
+            prop = emmo_iri(rng)
+            _add_entity(g, prop, OWL.ObjectProperty, f"hasRelation{m}x{i}")
+            if all_properties:
+                g.add((prop, RDFS.subPropertyOf, rng.choice(all_properties)))
+            module_properties.append(prop)
+        all_properties.extend(module_properties)
+
+        for i in range(classes):
+            cls = emmo_iri(rng)
+            _add_entity(g, cls, OWL.Class, f"Class{m}x{i}")
+            # favour the recent classes, for a deeper tree
+            g.add((cls, RDFS.subClassOf, all_classes[int(len(all_classes) * rng.random() ** 0.3)]))
+            for _ in range(restrictions):
+                restriction = BNode()
+                g.add((cls, RDFS.subClassOf, restriction))
+                g.add((restriction, RDF.type, OWL.Restriction))
+                g.add((restriction, OWL.onProperty, rng.choice(all_properties)))
+                g.add((restriction, OWL.someValuesFrom, rng.choice(all_classes)))
+            all_classes.append(cls)
+
+        file_name = f"module{m}.ttl"
+        g.serialize(os.path.join(output_folder, file_name), format="turtle")
+        total_triples += len(g)
+        catalog_lines.append(f'    <uri id="Imports Wizard Entry" name="{ontology}" uri="{file_name}"/>')
+
+    catalog_lines.append('</catalog>')
+    catalog = "catalog-v001.xml"
+    with open(os.path.join(output_folder, catalog), "w") as f:
+        f.write("\n".join(catalog_lines) + "\n")
+
+    return {"catalog": catalog, "root": root, "classes": all_classes, "properties": all_properties,
+            "triples": total_triples}
+
+
+def _add_entity(g, iri, rdf_type, label):
+    g.add((iri, RDF.type, rdf_type))
+    g.add((iri, SKOS.prefLabel, Literal(label, lang="en")))
+    g.add((iri, ELUCIDATION, Literal(f"The elucidation of {label}.", lang="en")))
+    g.add((iri, RDFS.comment, Literal(f"A rather long comment on {label}, " * 4)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate an EMMO-shaped synthetic ontology")
+    parser.add_argument("output_folder")
+    parser.add_argument("--modules", type=int, default=4)
+    parser.add_argument("--classes", type=int, default=100, help="classes per module")
+    parser.add_argument("--properties", type=int, default=10, help="object properties per module")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    info = generate(args.output_folder, args.modules, args.classes, args.properties, seed=args.seed)
+    print(f"wrote {info['triples']} triples in {args.modules} modules to {args.output_folder}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+run_benchmarks.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+Time the hot paths of the ontology manager and ontodot on synthetic EMMO-shaped ontologies
+(see emmo_generator.py) of several sizes, and write the results as JSON.
+
+    python benchmarks/run_benchmarks.py --sizes 100 1000 --output bench.json
+
+Two result files (e.g. of two commits) can then be compared, the exit status is 1 if any benchmark got slower
+than the threshold:
+
+    python benchmarks/run_benchmarks.py --compare base.json bench.json --threshold 1.25
+
+The checkout the script is in is benchmarked, not an installed ontology_manager.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import rdflib  # noqa: E402
+from rdflib import Graph  # noqa: E402
+from rdflib.namespace import SKOS  # noqa: E402
+
+from emmo_generator import generate, EMMO  # noqa: E402
+from ontology_manager.ontology_utils import OntologyManager  # noqa: E402
+from ontodot.ontodot import OntoVis, filter_graph_by_string  # noqa: E402
+
+
+def time_it(func, setup=None, repeat=3):
+    """
+    Run `func(state)` `repeat` times, state being the result of `setup()` (not timed), called before each run.
+    The output of the code under test is swallowed.
+
+    return: the list of the run times in seconds.
+    """
+    seconds = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            state = setup() if setup is not None else None
+            start = time.perf_counter()
+            func(state)
+            seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def loaded_manager(folder, catalog):
+    manager = OntologyManager(folder, catalog)
+    manager.parse_catalog()
+    manager.load_ontology()
+    return manager
+
+
+def benchmarks(folder, info, jobs):
+    """
+    The benchmarks for the ontology generated in `folder`: a list of (name, func, setup).
+    """
+    catalog = info["catalog"]
+    classes = info["classes"]
+    zoom_root = classes[len(classes) // 2]
+    zoom_seeds = classes[::max(1, len(classes) // 100)][:100]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = loaded_manager(folder, catalog)
+    merged = Graph()
+    for g in manager.ontology_graphs.values():
+        merged += g
+    vis = OntoVis(merged)
+
+    def parse_catalog(_):
+        OntologyManager(folder, catalog).parse_catalog()
+
+    def catalog_manager():
+        m = OntologyManager(folder, catalog)
+        m.parse_catalog()
+        return m
+
+    return [
+        ("parse_catalog", parse_catalog, None),
+        ("load_ontology", lambda m: m.load_ontology(), catalog_manager),
+        (f"load_ontology[jobs={jobs}]", lambda m: m.load_ontology(jobs=jobs), catalog_manager),
+        ("emmo_to_label_graph", lambda _: OntologyManager.emmo_to_label_graph(EMMO, SKOS.prefLabel, merged), None),
+        ("replace_iri", lambda m: m.replace_iri(), lambda: loaded_manager(folder, catalog)),
+        ("replace_iri2", lambda m: m.replace_iri2(), lambda: loaded_manager(folder, catalog)),
+        ("replace_iri3", lambda m: m.replace_iri3(), lambda: loaded_manager(folder, catalog)),
+        ("zoom_in", lambda _: vis.zoom_in(zoom_root, 2), None),
+        ("zoom_in[100 seeds]", lambda _: [vis.zoom_in(seed, 2) for seed in zoom_seeds], None),
+        ("zoom_in_many[100 seeds]", lambda _: vis.zoom_in_many(zoom_seeds, 2), None),
+        ("zoom_in[100 seeds, distance 3]", lambda _: [vis.zoom_in(seed, 3) for seed in zoom_seeds], None),
+        ("zoom_in_many[100 seeds, distance 3]", lambda _: vis.zoom_in_many(zoom_seeds, 3), None),
+        ("zoom_in_many[100 seeds, rebuild]", lambda _: vis.zoom_in_many(zoom_seeds, 2, rebuild=True), None),
+        ("zoom_in_classes", lambda _: vis.zoom_in_classes(zoom_root, (2, 3)), None),
+        ("filter_graph_by_string", lambda _: filter_graph_by_string(merged, "Class1x1"), None),
+        ("search", lambda _: manager.search("Class1x1"), None),
+    ]
+
+
+def run(sizes, modules, repeat, jobs, only=None):
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="ontology_manager_bench_") as folder:
+            info = generate(folder, modules=modules, classes=size)
+            print(f"size {size}: {modules} modules, {info['triples']} triples")
+            for name, func, setup in benchmarks(folder, info, jobs):
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                seconds = time_it(func, setup, repeat)
+                results.append({"name": name, "size": size, "modules": modules, "triples": info["triples"],
+                                "seconds": seconds, "min": min(seconds), "median": statistics.median(seconds)})
+                print(f"  {name:32s} min {min(seconds):9.4f}s  median {statistics.median(seconds):9.4f}s")
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "rdflib": rdflib.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(), "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare(base_file, new_file, threshold):
+    """
+    Print the ratio new/base of the min times of the benchmarks in both files.
+
+    return: the list of the (name, size) that are slower than `threshold` times the base.
+    """
+    with open(base_file) as f:
+        base = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+    with open(new_file) as f:
+        new = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for key in sorted(base.keys() & new.keys(), key=lambda k: (k[1], k[0])):
+        ratio = new[key]["min"] / base[key]["min"] if base[key]["min"] > 0 else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions.append(key)
+            flag = "  <-- slower"
+        print(f"{key[0]:32s} size {key[1]:6d}  {base[key]['min']:9.4f}s -> {new[key]['min']:9.4f}s  x{ratio:6.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ontology manager and ontodot hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="classes per module")
+    parser.add_argument("--modules", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="for the parallel load_ontology")
+    parser.add_argument("--only", nargs="+", help="only the benchmarks whose name contains one of these")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    results = run(args.sizes, args.modules, args.repeat, args.jobs, args.only)
+    with open(args.output, "w") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
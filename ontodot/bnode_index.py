@@ -0,0 +1,242 @@
+"""
+bnode_index.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+An index of the blank nodes of a graph, built in one pass, so that the structure behind a BNode (an OWL
+restriction, a class expression, an RDF list) does not have to be walked again from scratch each time:
+
+- cbd(bnode): its concise bounded description, the triples about it and, recursively, about the BNodes they
+  point to (cycles are followed once);
+- decode(bnode): the common OWL shapes as small named tuples, e.g.
+    Restriction(on_property=hasPart, kind='some', filler=EMMO.Atom, cardinality=None)
+    ClassExpression(operator='unionOf', operands=(EMMO.Atom, _:b12))
+    a tuple for an rdf:List
+  the nodes inside them are left as nodes (decode them in turn), so a decode is one lookup;
+- expand(node): the same, recursively, with Cycle(bnode) where a BNode refers back to itself.
+
+    index = BNodeIndex(g)
+    for cls, restriction in index.restrictions():
+        ...
+"""
+
+from collections import namedtuple, defaultdict
+
+from rdflib import Graph, BNode
+from rdflib.namespace import RDF, OWL
+
+Restriction = namedtuple("Restriction", "on_property kind filler cardinality")
+ClassExpression = namedtuple("ClassExpression", "operator operands")
+Cycle = namedtuple("Cycle", "bnode")
+
+# restriction property --> kind of the restriction
+RESTRICTION_KINDS = {
+    OWL.someValuesFrom: "some",
+    OWL.allValuesFrom: "only",
+    OWL.hasValue: "value",
+    OWL.hasSelf: "self",
+}
+# cardinality property --> kind, the filler being the owl:onClass / owl:onDataRange of the restriction if any
+CARDINALITY_KINDS = {
+    OWL.minCardinality: "min",
+    OWL.maxCardinality: "max",
+    OWL.cardinality: "exactly",
+    OWL.minQualifiedCardinality: "min",
+    OWL.maxQualifiedCardinality: "max",
+    OWL.qualifiedCardinality: "exactly",
+}
+# class expression property --> operator, the object being a list (or a class for complementOf)
+CLASS_OPERATORS = {
+    OWL.unionOf: "unionOf",
+    OWL.intersectionOf: "intersectionOf",
+    OWL.oneOf: "oneOf",
+    OWL.complementOf: "complementOf",
+}
+
+
+# looked up for every BNode decoded, namespace attributes are slow
+_FIRST, _REST, _TYPE = RDF.first, RDF.rest, RDF.type
+_RESTRICTION, _ON_PROPERTY, _ON_CLASS, _ON_DATA_RANGE, _COMPLEMENT_OF = (
+    OWL.Restriction, OWL.onProperty, OWL.onClass, OWL.onDataRange, OWL.complementOf)
+
+
+def concise_bounded_description(g: Graph, bnode):
+    """
+    The concise bounded description of bnode read from g directly (no index): the triples about it and,
+    recursively, about the BNodes they point to, each BNode once.
+    """
+    triples = []
+    seen = {bnode}
+    stack = [bnode]
+    while stack:
+        node = stack.pop()
+        for triple in g.triples((node, None, None)):
+            triples.append(triple)
+            o = triple[2]
+            if isinstance(o, BNode) and o not in seen:
+                seen.add(o)
+                stack.append(o)
+    return triples
+
+
+def _cardinality(literal):
+    try:
+        return int(literal)
+    except ValueError:
+        return literal
+
+
+class BNodeIndex:
+    """
+    The blank nodes of a graph, see the module doc. The graph is read once, the index is not updated if it changes.
+
+    params:
+    g: the graph, or any iterable of triples (e.g. a concise_bounded_description).
+    """
+
+    def __init__(self, g: Graph):
+        self._out = defaultdict(list)  # bnode --> [(p, o)]
+        self._in = defaultdict(list)  # bnode --> [(s, p)]
+        for s, p, o in g:
+            if isinstance(s, BNode):
+                self._out[s].append((p, o))
+            if isinstance(o, BNode):
+                self._in[o].append((s, p))
+        self._cbd = {}
+        self._decoded = {}
+
+    def __contains__(self, node):
+        return node in self._out or node in self._in
+
+    def __len__(self):
+        return len(self._out.keys() | self._in.keys())
+
+    def __iter__(self):
+        return iter(self._out.keys() | self._in.keys())
+
+    def description(self, bnode):
+        """
+        The (p, o) of the triples whose subject is bnode.
+        """
+        return list(self._out.get(bnode, ()))
+
+    def referrers(self, bnode):
+        """
+        The (s, p) of the triples whose object is bnode, e.g. the class a restriction is a superclass of.
+        """
+        return list(self._in.get(bnode, ()))
+
+    def value(self, bnode, predicate):
+        for p, o in self._out.get(bnode, ()):
+            if p == predicate:
+                return o
+        return None
+
+    def cbd(self, bnode):
+        """
+        The concise bounded description of bnode: tuple of the triples about it and, recursively, about the
+        BNodes they point to, each BNode once.
+        """
+        triples = self._cbd.get(bnode)
+        if triples is None:
+            triples = []
+            seen = {bnode}
+            stack = [bnode]
+            while stack:
+                node = stack.pop()
+                for p, o in self._out.get(node, ()):
+                    triples.append((node, p, o))
+                    if isinstance(o, BNode) and o not in seen:
+                        seen.add(o)
+                        stack.append(o)
+            triples = self._cbd[bnode] = tuple(triples)
+        return triples
+
+    def decode(self, node):
+        """
+        The Restriction, ClassExpression or tuple (RDF list) a BNode stands for, the node itself if it is not a
+        BNode or not one of these shapes. Memoised.
+        """
+        if not isinstance(node, BNode):
+            return node
+        decoded = self._decoded.get(node)
+        if decoded is None:
+            decoded = self._decoded[node] = self._decode(node)
+        return decoded
+
+    def _decode(self, bnode):
+        description = dict(self._out.get(bnode, ()))
+        if _FIRST in description:
+            return self._list(bnode)
+        if description.get(_TYPE) == _RESTRICTION or _ON_PROPERTY in description:
+            on_property = description.get(_ON_PROPERTY)
+            for kind_property, kind in RESTRICTION_KINDS.items():
+                if kind_property in description:
+                    return Restriction(on_property, kind, description[kind_property], None)
+            for kind_property, kind in CARDINALITY_KINDS.items():
+                if kind_property in description:
+                    filler = description.get(_ON_CLASS, description.get(_ON_DATA_RANGE))
+                    return Restriction(on_property, kind, filler, _cardinality(description[kind_property]))
+        for operator_property, operator in CLASS_OPERATORS.items():
+            if operator_property in description:
+                operands = description[operator_property]
+                if operator_property != _COMPLEMENT_OF:
+                    operands = self._list(operands) if isinstance(operands, BNode) else (operands,)
+                else:
+                    operands = (operands,)
+                return ClassExpression(operator, operands)
+        return bnode
+
+    def _list(self, head):
+        """
+        The members of the RDF list starting at head, a tuple; a list looping back on itself stops there.
+        """
+        members = []
+        seen = set()
+        node = head
+        while isinstance(node, BNode) and node not in seen:
+            seen.add(node)
+            first = self.value(node, _FIRST)
+            if first is None:
+                break
+            members.append(first)
+            node = self.value(node, _REST)
+        return tuple(members)
+
+    def expand(self, node, _stack=None):
+        """
+        decode, recursively: the nodes inside the decoded objects are decoded in turn, a BNode met again inside
+        its own expansion gives Cycle(bnode).
+        """
+        if not isinstance(node, BNode):
+            return node
+        stack = _stack if _stack is not None else set()
+        if node in stack:
+            return Cycle(node)
+        decoded = self.decode(node)
+        if decoded is node:
+            return node
+        stack.add(node)
+        try:
+            if isinstance(decoded, Restriction):
+                return decoded._replace(filler=self.expand(decoded.filler, stack))
+            if isinstance(decoded, ClassExpression):
+                return decoded._replace(operands=tuple(self.expand(x, stack) for x in decoded.operands))
+            return tuple(self.expand(x, stack) for x in decoded)
+        finally:
+            stack.discard(node)
+
+    def has_cycle(self, bnode):
+        """
+        True if a BNode of the description of bnode leads back to it.
+        """
+        return any(o == bnode for _, _, o in self.cbd(bnode))
+
+    def restrictions(self):
+        """
+        The (referrer, Restriction) of all the restrictions that are objects of a triple, e.g.
+        (class, Restriction) for the restrictions used as superclasses.
+        """
+        for bnode, referrers in self._in.items():
+            decoded = self.decode(bnode)
+            if isinstance(decoded, Restriction):
+                for s, _ in referrers:
+                    yield s, decoded
@@ -0,0 +1,204 @@
+"""
+class_hierarchy.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+An index of the rdfs:subClassOf hierarchy of a graph, built once and kept up to date incrementally, for
+the class zooming of OntoVis and for ancestor queries:
+
+- the direct parents and children of every class, so that the classes within a given depth are found by
+  a breadth-first walk over dicts instead of one SPARQL query per visited class;
+- the transitive closure as one bitset (a Python int) of ancestors per class, bit i standing for the class
+  of id i, so that "is A a subclass of B" is a single bit test.
+
+    index = ClassHierarchyIndex(g)
+    index.is_subclass(mio.Atom, mio.Matter)
+    index.ancestors(mio.Atom, depth=2)      # {class: distance}
+
+Cycles of subClassOf (equivalent classes written as mutual subclasses) are allowed, the classes of a cycle
+being ancestors of each other.
+"""
+
+from collections import deque
+
+from rdflib import Graph
+from rdflib.namespace import RDFS
+
+
+class ClassHierarchyIndex:
+    """
+    The subClassOf hierarchy of a graph, see the module doc.
+
+    params:
+    g: the graph the rdfs:subClassOf triples are read from, can be None for an empty index.
+    predicate: the hierarchy relation, rdfs:subClassOf by default (rdfs:subPropertyOf works as well).
+    pairs: (subclass, superclass) relations indexed in addition to those of g.
+    """
+
+    def __init__(self, g: Graph = None, predicate=RDFS.subClassOf, pairs=()):
+        self.predicate = predicate
+        self._ids = {}  # class --> bit id
+        self._parents = {}  # class --> set of direct superclasses
+        self._children = {}  # class --> set of direct subclasses
+        self._ancestors = {}  # class --> bitset of the ancestors, itself included
+        if g is not None:
+            for sub, sup in g.subject_objects(predicate):
+                self._link(sub, sup)
+        for sub, sup in pairs:
+            self._link(sub, sup)
+        self._recompute(self._parents.keys() | self._children.keys())
+
+    def __contains__(self, cls):
+        return cls in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def parents(self, cls):
+        return set(self._parents.get(cls, ()))
+
+    def children(self, cls):
+        return set(self._children.get(cls, ()))
+
+    def is_subclass(self, sub, sup):
+        """
+        True if `sub` is `sup` or a direct or indirect subclass of it.
+        """
+        if sub == sup:
+            return True
+        sup_id = self._ids.get(sup)
+        if sup_id is None:
+            return False
+        return bool((self._ancestors.get(sub, 0) >> sup_id) & 1)
+
+    def ancestors(self, cls, depth=None):
+        """
+        The superclasses of `cls` up to `depth` subClassOf relations away (all of them if depth is None).
+
+        return: dict superclass --> its distance to cls (the shortest one), cls itself excluded.
+        """
+        return self._walk(cls, self._parents, depth)
+
+    def descendants(self, cls, depth=None):
+        """
+        The subclasses of `cls` up to `depth` subClassOf relations away (all of them if depth is None).
+
+        return: dict subclass --> its distance to cls (the shortest one), cls itself excluded.
+        """
+        return self._walk(cls, self._children, depth)
+
+    def edges(self, cls, depth, down=True):
+        """
+        The (subclass, superclass) relations met walking `depth` levels down (or up) the hierarchy from cls,
+        i.e. the relations of the classes at less than `depth` from cls with their children (or parents).
+        """
+        links = self._children if down else self._parents
+        levels = {cls: 0}
+        levels.update(self._walk(cls, links, depth - 1) if depth > 1 else {})
+        for node, distance in levels.items():
+            if distance >= depth:
+                continue
+            for other in links.get(node, ()):
+                yield (other, node) if down else (node, other)
+
+    def add(self, sub, sup):
+        """
+        Record the relation `sub` rdfs:subClassOf `sup`, updating the closure of sub and its subclasses.
+        """
+        if sup in self._parents.get(sub, ()):
+            return
+        self._link(sub, sup)
+        if sub not in self._ancestors:
+            self._ancestors[sub] = 1 << self._ids[sub]
+        if sup not in self._ancestors:
+            self._ancestors[sup] = 1 << self._ids[sup]
+        # adding a relation only adds ancestors: or them in, no need for a recomputation
+        added = self._ancestors[sup]
+        for node in self._closure(sub, self._children):
+            self._ancestors[node] |= added
+
+    def remove(self, sub, sup):
+        """
+        Forget the relation `sub` rdfs:subClassOf `sup`, recomputing the closure of sub and its subclasses.
+        """
+        if sup not in self._parents.get(sub, ()):
+            return
+        self._parents[sub].discard(sup)
+        self._children[sup].discard(sub)
+        self._recompute(self._closure(sub, self._children))
+
+    def update(self, added=(), removed=()):
+        """
+        Apply the triples added to and removed from the graph, the ones that are not hierarchy relations
+        being ignored.
+        """
+        for s, p, o in removed:
+            if p == self.predicate:
+                self.remove(s, o)
+        for s, p, o in added:
+            if p == self.predicate:
+                self.add(s, o)
+
+    def _link(self, sub, sup):
+        for node in (sub, sup):
+            if node not in self._ids:
+                self._ids[node] = len(self._ids)
+        self._parents.setdefault(sub, set()).add(sup)
+        self._children.setdefault(sup, set()).add(sub)
+
+    @staticmethod
+    def _walk(cls, links, depth):
+        distances = {cls: 0}
+        frontier = [cls]
+        distance = 0
+        while frontier and (depth is None or distance < depth):
+            distance += 1
+            next_frontier = []
+            for node in frontier:
+                for other in links.get(node, ()):
+                    if other not in distances:
+                        distances[other] = distance
+                        next_frontier.append(other)
+            frontier = next_frontier
+        del distances[cls]
+        return distances
+
+    @staticmethod
+    def _closure(cls, links):
+        seen = {cls}
+        stack = [cls]
+        while stack:
+            for other in links.get(stack.pop(), ()):
+                if other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        return seen
+
+    def _recompute(self, nodes):
+        """
+        Recompute the ancestor bitsets of `nodes`, a set closed under subclasses, the other bitsets being
+        up to date. The nodes are done parents first (Kahn's algorithm); the ones left over are on cycles,
+        their closure is then found by a walk.
+        """
+        nodes = set(nodes)
+        pending = {node: sum(1 for parent in self._parents.get(node, ()) if parent in nodes) for node in nodes}
+        ready = deque(node for node, count in pending.items() if count == 0)
+        while ready:
+            node = ready.popleft()
+            bits = 1 << self._ids[node]
+            for parent in self._parents.get(node, ()):
+                bits |= self._ancestors[parent]
+            self._ancestors[node] = bits
+            del pending[node]
+            for child in self._children.get(node, ()):
+                if child in pending:
+                    pending[child] -= 1
+                    if pending[child] == 0:
+                        ready.append(child)
+
+        for node in pending:
+            bits = 0
+            for ancestor in self._closure(node, self._parents):
+                bits |= 1 << self._ids[ancestor]
+            self._ancestors[node] = bits
@@ -0,0 +1,208 @@
+"""
+dot_writer.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+Write graphviz DOT for an RDF graph directly, and run the graphviz `dot` binary on it.
+
+This replaces rdf2dot + pydotplus in vis(): rdf2dot wrote the DOT text, pydotplus parsed it back only to
+write it out again for graphviz. Here the DOT is written in one pass over the triples and piped to `dot`:
+
+- every term is one node, every (subject, predicate, object) edge and literal row is written once;
+- the node titles are the skos:prefLabel / rdfs:label ... of the node, or its local name, shortened;
+- predicates and IRIs are written as prefix:name using the namespaces bound in the graph (memoised);
+- the output can be png, svg or any other format graphviz knows.
+
+    dot_text = graph_to_dot(g, g.namespace_manager)
+    svg = render_dot(dot_text, "svg")
+
+The look of the nodes (an html table with the literals as rows) follows rdf2dot.
+"""
+
+import html
+import io
+import re
+import subprocess
+from collections import defaultdict
+
+from rdflib import Literal, URIRef, BNode
+from rdflib.namespace import RDFS, SKOS, DC, FOAF, Namespace
+
+VCARD = Namespace("http://www.w3.org/2006/vcard/ns#")
+
+# the properties giving the title of a node, the first one found wins (rdf2dot ones, prefLabel first for EMMO)
+LABEL_PROPERTIES = (SKOS.prefLabel, RDFS.label, DC.title, FOAF.name, VCARD.fn, VCARD.org)
+
+# the graphviz binary used by render_dot
+DOT_BINARY = "dot"
+
+_NODE = ("\t%s [ shape=none, color=black label=< <table color='#666666' cellborder='0' cellspacing='0' border='1'>"
+         "<tr><td colspan='2' bgcolor='grey'><B>%s</B></td></tr>"
+         "<tr><td href='%s' bgcolor='#eeeeee' colspan='2'><font point-size='10' color='#6666ff'>%s</font></td></tr>"
+         "%s</table> > ] ;\n")
+_EDGE = "\t%s -> %s [ color=BLACK, label=< <font point-size='10' color='#336633'>%s</font> > ] ;\n"
+_ROW = "<tr><td align='left'>%s</td><td align='left'>%s</td></tr>"
+
+# the characters that can not be in XML, graphviz reads the html labels with an XML parser
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def shorten(text, max_length):
+    """
+    text cut to max_length characters, the last one being an ellipsis, if it is longer (None: no limit).
+    """
+    text = str(text)
+    if max_length is None or len(text) <= max_length:
+        return text
+    return text[:max(max_length - 1, 0)] + "…"
+
+
+class _QNames:
+    """
+    Memoised prefix:name of the terms, from the namespaces bound in a namespace manager.
+    """
+
+    def __init__(self, namespace_manager):
+        self.namespace_manager = namespace_manager
+        self.cache = {}
+
+    def __call__(self, x):
+        qname = self.cache.get(x)
+        if qname is None:
+            qname = self.cache[x] = self._compute(x)
+        return qname
+
+    def _compute(self, x):
+        if self.namespace_manager is not None and isinstance(x, URIRef):
+            try:
+                prefix, _, name = self.namespace_manager.compute_qname(x, generate=False)
+                return f"{prefix}:{name}" if prefix else name
+            except Exception:
+                pass
+        return str(x)
+
+    def local_name(self, x):
+        qname = self(x)
+        if qname != str(x):
+            return qname.split(":", 1)[-1]
+        for separator in ("#", "/"):
+            name = str(x).rstrip(separator).rsplit(separator, 1)[-1]
+            if name:
+                return name
+        return str(x)
+
+
+def write_dot(triples, stream, namespace_manager=None, max_label_length=40, max_literal_length=None):
+    """
+    Write the DOT of a graph to a text stream.
+
+    params:
+    triples: the graph, or any iterable of (s, p, o) e.g. a Filter_Proxy; read once.
+    stream: the text stream written to.
+    namespace_manager: for the prefix:name of the IRIs (e.g. g.namespace_manager), full IRIs are written if None.
+    max_label_length: the node titles are shortened to this (None: not shortened).
+    max_literal_length: the literal values are shortened to this (None: not shortened).
+
+    return: (number of nodes, number of edges) written.
+    """
+    qname = _QNames(namespace_manager)
+    nodes = {}  # term --> node id
+    rows = defaultdict(set)  # node id --> {(predicate, literal)}
+    labels = {}  # term --> (rank of the label property, label)
+    label_rank = {p: rank for rank, p in enumerate(LABEL_PROPERTIES)}
+    edges = set()
+
+    def node(x):
+        node_id = nodes.get(x)
+        if node_id is None:
+            node_id = nodes[x] = "node%d" % len(nodes)
+        return node_id
+
+    stream.write('digraph { \n node [ fontname="DejaVu Sans" ] ; \n')
+    for s, p, o in triples:
+        sn = node(s)
+        rank = label_rank.get(p)
+        if rank is not None and isinstance(o, Literal):
+            if s not in labels or _better_label(rank, o, labels[s]):
+                labels[s] = (rank, o)
+            if p == RDFS.label:
+                continue  # as rdf2dot, the rdfs:label is the title only
+        if isinstance(o, (URIRef, BNode)):
+            edge = (sn, node(o), p)
+            if edge not in edges:
+                edges.add(edge)
+                stream.write(_EDGE % (edge[0], edge[1], _escape(qname(p))))
+        else:
+            rows[sn].add((qname(p), _format_literal(o, qname, max_literal_length)))
+
+    for x, node_id in nodes.items():
+        if x in labels:
+            title = str(labels[x][1])
+        elif isinstance(x, BNode):
+            title = "_:" + str(x)
+        elif isinstance(x, Literal):
+            title = str(x)
+        else:
+            title = qname.local_name(x)
+        iri = qname(x) if isinstance(x, URIRef) else str(x)
+        node_rows = "".join(_ROW % (_escape(predicate), value) for predicate, value in sorted(rows[node_id]))
+        stream.write(_NODE % (node_id, _escape(shorten(title, max_label_length)), _escape(str(x)),
+                              _escape(iri), node_rows))
+
+    stream.write("}\n")
+    return len(nodes), len(edges)
+
+
+def graph_to_dot(triples, namespace_manager=None, **options):
+    """
+    The DOT text of a graph, see write_dot for the parameters.
+    """
+    stream = io.StringIO()
+    write_dot(triples, stream, namespace_manager, **options)
+    return stream.getvalue()
+
+
+def render_dot(dot_text, fmt="png", dot_binary=None):
+    """
+    Run graphviz on the DOT text.
+
+    params:
+    dot_text: the DOT, str.
+    fmt: the graphviz output format, e.g. "png" or "svg".
+    dot_binary: the graphviz dot command, DOT_BINARY if None.
+
+    return: the rendered output, bytes.
+    """
+    dot_binary = dot_binary or DOT_BINARY
+    try:
+        completed = subprocess.run([dot_binary, "-T" + fmt], input=dot_text.encode("utf-8"), capture_output=True)
+    except FileNotFoundError:
+        raise RuntimeError(f"graphviz '{dot_binary}' was not found, is graphviz installed and on the PATH?")
+    if completed.returncode != 0:
+        raise RuntimeError(f"graphviz failed ({completed.returncode}): {completed.stderr.decode(errors='replace')}")
+    return completed.stdout
+
+
+def _escape(text):
+    """
+    text escaped for an html label, the characters XML does not allow being dropped.
+    """
+    return html.escape(_XML_INVALID.sub("", str(text)))
+
+
+def _better_label(rank, literal, current):
+    """
+    True if the label `literal` of a property of rank `rank` should replace the current (rank, label):
+    a lower rank wins, then an english or language-less label.
+    """
+    current_rank, current_label = current
+    if rank != current_rank:
+        return rank < current_rank
+    return current_label.language not in (None, "en") and literal.language in (None, "en")
+
+
+def _format_literal(o, qname, max_length):
+    value = _escape(shorten(o, max_length))
+    if o.datatype:
+        return "&quot;%s&quot;^^%s" % (value, _escape(qname(o.datatype)))
+    elif o.language:
+        return "&quot;%s&quot;@%s" % (value, o.language)
+    return "&quot;%s&quot;" % value
@@ -1,31 +1,55 @@
-import os, io, pydotplus, copy
-from IPython.display import display, Image
-from rdflib.tools.rdf2dot import rdf2dot
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from IPython.display import display, Image, SVG
+except ImportError:  # headless use, e.g. vis_batch in scripts and CI
+    display = None
 from rdflib import RDFS, Literal, Graph, BNode, Namespace, URIRef
 from rdflib.namespace import RDF, SKOS, RDFS, FOAF, OWL, RDF
+from .class_hierarchy import ClassHierarchyIndex
+from .bnode_index import BNodeIndex, concise_bounded_description
+from .dot_writer import graph_to_dot, render_dot
+from .render_cache import RenderIndex, graph_fingerprint
+from .summarise import summarise, count_nodes
+from .query import TripleQuery
+from .string_match import MultiPatternMatcher
 
 # Initialize a global counter for the serial number
 output_file_serial_number = 0
 
+# the nodes zoom_in does not expand (their triples are in the zoomed graph, but not their neighbours)
+_ZOOM_STOP_NODES = frozenset([OWL.Class, RDFS.comment])
+
 
 def next_serial():
     """
         used for automatic storing of the ontology images and dot fils from ontoVis,
         in the output folder, with image name seially incremented.
         TODO: could be a class parameter!
+
+        The serial is kept in the index file of the output folder (see render_cache.RenderIndex),
+        not found by probing the files one by one.
+        This only tells the next serial, nothing is reserved nor written: see reserve_serial.
+    """
+
+    output_folder = "OnoVis.Output"  # TODO: should be a class parameter
+    return RenderIndex(output_folder).next_serial()
+
+
+def reserve_serial():
+    """
+        Reserve the next serial number of the output folder (it is saved in its index file, so the next
+        call or vis gets the following one) and return it.
     """
 
     global output_file_serial_number
     output_folder = "OnoVis.Output"  # TODO: should be a class parameter
-    # keep incrementing until we find a number we can use.
-    while True:
-        serial_filename = f"{output_folder}/OntoVis-{output_file_serial_number}.png"
-        if not os.path.exists(serial_filename):
-            return output_file_serial_number
-        output_file_serial_number += 1
+    output_file_serial_number = RenderIndex(output_folder).reserve_serial()
+    return output_file_serial_number
 
 
-def vis(g, start_serial_number=None, max_string_length=25):
+def vis(g, start_serial_number=None, max_string_length=25, fmt="png", use_cache=True, max_nodes=None, expand=()):
     """
     TODO: visualise a graph, should this be a class method or a separate function, or a method that
     has access to the class state?
@@ -37,50 +61,167 @@ def vis(g, start_serial_number=None, max_string_length=25):
 
     gfilterred = Proxy(g, filter)
     and then path the filter obejct, .. instead of making copites of g..
+
+    The DOT is written by dot_writer (no rdf2dot/pydotplus round trip) and rendered by the graphviz dot binary,
+    fmt is the graphviz output format: "png" or "svg" are displayed in the notebook.
+
+    With use_cache, a graph already rendered with the same options (same triples once filtered, whatever their
+    order or blank node ids) is displayed from its existing file, without graphviz nor a new serial number.
+
+    With max_nodes, a graph with more than max_nodes nodes is drawn summarised (see summarise.py: the subclass
+    trees collapsed into counted clusters, the restrictions folded into edges ...), the classes in expand showing
+    all their subclasses, e.g. vis(module, max_nodes=300) for a whole ontology module. By default (None) the
+    whole graph is drawn, whatever its size.
+
+    return: the path of the image file.
     """
     if max_string_length is None:
         max_string_length = 50
     global output_file_serial_number  # TODO: should be a class parameter
     output_folder = "OnoVis.Output"  # TODO: should be a class parameter
-    # Create a copy of the graph
-    g_copy = copy.deepcopy(g)
-    # TODO: we could skip this and put in a filter function in place,
-    # TODO: that checks if the a predicate should be included or not based on pre set hueristics.
 
-    # Remove triples with rdfs:comment or long literals, ( this is the heuristics basically)
-    for s, p, o in g:
-        # if p == RDFS.comment or p == RDF.type:
-        if p == RDFS.comment:
-            g_copy.remove((s, p, o))  # would be skiped, in the filter above. (checl a Px=Proxy(x, filter) generator);
-        elif (isinstance(o, Literal) and len(str(o)) > max_string_length):
-            o = Literal(str(o)[0:max_string_length])
-
-    # get the next available serial number of the output
-    if start_serial_number is None:
-        serial = next_serial()
-
-    # from teh pydotplut example..
-    stream = io.StringIO()
-    rdf2dot(g_copy, stream)
-
-    dg = pydotplus.graph_from_dot_data(stream.getvalue())
-    png = dg.create_png()
+    g, triples = _vis_triples(g, max_nodes, expand)
+    index = RenderIndex(output_folder)
+    fingerprint = graph_fingerprint(triples, {"fmt": fmt, "max_string_length": max_string_length},
+                                    g.namespaces())
+    cached = index.lookup(fingerprint) if use_cache else None
+    if cached is not None:
+        with open(cached, "rb") as f:
+            _display_image(f.read(), fmt)
+        return cached
+
+    dot_text = graph_to_dot(triples, g.namespace_manager, max_literal_length=max_string_length)
+    image = render_dot(dot_text, fmt)
+
+    # get the next available serial number of the output, once graphviz succeeded so a failed render
+    # does not use one up
+    serial = start_serial_number
+    if serial is None:
+        serial = output_file_serial_number = index.reserve_serial()
 
     # Create the "output" folder if it doesn't exist
     os.makedirs(output_folder, exist_ok=True)
 
-    filename = f"{output_folder}/OntoVis-{serial}.png"  # TODO: use from class instance
+    filename = f"{output_folder}/OntoVis-{serial}.{fmt}"  # TODO: use from class instance
     dot_filename = f"{output_folder}/OntoVis-{serial}.dot"  # TODO: use from class instance
 
     # Display the image in the notebook
-    display(Image(png))
+    _display_image(image, fmt)
 
     # Save the image and dot file to the filenames in the output folder
     with open(filename, "wb") as f:
-        f.write(png)
+        f.write(image)
 
     with open(dot_filename, "w") as dot_file:
-        dot_file.write(stream.getvalue())
+        dot_file.write(dot_text)
+
+    index.record(fingerprint, filename)
+    return filename
+
+
+def vis_batch(subgraphs, jobs=None, fmt="png", max_string_length=25, output_folder="OnoVis.Output", use_cache=True,
+              max_nodes=None, expand=()):
+    """
+    Render many graphs without displaying them (no IPython needed), e.g. the zoomed subgraphs of a notebook run,
+    in scripts or CI.
+    The DOT of each graph is written here, one after the other, and graphviz runs in a pool of `jobs` threads
+    (the work is in the graphviz processes, so threads are enough). The renders are cached as in vis.
+
+    params:
+    subgraphs: a list of graphs, or a dict name --> graph.
+    jobs: number of graphviz processes run at once, os.cpu_count() if None.
+    fmt, max_string_length, use_cache, max_nodes, expand: as in vis.
+    output_folder: where the OntoVis-N.<fmt> and .dot files are written.
+
+    return: for each graph (a list in the same order, or a dict with the same keys), a dict with
+    "path" (the image file, None if graphviz failed), "cached" (True if it was already rendered),
+    "dot_seconds" and "render_seconds" (the time spent writing the DOT and in graphviz), and "error" if any.
+    """
+    if max_string_length is None:
+        max_string_length = 50
+    names = list(subgraphs.keys()) if isinstance(subgraphs, dict) else None
+    graphs = list(subgraphs.values()) if names is not None else list(subgraphs)
+
+    os.makedirs(output_folder, exist_ok=True)
+    index = RenderIndex(output_folder)
+    results = []
+    pending = {}  # fingerprint --> (result, dot filename, dot text), rendered once even if given several times
+    duplicates = []  # (result, fingerprint) of the graphs given again in the batch
+    for g in graphs:
+        start = time.perf_counter()
+        g, triples = _vis_triples(g, max_nodes, expand)
+        fingerprint = graph_fingerprint(triples, {"fmt": fmt, "max_string_length": max_string_length},
+                                        g.namespaces())
+        cached = index.lookup(fingerprint) if use_cache else None
+        if cached is not None or fingerprint in pending:
+            result = {"path": cached, "cached": True, "dot_seconds": time.perf_counter() - start,
+                      "render_seconds": 0.0}
+            if cached is None:
+                duplicates.append((result, fingerprint))
+            results.append(result)
+            continue
+
+        serial = index.reserve_serial()
+        dot_text = graph_to_dot(triples, g.namespace_manager, max_literal_length=max_string_length)
+        result = {"path": f"{output_folder}/OntoVis-{serial}.{fmt}", "cached": False,
+                  "dot_seconds": time.perf_counter() - start}
+        pending[fingerprint] = (result, f"{output_folder}/OntoVis-{serial}.dot", dot_text)
+        results.append(result)
+
+    def render(item):
+        result, dot_filename, dot_text = item
+        start = time.perf_counter()
+        try:
+            image = render_dot(dot_text, fmt)
+            with open(result["path"], "wb") as f:
+                f.write(image)
+            with open(dot_filename, "w") as dot_file:
+                dot_file.write(dot_text)
+        except (RuntimeError, OSError) as e:
+            result["error"] = str(e)
+        result["render_seconds"] = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        list(executor.map(render, pending.values()))
+
+    for fingerprint, (result, _, _) in pending.items():
+        if "error" in result:
+            result["path"] = None
+        else:
+            index.record(fingerprint, result["path"])
+
+    # the duplicates of a graph rendered in this batch get its outcome
+    for result, fingerprint in duplicates:
+        rendered = pending[fingerprint][0]
+        result["path"] = rendered["path"]
+        if "error" in rendered:
+            result["error"] = rendered["error"]
+
+    if names is not None:
+        return dict(zip(names, results))
+    return results
+
+
+def _vis_triples(g, max_nodes=None, expand=()):
+    """
+    The graph vis draws, summarised if it has more than max_nodes nodes, and its triples: the graph is not
+    copied, it is read through a filtered view in which rdfs:comment triples are skipped (the long literals are
+    shortened by the DOT writer) (this is the heuristics basically).
+    """
+    triples = list(TripleQuery(g).where_not(p=RDFS.comment))
+    if max_nodes is not None and count_nodes(triples) > max_nodes:
+        g = summarise(g, max_nodes=max_nodes, expand=expand)
+        triples = list(TripleQuery(g).where_not(p=RDFS.comment))
+    return g, triples
+
+
+def _display_image(image, fmt):
+    if display is None:
+        return
+    if fmt == "svg":
+        display(SVG(image))
+    elif fmt == "png":
+        display(Image(image))
 
 
 def filter_graph_by_string(g: Graph, the_str: str):
@@ -88,21 +229,35 @@ def filter_graph_by_string(g: Graph, the_str: str):
      Create a new subgraph with any elements that contain the_str in either the iri, the rdf:label or the skos:preflabel
      this is a case insensitive.
     """
+    return filter_graph_by_strings(g, [the_str])[the_str]
 
-    def contains_str(txt, sp):
-        if txt.lower() in str(sp).lower():
-            return True
-        else:
-            return False
 
-    filtered_graph = Graph()
+def filter_graph_by_strings(g: Graph, patterns):
+    """
+    filter_graph_by_string for many patterns at once, in a single pass over the graph.
+
+    params:
+    g: the graph.
+    patterns: strings, matched as case insensitive substrings of the s, p or o of the triples as in
+    filter_graph_by_string, and/or compiled regular expressions (re.compile), searched in them.
 
+    return: dict pattern --> the subgraph of the triples matching it.
+    Each distinct term is lowercased and matched against all the patterns once (see string_match.py).
+    """
+    patterns = list(dict.fromkeys(patterns))
+    matcher = MultiPatternMatcher(patterns)
+    matched = [[] for _ in patterns]
     for s, p, o in g:
-        is_str = False
-        if any(contains_str(the_str, x) for x in [s, p, o]):
-            filtered_graph.add((s, p, o))
+        found = matcher.match(s) | matcher.match(p) | matcher.match(o)
+        for index in found:
+            matched[index].append((s, p, o))
 
-    return filtered_graph
+    filtered_graphs = {}
+    for pattern, triples in zip(patterns, matched):
+        filtered_graph = Graph()
+        filtered_graph.addN((s, p, o, filtered_graph) for s, p, o in triples)
+        filtered_graphs[pattern] = filtered_graph
+    return filtered_graphs
 
 
 class OntoVis:
@@ -114,6 +269,9 @@ class OntoVis:
         self.RDFS = Namespace("http://www.w3.org/2000/01/rdf-schema#")
         self.OWL = Namespace("http://www.w3.org/2002/07/owl#")
         self.g = g
+        self._class_hierarchy = None
+        self._bnode_index = None
+        self._matrices = {}  # (predicates, exclude_predicates) --> node ids and sparse matrices, see _graph_matrices
 
     def clean_graph(self):
         """
@@ -128,44 +286,43 @@ class OntoVis:
         duplicating the work here?
 
         Note, this can be merged with zoom_in for a general method with some options.
+
+        The classes are found with the subClassOf index of the graph (see class_hierarchy()), not by SPARQL:
+        depth is (levels of superclasses, levels of subclasses).
         """
         sub_graph = Graph()
+        hierarchy = self.class_hierarchy()
+        root_class = URIRef(root_class)
 
-        self._add_subclasses(URIRef(root_class), sub_graph, depth[1])
-        self._add_superclasses(URIRef(root_class), sub_graph, depth[0])
+        sub_graph.addN((sub, RDFS.subClassOf, sup, sub_graph) for sub, sup in hierarchy.edges(root_class, depth[1]))
+        sub_graph.addN((sub, RDFS.subClassOf, sup, sub_graph)
+                       for sub, sup in hierarchy.edges(root_class, depth[0], down=False))
         return sub_graph
 
-    def _add_subclasses(self, class_uri, sub_graph, depth):
-        if depth == 0:
-            return
-        query = """
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    def query(self):
+        """
+        A TripleQuery over the graph: lazy, composable where()/filter()/select(), the where() constraints being
+        looked up with the graph indexes, see query.py.
+        """
+        return TripleQuery(self.g)
 
-        SELECT ?subclass
-        WHERE {
-            ?subclass rdfs:subClassOf <%s> .
-        }
-        """ % class_uri
-        for row in self.g.query(query):
-            subclass_uri = row.subclass
-            sub_graph.add((subclass_uri, self.RDFS.subClassOf, class_uri))
-            self._add_subclasses(subclass_uri, sub_graph, depth - 1)
-
-    def _add_superclasses(self, class_uri, sub_graph, depth):
-        if depth == 0:
-            return
-        query = """
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    def bnode_index(self, rebuild=False):
+        """
+        The BNodeIndex of the graph (concise bounded descriptions and decoded restrictions, lists ... of its
+        blank nodes, see bnode_index.py), built on the first call. rebuild=True if the graph changed since.
+        """
+        if self._bnode_index is None or rebuild:
+            self._bnode_index = BNodeIndex(self.g)
+        return self._bnode_index
 
-        SELECT ?superclass
-        WHERE {
-            <%s> rdfs:subClassOf ?superclass .
-        }
-        """ % class_uri
-        for row in self.g.query(query):
-            superclass_uri = row.superclass
-            sub_graph.add((class_uri, self.RDFS.subClassOf, superclass_uri))
-            self._add_superclasses(superclass_uri, sub_graph, depth - 1)
+    def class_hierarchy(self, rebuild=False):
+        """
+        The rdfs:subClassOf index of the graph (a ClassHierarchyIndex), built on the first call.
+        If the graph changed since, call with rebuild=True or update the index with its add/remove/update methods.
+        """
+        if self._class_hierarchy is None or rebuild:
+            self._class_hierarchy = ClassHierarchyIndex(self.g)
+        return self._class_hierarchy
 
     def zoom_in(self, root_uri, distance):
         """
@@ -177,6 +334,147 @@ class OntoVis:
         self._traverse_graph(root_uri, zoom_in_graph, distance-1, set())
         return zoom_in_graph
 
+    def adjacency_matrix(self, predicates=None, exclude_predicates=None, rebuild=False):
+        """
+        Export the graph as a node-ID mapping and a sparse (scipy CSR) adjacency matrix, for vectorised
+        graph algorithms. The matrix is built on the first call (for each predicate filter) and kept,
+        call with rebuild=True if the graph changed since.
+
+        params:
+        predicates: only the triples with one of these predicates make edges, all of them if None.
+        exclude_predicates: the triples with one of these predicates are left out.
+        rebuild: build the matrices again from the graph.
+
+        return: (nodes, node_index, matrix), nodes: list id --> node, node_index: dict node --> id,
+        matrix: n x n CSR matrix of 0/1 ints, symmetric (the relations are followed both ways as in zoom_in),
+        matrix[i, j] is 1 if a triple links nodes[i] and nodes[j].
+        """
+        matrices = self._graph_matrices(predicates, exclude_predicates, rebuild)
+        return matrices["nodes"], matrices["node_index"], matrices["adjacency"]
+
+    def zoom_in_many(self, seeds, distance, predicates=None, exclude_predicates=None, rebuild=False):
+        """
+        zoom_in for many seed nodes at once: the neighbourhoods of all the seeds are computed together with sparse
+        matrix products over the adjacency matrix, instead of one graph walk per seed. The matrices are built on
+        the first call and kept (see adjacency_matrix), so it pays off from the second call on.
+
+        params:
+        seeds: the nodes to zoom into.
+        distance: as in zoom_in.
+        predicates, exclude_predicates: restrict the relations that are followed and returned, see adjacency_matrix.
+        rebuild: build the matrices again, if the graph changed since the last call.
+
+        return: dict seed --> zoomed Graph, keyed by the seeds as given, the same graph zoom_in(seed, distance)
+        gives (when no predicate is filtered out). Requires numpy and scipy.
+        """
+        import numpy as np
+        from scipy import sparse
+
+        result = {seed: Graph() for seed in seeds}
+        matrices = self._graph_matrices(predicates, exclude_predicates, rebuild)
+        node_index = matrices["node_index"]
+        expandable = matrices["expandable"]
+        seeds = list(result)
+        known = []
+        for row, seed in enumerate(seeds):
+            node_id = node_index.get(seed if isinstance(seed, (URIRef, BNode)) else URIRef(seed))
+            if node_id is not None and expandable[node_id]:
+                known.append((row, node_id))
+        levels = distance - 1
+        if levels <= 0 or not known or not matrices["triples"]:
+            return result
+
+        # expanded[i, j]: node j is expanded in the neighbourhood of seed i, the first level expands the seed
+        rows, columns = zip(*known)
+        expanded = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, columns)),
+                                     shape=(len(seeds), len(matrices["nodes"])))
+        for _ in range(levels - 1):
+            reached = expanded + expanded @ matrices["adjacency"]
+            expanded = ((reached @ matrices["keep_expandable"]) > 0).astype(np.int32)
+
+        # the triples of the expanded nodes: those whose subject or object is one of them
+        selected = (expanded @ matrices["incidence"]).tocsr()
+        triples = matrices["triples"]
+        for row, seed in enumerate(seeds):
+            g = result[seed]
+            triple_ids = selected.indices[selected.indptr[row]:selected.indptr[row + 1]]
+            g.addN((*triples[i], g) for i in triple_ids)
+        return result
+
+    def _graph_matrices(self, predicates=None, exclude_predicates=None, rebuild=False):
+        """
+        The node ids and sparse matrices of the graph for a predicate filter, built on the first call and kept
+        in self._matrices; rebuild=True drops the ones of every filter and builds them again.
+
+        return: dict "nodes", "node_index", "triples" (see _graph_arrays), "adjacency" (see adjacency_matrix),
+        "incidence" (nodes x triples, 1 where the node is the subject or object of the triple), "expandable"
+        (bool array, the nodes zoom_in walks through) and "keep_expandable" (the diagonal matrix of it).
+        """
+        import numpy as np
+        from scipy import sparse
+
+        key = (frozenset(predicates) if predicates is not None else None, frozenset(exclude_predicates or ()))
+        if rebuild:
+            self._matrices.clear()
+        matrices = self._matrices.get(key)
+        if matrices is not None:
+            return matrices
+
+        nodes, node_index, triples, subjects, objects = self._graph_arrays(predicates, exclude_predicates)
+        n, t = len(nodes), len(triples)
+        expandable = np.array([not (isinstance(node, Literal) or node in _ZOOM_STOP_NODES) for node in nodes],
+                              dtype=bool)
+        incidence = sparse.csr_matrix(
+            (np.ones(2 * t, dtype=np.int32), (np.concatenate([subjects, objects]), np.tile(np.arange(t), 2))),
+            shape=(n, t))
+        matrices = self._matrices[key] = {
+            "nodes": nodes,
+            "node_index": node_index,
+            "triples": triples,
+            "adjacency": self._symmetric_adjacency(n, subjects, objects),
+            "incidence": incidence,
+            "expandable": expandable,
+            "keep_expandable": sparse.diags(expandable.astype(np.int32), format="csr", dtype=np.int32),
+        }
+        return matrices
+
+    def _graph_arrays(self, predicates=None, exclude_predicates=None):
+        """
+        One pass over self.g: return (nodes, node_index, triples, subjects, objects), the triples kept by the
+        predicate filters and the ids of their subjects and objects (numpy arrays).
+        """
+        import numpy as np
+
+        predicates = set(predicates) if predicates is not None else None
+        exclude_predicates = set(exclude_predicates or ())
+        nodes = []
+        node_index = {}
+        triples = []
+        subjects = []
+        objects = []
+        for s, p, o in self.g:
+            if (predicates is not None and p not in predicates) or p in exclude_predicates:
+                continue
+            for node, ids in ((s, subjects), (o, objects)):
+                node_id = node_index.get(node)
+                if node_id is None:
+                    node_id = node_index[node] = len(nodes)
+                    nodes.append(node)
+                ids.append(node_id)
+            triples.append((s, p, o))
+        return nodes, node_index, triples, np.array(subjects, dtype=np.int64), np.array(objects, dtype=np.int64)
+
+    @staticmethod
+    def _symmetric_adjacency(n, subjects, objects):
+        import numpy as np
+        from scipy import sparse
+
+        data = np.ones(2 * len(subjects), dtype=np.int32)
+        matrix = sparse.csr_matrix((data, (np.concatenate([subjects, objects]), np.concatenate([objects, subjects]))),
+                                   shape=(n, n))
+        matrix.data[:] = 1  # duplicated edges are summed by the constructor
+        return matrix
+
     def _traverse_graph2(self, uri, zoom_in_graph, distance, visited):
         if distance == 0 or uri in visited or uri == self.OWL.Class or uri == self.RDFS.Comment:
             return
@@ -211,48 +509,45 @@ class OntoVis:
     def _traverse_graph(self, uri, zoom_in_graph, distance, visited):
         """
         this version uses rdflib utilities, rather than sparql as the later is blind to bnodes!
-        """
-        if distance == 0 or uri in visited or uri == self.OWL.Class or uri == self.RDFS.Comment:
-            return
 
-        if isinstance(uri, Literal):
-            return
-
-        visited.add(uri)
-        if isinstance(uri, BNode):
-            # zoom_in_graph += self.zoom_in(uri, 1)
-            print(f"hello: {uri}")
-
-        # Query all related triples
-
-        for s, p, o in self.g:
-            if s == uri or o == uri:
-                zoom_in_graph.add((s, p, o))
-                # Recursive exploration for subject and object
-                if s != uri and s != self.OWL.Class and s != self.RDFS.comment:
-                    self._traverse_graph(s, zoom_in_graph, distance - 1, visited)
-                if o != uri and o != self.OWL.Class or not isinstance(o, Literal):
-                    self._traverse_graph(o, zoom_in_graph, distance - 1, visited)
+        A breadth-first walk from uri: each level expands the nodes of the frontier with two indexed triple
+        pattern lookups, (node, ?, ?) and (?, ?, node), so the cost is proportional to the size of the
+        neighbourhood rather than to the whole graph. BNodes are expanded like any other node, literals,
+        owl:Class and rdfs:comment are not.
+        All the triples of the nodes up to `distance` - 1 relations away from uri are added to zoom_in_graph.
+        """
+        frontier = [uri]
+        for _ in range(distance):
+            next_frontier = {}
+            for node in frontier:
+                if node in visited or node in _ZOOM_STOP_NODES or isinstance(node, Literal):
+                    continue
+                visited.add(node)
+
+                for s, p, o in self.g.triples((node, None, None)):
+                    zoom_in_graph.add((s, p, o))
+                    if o not in visited:
+                        next_frontier[o] = None
+                for s, p, o in self.g.triples((None, None, node)):
+                    zoom_in_graph.add((s, p, o))
+                    if s not in visited:
+                        next_frontier[s] = None
+            frontier = next_frontier
 
     @staticmethod
-    def dig_into_bnode(g, node, depth=0):
+    def dig_into_bnode(g, node, depth=0, index=None):
         """
         just a simple function, probably not needed since we have a zoon in
+
+        prints the concise bounded description of the bnode, each BNode once (a cycle of BNodes is not followed
+        forever), read from index (a BNodeIndex, see bnode_index.py) if given, else from g.
         """
-        for s, p, o in g.triples((node, None, None)):
+        triples = index.cbd(node) if index is not None else concise_bounded_description(g, node)
+        for s, p, o in triples:
             print(f"\t*depth {s} \t {p} \t {o}")
-            if isinstance(o, BNode) and o != node:
-                OntoVis.dig_into_bnode(g, o, depth + 1)
-        """
-        for s, p, o in g.triples((None, None, node)):
-            if s != node:
-                print(f"{indent}{s} \t {p} \t {o}")
-                if isinstance(s, BNode):
-                    recurse_bnode(g, s, depth + 1)
-        """
 
     @staticmethod
-    def explode_bnode(g: Graph, bnode: BNode):
+    def explode_bnode(g: Graph, bnode: BNode, index=None):
         """
         expand a bnode (explode it) so that we see what it is composed from.
         TODO: move to ontoman
@@ -260,8 +555,13 @@ class OntoVis:
         a node, which just happenes to be a bnode!
         not sure if it needs access to self.graph! but I want to use it for any small graph too.
 
+        return: the decoded bnode: Restriction, ClassExpression, tuple for a list ... (see BNodeIndex.expand),
+        with the BNodeIndex index if given (e.g. OntoVis.bnode_index()), else from the description of the bnode.
         """
-        OntoVis.dig_into_bnode(g, bnode)
+        OntoVis.dig_into_bnode(g, bnode, index=index)
+        if index is None:
+            index = BNodeIndex(concise_bounded_description(g, bnode))
+        return index.expand(bnode)
 
     @staticmethod
     def is_bnode(node):
@@ -289,15 +589,52 @@ class Filter_Proxy:
     for s, p, o in px:
         print(s, p, o)  # Prints triples that satisfy the filter_triple condition
 
-    TODO: check alternative, proxy pattern with hooks for __getattr_...
+    map_func, optional, transforms the items that pass the filter as they are read, e.g. to truncate literals,
+    without touching x.
+
+    When x is a Graph the proxy can stand for it where a read-only graph is expected (e.g. rdf2dot):
+    triples() and value() are filtered and mapped as well, the other attributes (namespace_manager,
+    compute_qname ...) are those of x. pattern, optional, is a (s, p, o) of terms (or sets of terms, None
+    for any) that the triples must match, looked up with the graph indexes instead of scanning all the triples.
+    It is a TripleQuery (see query.py) with one filter, use TripleQuery directly to compose more.
     """
 
-    def __init__(self, x, filter_func):
+    def __init__(self, x, filter_func, map_func=None, pattern=None):
         self.x = x
         self.filter_func = filter_func
+        self.map_func = map_func
+        self.pattern = pattern
+
+    def query(self, pattern=None):
+        """
+        The TripleQuery of the view, restricted to `pattern` if given.
+        """
+        q = TripleQuery(self.x)
+        if self.pattern is not None:
+            q = q.where(*self.pattern)
+        if pattern is not None:
+            q = q.where(*pattern)
+        q = q.filter(self.filter_func)
+        if self.map_func is not None:
+            q = q.map(self.map_func)
+        return q
 
     def __iter__(self):
-        return (item for item in self.x if self.filter_func(*item))
+        return iter(self.query())
+
+    def triples(self, triple_pattern):
+        return iter(self.query(triple_pattern))
+
+    def value(self, subject=None, predicate=RDF.value, object=None, default=None, any=True):
+        """
+        As Graph.value, on the filtered view: the first object (or subject) of the matching triples.
+        """
+        for s, p, o in self.triples((subject, predicate, object)):
+            return o if object is None else s
+        return default
+
+    def __getattr__(self, name):
+        return getattr(self.x, name)
 
 
 def printH(s):
@@ -0,0 +1,186 @@
+"""
+query.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+A lazy, composable filter/select pipeline over the triples of a graph:
+
+    q = TripleQuery(g).where(p=RDFS.subClassOf).where_not(o=OWL.Thing).filter(lambda s, p, o: ...)
+    for s, p, o in q:          # streamed, nothing is copied
+        ...
+    q.select("s")              # the distinct subjects, streamed
+    q.graph()                  # materialised in a new Graph, only when one is needed
+
+The where() constraints (a term or a set of terms for s, p and/or o) are pushed down to rdflib's indexed
+g.triples((s, p, o)) patterns, one pattern per combination of the allowed terms, so only the matching triples are
+read; the Python functions given to filter() then only run on those. Filter_Proxy is the one-function version of
+this, kept for the existing code.
+
+filter(), map() and limit() apply in the order they are called: q.limit(5).filter(f) keeps the triples among the
+5 first ones that pass f, q.filter(f).limit(5) the 5 first ones that pass f. A where() is pushed down to the
+source unless it follows a map() or a limit(), it is then checked in Python at its place in the pipeline.
+
+Each method returns a new query, the original one can be reused.
+"""
+
+import itertools
+
+from rdflib import Graph
+
+_POSITIONS = {"s": 0, "p": 1, "o": 2}
+
+# above this many (s, p, o) combinations of the allowed terms, only the most selective position is pushed down
+MAX_PATTERNS = 256
+
+
+class TripleQuery:
+    """
+    A lazy query over the triples of `source`, see the module doc.
+
+    params:
+    source: a Graph (anything with triples((s, p, o))) for the constraints to be pushed down,
+            or any iterable of (s, p, o), which is then scanned.
+    """
+
+    def __init__(self, source, _constraints=(None, None, None), _steps=()):
+        self.source = source
+        self._constraints = _constraints  # per position: None (any term) or a frozenset of the allowed terms
+        self._steps = _steps  # ("filter" | "map", function) or ("limit", n), applied in order
+
+    def _derive(self, constraints=None, steps=None):
+        return TripleQuery(self.source,
+                           self._constraints if constraints is None else constraints,
+                           self._steps if steps is None else steps)
+
+    def where(self, s=None, p=None, o=None):
+        """
+        Keep the triples whose s, p and o are the given term, or one of the given terms (a set, list ...);
+        None puts no constraint. Several where() are and-ed.
+        """
+        wanted = [_as_set(x) for x in (s, p, o)]
+        if any(kind in ("map", "limit") for kind, _ in self._steps):
+            # after a map the triples are no longer those of the source, after a limit the constraint applies
+            # to the triples kept by it: nothing can be pushed down
+            return self.filter(_membership_filter(wanted))
+        constraints = tuple(current if new is None else (new if current is None else current & new)
+                            for current, new in zip(self._constraints, wanted))
+        return self._derive(constraints=constraints)
+
+    def where_not(self, s=None, p=None, o=None):
+        """
+        Leave out the triples whose s, or p, or o is the given term (or one of the given terms).
+        """
+        unwanted = [_as_set(x) for x in (s, p, o)]
+
+        def keep(*triple):
+            return not any(terms is not None and x in terms for x, terms in zip(triple, unwanted))
+
+        return self.filter(keep)
+
+    def filter(self, func):
+        """
+        Keep the triples for which func(s, p, o) is true.
+        """
+        return self._derive(steps=self._steps + (("filter", func),))
+
+    def map(self, func):
+        """
+        Replace each triple by func(s, p, o), a triple.
+        """
+        return self._derive(steps=self._steps + (("map", func),))
+
+    def limit(self, n):
+        """
+        Stop after n triples, at this point of the pipeline (see the module doc).
+        """
+        return self._derive(steps=self._steps + (("limit", n),))
+
+    def patterns(self):
+        """
+        The (s, p, o) patterns, None being a wildcard, that are read from the source, and the constraints
+        left to be checked in Python: (patterns, residual constraints).
+        """
+        constraints = list(self._constraints)
+        if any(terms is not None and len(terms) == 0 for terms in constraints):
+            return [], constraints  # an empty intersection of where()
+        combinations = 1
+        for terms in constraints:
+            combinations *= len(terms) if terms is not None else 1
+        residual = [None, None, None]
+        if combinations > MAX_PATTERNS:
+            bound = [i for i, terms in enumerate(constraints) if terms is not None]
+            keep = min(bound, key=lambda i: len(constraints[i]))
+            for i in bound:
+                if i != keep:
+                    residual[i], constraints[i] = constraints[i], None
+        choices = [sorted(terms, key=_term_key) if terms is not None else [None] for terms in constraints]
+        return list(itertools.product(*choices)), residual
+
+    def __iter__(self):
+        triples = self._scan()
+        for kind, arg in self._steps:
+            triples = _apply(kind, arg, triples)
+        return triples
+
+    def _scan(self):
+        if not hasattr(self.source, "triples"):
+            check = _membership_filter(self._constraints)
+            return (triple for triple in self.source if check(*triple))
+        patterns, residual = self.patterns()
+        triples = itertools.chain.from_iterable(self.source.triples(pattern) for pattern in patterns)
+        if any(terms is not None for terms in residual):
+            check = _membership_filter(residual)
+            triples = (triple for triple in triples if check(*triple))
+        return triples
+
+    def select(self, *positions):
+        """
+        The distinct values of the given positions ("s", "p", "o"), streamed: a term if one position is given,
+        else a tuple.
+        """
+        indexes = [_POSITIONS[position] for position in positions]
+        seen = set()
+        for triple in self:
+            value = triple[indexes[0]] if len(indexes) == 1 else tuple(triple[i] for i in indexes)
+            if value not in seen:
+                seen.add(value)
+                yield value
+
+    def count(self):
+        return sum(1 for _ in self)
+
+    def graph(self):
+        """
+        The result materialised in a new Graph, with the namespaces of the source bound if it is a graph.
+        """
+        g = Graph()
+        if hasattr(self.source, "namespaces"):
+            for prefix, namespace in self.source.namespaces():
+                g.bind(prefix, namespace)
+        g.addN((s, p, o, g) for s, p, o in self)
+        return g
+
+
+def _apply(kind, arg, triples):
+    if kind == "filter":
+        return (triple for triple in triples if arg(*triple))
+    if kind == "limit":
+        return itertools.islice(triples, arg)
+    return (arg(*triple) for triple in triples)
+
+
+def _term_key(x):
+    return type(x).__name__, str(x)
+
+
+def _as_set(x):
+    if x is None:
+        return None
+    if isinstance(x, (set, frozenset, list, tuple)):
+        return frozenset(x)
+    return frozenset([x])
+
+
+def _membership_filter(constraints):
+    def check(*triple):
+        return all(terms is None or x in terms for x, terms in zip(triple, constraints))
+
+    return check
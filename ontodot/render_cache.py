@@ -0,0 +1,194 @@
+"""
+render_cache.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+The renders of vis() are cached in its output folder, so that running a notebook cell again does not call
+graphviz again nor write yet another OntoVis-N image for the same picture:
+
+- graph_fingerprint(): a hash of the (filtered) triples, the prefix bindings (they change the labels drawn) and
+  the rendering options, which does not depend on the order of the triples nor on the blank node ids, e.g. those
+  of a re-parsed file;
+- RenderIndex: an index.json file in the output folder with the next serial number and fingerprint --> file of
+  the images already rendered, so serial numbers no longer come from probing the files one by one.
+
+Blank nodes are named by a hash of what they describe (their outgoing triples, recursively), not by the
+rdflib canonicalisation (rdflib.compare), which is far too slow for whole ontologies.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+
+from rdflib import BNode
+
+INDEX_FILENAME = "index.json"
+
+_SERIAL_FILE = re.compile(r'^OntoVis-(\d+)\.')
+
+# held while an index file is read, changed and written back, see RenderIndex._update
+_INDEX_LOCK = threading.Lock()
+
+
+def graph_fingerprint(triples, options=None, namespaces=()):
+    """
+    A hex digest of the triples, the options (a json serialisable dict) and the namespaces, (prefix, namespace)
+    pairs as given by g.namespaces(), independent of the triples order and of the blank node ids.
+    """
+    triples = list(triples)
+    names = _bnode_names(triples)
+
+    def n3(x):
+        return names[x] if isinstance(x, BNode) else x.n3()
+
+    lines = sorted(f"{n3(s)} {n3(p)} {n3(o)}" for s, p, o in triples)
+    digest = hashlib.sha256()
+    digest.update(json.dumps(options or {}, sort_keys=True, default=str).encode('utf-8'))
+    for prefix, namespace in sorted((str(prefix), str(namespace)) for prefix, namespace in namespaces):
+        digest.update(f"\n@prefix {prefix}: <{namespace}>".encode('utf-8'))
+    for line in lines:
+        digest.update(b"\n")
+        digest.update(line.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _bnode_names(triples):
+    """
+    BNode --> name from a hash of its outgoing triples, the BNode objects being replaced by their own names.
+    A BNode met again while its description is hashed (a cycle) is named "cycle" there, and the results of
+    such descriptions, which depend on the path, are not memoised.
+    """
+    described = defaultdict(list)
+    for s, p, o in triples:
+        if isinstance(s, BNode):
+            described[s].append((p, o))
+    bnodes = set(described)
+    bnodes.update(x for s, p, o in triples for x in (s, o) if isinstance(x, BNode))
+
+    memo = {}
+
+    def name(bnode, stack):
+        if bnode in memo:
+            return memo[bnode], False
+        if bnode in stack:
+            return "_:cycle", True
+        stack.add(bnode)
+        parts = []
+        cyclic = False
+        for p, o in described.get(bnode, ()):
+            if isinstance(o, BNode):
+                o_name, o_cyclic = name(o, stack)
+                cyclic = cyclic or o_cyclic
+            else:
+                o_name = o.n3()
+            parts.append(f"{p.n3()} {o_name}")
+        stack.discard(bnode)
+        result = "_:" + hashlib.sha1("\n".join(sorted(parts)).encode('utf-8')).hexdigest()
+        if not cyclic:
+            memo[bnode] = result
+        return result, cyclic
+
+    names = {}
+    for bnode in bnodes:
+        try:
+            names[bnode] = name(bnode, set())[0]
+        except RecursionError:  # a very long rdf:List, the fingerprint is then not id independent
+            names[bnode] = bnode.n3()
+    return names
+
+
+class RenderIndex:
+    """
+    The index.json of a vis() output folder, see the module doc. Every change is written to the file at once:
+    the file is read again, changed and written back under a lock, so the indexes of the same folder in several
+    threads (e.g. vis_batch calls run at once) do not hand out the same serial nor lose each other's renders.
+
+    params:
+    output_folder: created if needed.
+    """
+
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, INDEX_FILENAME)
+        self.data = self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass  # a broken index is rebuilt
+        # first use of the folder (or of an older one): the serial is taken past the existing files,
+        # with one directory listing
+        serials = [int(m.group(1)) for m in map(_SERIAL_FILE.match, self._listdir()) if m]
+        return {"next_serial": max(serials, default=-1) + 1, "renders": {}}
+
+    def _listdir(self):
+        try:
+            return os.listdir(self.output_folder)
+        except FileNotFoundError:
+            return []
+
+    def save(self):
+        os.makedirs(self.output_folder, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.data, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def next_serial(self):
+        """
+        The next free serial number (past any OntoVis-N.dot file written without the index), without reserving it.
+        """
+        serial = self.data["next_serial"]
+        while os.path.exists(os.path.join(self.output_folder, f"OntoVis-{serial}.dot")):
+            serial += 1
+        return serial
+
+    def _update(self, change):
+        """
+        Apply change(data) to the index as it is in the file now and save it, return what change returns.
+        """
+        with _INDEX_LOCK:
+            self.data = self._load()
+            result = change(self.data)
+            self.save()
+        return result
+
+    def reserve_serial(self):
+        """
+        Reserve and return the next serial number, the index file is saved at once.
+        """
+        def reserve(data):
+            serial = self.next_serial()
+            data["next_serial"] = serial + 1
+            return serial
+
+        return self._update(reserve)
+
+    def lookup(self, fingerprint):
+        """
+        The path of the image rendered for this fingerprint, None if there is none (or its file was deleted).
+        """
+        filename = self.data["renders"].get(fingerprint)
+        if filename is None:
+            return None
+        path = os.path.join(self.output_folder, filename)
+        return path if os.path.exists(path) else None
+
+    def record(self, fingerprint, path):
+        """
+        Record that `path` is the render of `fingerprint`, forgetting any other render the file was of
+        (it was overwritten, e.g. with an explicit start_serial_number).
+        """
+        filename = os.path.basename(path)
+
+        def record(data):
+            renders = data["renders"]
+            for other in [key for key, value in renders.items() if value == filename]:
+                del renders[other]
+            renders[fingerprint] = filename
+
+        self._update(record)
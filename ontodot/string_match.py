@@ -0,0 +1,111 @@
+"""
+string_match.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+Matching many patterns against the terms of a graph at once, for filter_graph_by_strings:
+
+- the plain string patterns are case insensitive substrings; with many of them they are found in one scan of
+  the text by an Aho-Corasick automaton, whose cost does not grow with the number of patterns;
+- the compiled regular expressions (re.Pattern) are searched in the term as it is, with their own flags;
+- each distinct term is lowercased and matched once, the result is memoised.
+
+    matcher = MultiPatternMatcher(["atom", "matter", re.compile(r"EMMO_[0-9a-f]{8}")])
+    matcher.match(term)   # frozenset of the indexes of the patterns found in str(term)
+"""
+
+import re
+from collections import deque
+
+# below this many string patterns, `pattern in text` for each is faster than the (pure Python) automaton
+AUTOMATON_MIN_PATTERNS = 64
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over `words`: search(text) gives the indexes of the words found in text.
+    An empty word is found in any text, the empty text included, as with `"" in text`.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]  # state --> {character: next state}
+        self._fail = [0]
+        outputs = [set()]
+        for index, word in enumerate(words):
+            state = 0
+            for character in word:
+                next_state = self._goto[state].get(character)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                    self._goto[state][character] = next_state
+                state = next_state
+            outputs[state].add(index)
+
+        # the failure links, breadth first, each state inheriting the outputs of its failure state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and character not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(character, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                outputs[next_state] |= outputs[self._fail[next_state]]
+        self._outputs = [frozenset(output) for output in outputs]
+
+    def search(self, text):
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        found = set(outputs[0])  # the empty words, if any
+        state = 0
+        for character in text:
+            while state and character not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(character, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
+
+
+class MultiPatternMatcher:
+    """
+    Case insensitive substrings and regular expressions matched against terms, see the module doc.
+
+    params:
+    patterns: strings and/or compiled regular expressions; their indexes in this list identify them.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._strings = [(index, pattern.lower()) for index, pattern in enumerate(self.patterns)
+                         if isinstance(pattern, str)]
+        self._regexes = [(index, pattern) for index, pattern in enumerate(self.patterns)
+                         if isinstance(pattern, re.Pattern)]
+        if len(self._strings) + len(self._regexes) != len(self.patterns):
+            raise TypeError("the patterns must be strings or compiled regular expressions (re.compile)")
+        self._automaton = None
+        if len(self._strings) >= AUTOMATON_MIN_PATTERNS:
+            self._automaton = AhoCorasick([string for _, string in self._strings])
+        self._memo = {}
+
+    def match(self, term):
+        """
+        The indexes of the patterns found in str(term), memoised per term.
+        """
+        found = self._memo.get(term)
+        if found is None:
+            found = self._memo[term] = self._match(str(term))
+        return found
+
+    def _match(self, text):
+        lowered = text.lower()
+        if self._automaton is not None:
+            found = {self._strings[i][0] for i in self._automaton.search(lowered)}
+        else:
+            found = {index for index, string in self._strings if string in lowered}
+        found.update(index for index, regex in self._regexes if regex.search(text))
+        return frozenset(found)
@@ -0,0 +1,247 @@
+"""
+summarise.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+Level of detail for drawing large graphs: graphviz layout is unusable above a few thousand nodes, so a whole
+ontology module is summarised into a graph of at most `max_nodes` nodes before it is drawn:
+
+1. owl:Restriction BNodes are folded into one edge: C rdfs:subClassOf [owl:onProperty hasPart; owl:someValuesFrom X]
+   becomes C --ontodot:some.hasPart--> X;
+2. the rdfs:subClassOf tree is opened from its roots, level by level, while the budget allows it; a class whose
+   subclasses are not shown gets a counted cluster node "+N subclasses";
+3. a node with more than `max_degree` relations keeps the first ones and gets a "+N more" node for the rest;
+4. if there are still too many nodes, the ones furthest from the roots are left out, counted in one node.
+
+The nodes made up by the summary are in the urn:ontodot: namespace (prefix ontodot). The classes listed in
+`expand` always show their subclasses and all their relations, and their superclasses up to the roots: these are
+shown even if the budget is exceeded.
+
+    summary = summarise(g, max_nodes=200, expand=[EMMO.Matter])
+    vis(summary)
+"""
+
+import hashlib
+import re
+from collections import defaultdict, deque
+
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, RDFS, OWL, SKOS
+
+from .class_hierarchy import ClassHierarchyIndex
+from .bnode_index import BNodeIndex, Restriction
+
+ONTODOT = Namespace("urn:ontodot:")
+
+# the relations kept first when the degree of a node is capped
+_PRIORITY_PREDICATES = (RDFS.subClassOf, RDF.type, RDFS.subPropertyOf)
+
+
+def summarise(g: Graph, max_nodes=200, max_degree=20, expand=(), fold_restrictions=True):
+    """
+    A summary of `g` with at most about `max_nodes` nodes, see the module doc.
+
+    params:
+    g: the graph, not modified.
+    max_nodes: the node budget (literals are not nodes, they are drawn inside their subject).
+    max_degree: the relations drawn per node, the others are counted in a "+N more" node (None: no cap).
+    expand: classes shown with their superclasses and all their subclasses, whose relations are not capped.
+    fold_restrictions: fold the owl:Restriction BNodes into edges.
+
+    return: a new Graph, with the namespaces of g and ontodot bound.
+    """
+    expand = set(expand)
+    triples = list(_fold_restrictions(g) if fold_restrictions else g)
+
+    hierarchy = ClassHierarchyIndex(pairs=((s, o) for s, p, o in triples
+                                           if p == RDFS.subClassOf and not isinstance(o, Literal)))
+    nodes = {x for s, p, o in triples for x in (s, o) if not isinstance(x, Literal)}
+    classes = set(hierarchy)
+    others = len(nodes - classes)
+
+    visible, clusters, pinned = _open_hierarchy(hierarchy, max_nodes - others, expand)
+
+    summary = Graph()
+    for prefix, namespace in g.namespaces():
+        summary.bind(prefix, namespace)
+    summary.bind("ontodot", ONTODOT)
+
+    kept = [(s, p, o) for s, p, o in triples
+            if (s not in classes or s in visible) and (o not in classes or o in visible)]
+    for cls in clusters:
+        hidden = sum(1 for sub in hierarchy.descendants(cls) if sub not in visible)
+        cluster = _made_up_node("cluster", cls)
+        kept.append((cluster, RDFS.subClassOf, cls))
+        kept.append((cluster, RDFS.label, Literal(f"+{hidden} subclasses")))
+
+    if max_degree is not None:
+        kept = _cap_degree(kept, max_degree, expand, pinned)
+    kept = _cap_nodes(kept, max_nodes, [cls for cls in hierarchy if not hierarchy.parents(cls)], pinned)
+
+    summary.addN((s, p, o, summary) for s, p, o in kept)
+    return summary
+
+
+def count_nodes(triples):
+    """
+    The number of nodes (the subjects and non literal objects) drawn for the triples.
+    """
+    return len({x for s, p, o in triples for x in (s, o) if not isinstance(x, Literal)})
+
+
+def _fold_restrictions(g):
+    """
+    The triples of g with the restrictions folded: (C, p, restriction) --> (C, ontodot:<kind>.<property>, filler),
+    the triples of the folded restriction BNodes themselves being left out.
+    """
+    triples = list(g)  # read once, the graph iteration is the slow part
+    bnodes = BNodeIndex(triples)
+    folded = {}  # restriction BNode --> (edge predicate, filler)
+    names = {}  # property --> display name
+    for bnode in bnodes:
+        restriction = bnodes.decode(bnode)
+        if isinstance(restriction, Restriction) and restriction.on_property is not None:
+            cardinality = restriction.cardinality if restriction.cardinality is not None else ""
+            prop = restriction.on_property
+            if prop not in names:
+                names[prop] = _display_name(g, prop)
+            name = f"{restriction.kind}{cardinality}.{names[prop]}"
+            filler = restriction.filler if restriction.filler is not None else OWL.Thing
+            folded[bnode] = ONTODOT[name], filler
+
+    for s, p, o in triples:
+        if s in folded:
+            continue
+        if o in folded:
+            predicate, filler = folded[o]
+            yield s, predicate, filler
+        else:
+            yield s, p, o
+
+
+def _display_name(g, x):
+    """
+    A short name of x usable in an IRI: its label, or its local name.
+    """
+    label = g.value(x, SKOS.prefLabel) or g.value(x, RDFS.label)
+    if label is None:
+        label = re.split(r'[#/:]', str(x).rstrip('#/'))[-1]
+    return re.sub(r'[^\w.-]+', '_', str(label))
+
+
+def _made_up_node(kind, x):
+    return ONTODOT[f"{kind}.{hashlib.sha1(str(x).encode('utf-8')).hexdigest()[:12]}"]
+
+
+def _open_hierarchy(hierarchy, budget, expand):
+    """
+    Open the class hierarchy from its roots, one level at a time, while the classes shown plus their clusters fit
+    in the budget. The classes in expand, their ancestors and their subclasses are shown whatever the budget.
+
+    return: (the classes shown, the ones among them whose subclasses are not all shown, the classes shown because
+    of expand)
+    """
+    roots = sorted((cls for cls in hierarchy if not hierarchy.parents(cls)), key=str)
+    pinned = set()
+    for cls in expand:
+        if cls in hierarchy:
+            pinned.add(cls)
+            pinned.update(hierarchy.ancestors(cls))
+            pinned.update(hierarchy.children(cls))
+    visible = set(roots) | pinned
+
+    def has_hidden_children(cls):
+        return any(child not in visible for child in hierarchy.children(cls))
+
+    clusters = {cls for cls in visible if has_hidden_children(cls)}
+    frontier = roots
+    walked = set(roots)
+    while frontier:
+        next_frontier = []
+        for cls in frontier:
+            children = sorted((child for child in hierarchy.children(cls) if child not in visible), key=str)
+            if children:
+                new_clusters = sum(1 for child in children if hierarchy.children(child))
+                shown = len(visible) + len(clusters)
+                if cls in expand or shown + len(children) + new_clusters - 1 <= budget:
+                    visible.update(children)
+                    clusters.update(child for child in children if has_hidden_children(child))
+            if not has_hidden_children(cls):
+                clusters.discard(cls)
+            # the pinned subclasses are walked too, whether cls was opened or not
+            for child in sorted(hierarchy.children(cls), key=str):
+                if child in visible and child not in walked:
+                    walked.add(child)
+                    next_frontier.append(child)
+        frontier = next_frontier
+    # a class may have had all its subclasses shown through other parents
+    clusters = {cls for cls in clusters if has_hidden_children(cls)}
+    return visible, clusters, pinned
+
+
+def _cap_degree(triples, max_degree, expand, pinned=()):
+    """
+    Keep at most max_degree relations per node (the ones between pinned nodes, then the hierarchy ones first),
+    the others of a node being counted in a "+N more" node linked to it.
+    """
+    def priority(triple):
+        s, p, o = triple
+        return (0 if s in pinned and o in pinned else 1,
+                _PRIORITY_PREDICATES.index(p) if p in _PRIORITY_PREDICATES else len(_PRIORITY_PREDICATES), str(p))
+
+    degree = defaultdict(int)
+    dropped = defaultdict(int)
+    kept = []
+    edges = []
+    for triple in triples:
+        (edges if not isinstance(triple[2], Literal) else kept).append(triple)
+    for s, p, o in sorted(edges, key=priority):
+        full = [x for x in (s, o) if degree[x] >= max_degree and x not in expand]
+        if full:
+            dropped[full[0]] += 1
+            continue
+        degree[s] += 1
+        degree[o] += 1
+        kept.append((s, p, o))
+    for node, n in dropped.items():
+        more = _made_up_node("more", node)
+        kept.append((node, ONTODOT.more, more))
+        kept.append((more, RDFS.label, Literal(f"+{n} more")))
+    return kept
+
+
+def _cap_nodes(triples, max_nodes, roots, pinned=()):
+    """
+    If the triples have more than max_nodes nodes, keep the pinned ones and the first ones met walking from the
+    roots (then from the nodes with the most relations) up to max_nodes - 1, and count the others in one node.
+    """
+    if count_nodes(triples) <= max_nodes:
+        return triples
+    neighbours = defaultdict(list)
+    for s, p, o in triples:
+        if not isinstance(o, Literal):
+            neighbours[s].append(o)
+            neighbours[o].append(s)
+    for s, p, o in triples:
+        neighbours.setdefault(s, [])
+
+    keep = {node for node in pinned if node in neighbours}
+    queue = deque(sorted(keep, key=str))
+    seeds = [root for root in roots if root in neighbours]
+    seeds += sorted(neighbours, key=lambda x: (-len(neighbours[x]), str(x)))
+    for seed in seeds:
+        if len(keep) >= max_nodes - 1:
+            break
+        if seed not in keep:
+            keep.add(seed)
+            queue.append(seed)
+        while queue and len(keep) < max_nodes - 1:
+            for other in neighbours[queue.popleft()]:
+                if other not in keep:
+                    keep.add(other)
+                    queue.append(other)
+                    if len(keep) >= max_nodes - 1:
+                        break
+
+    kept = [(s, p, o) for s, p, o in triples if s in keep and (isinstance(o, Literal) or o in keep)]
+    omitted = len(neighbours) - len(keep)
+    kept.append((ONTODOT.omitted, RDFS.label, Literal(f"+{omitted} nodes not shown")))
+    return kept
@@ -0,0 +1,167 @@
+"""
+frozen_store.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+A read-only, compact rdflib store for large, fully loaded ontologies (EMMO + ABox data ...).
+
+rdflib's default Memory store keeps every term as a Python object referenced from several dict based indexes,
+which costs a lot of memory per triple. The FrozenStore instead:
+
+- interns every term once, in a list, and works with their integer ids;
+- keeps the triples as three sorted permutations (SPO, POS, OSP) of the ids, each as three NumPy columns;
+- answers a triples() pattern by binary search (searchsorted) in the permutation whose prefix is bound.
+
+The store can not be modified. A Graph on top of it works as usual for reading, SPARQL included:
+
+    frozen = Graph(store=FrozenStore(g, g.namespaces()))
+
+see OntologyManager.freeze, which does this for the loaded ontologies. Requires numpy.
+
+"""
+
+import numpy as np
+from rdflib.graph import ModificationException
+from rdflib.plugins.stores.memory import Memory
+from rdflib.store import Store
+
+# the permutations, as the positions of s, p and o (0, 1, 2) in the order they are sorted by
+_PERMUTATIONS = {"spo": (0, 1, 2), "pos": (1, 2, 0), "osp": (2, 0, 1)}
+
+# which permutation answers a pattern, given which of s, p and o are bound.
+# The bound positions are a prefix of the chosen permutation.
+_PATTERN_INDEX = {
+    (True, True, True): "spo",
+    (True, True, False): "spo",
+    (True, False, True): "osp",
+    (False, True, True): "pos",
+    (True, False, False): "spo",
+    (False, True, False): "pos",
+    (False, False, True): "osp",
+    (False, False, False): "spo",
+}
+
+# the matching rows are decoded this many at a time
+_DECODE_BLOCK = 1 << 16
+
+
+class FrozenStore(Store):
+    """
+    Read-only store with integer encoded terms and sorted NumPy permutation indexes, see the module doc.
+
+    params:
+    triples: iterable of (s, p, o), e.g. a Graph.
+    namespaces: iterable of (prefix, namespace), e.g. g.namespaces(), bound in the store.
+    """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, triples=(), namespaces=()):
+        super().__init__()
+        self._terms = []  # id --> term
+        self._ids = {}  # term --> id
+        self._namespaces = Memory()
+
+        for prefix, namespace in namespaces:
+            self._namespaces.bind(prefix, namespace)
+
+        ids = self._ids
+        terms = self._terms
+        encoded = []
+        for triple in triples:
+            for term in triple:
+                term_id = ids.get(term)
+                if term_id is None:
+                    term_id = ids[term] = len(terms)
+                    terms.append(term)
+                encoded.append(term_id)
+
+        dtype = np.int32 if len(terms) < 2 ** 31 else np.int64
+        rows = np.unique(np.array(encoded, dtype=dtype).reshape(-1, 3), axis=0)
+        del encoded
+
+        self._len = len(rows)
+        self._indexes = {}
+        for name, order in _PERMUTATIONS.items():
+            permuted = rows[:, order]
+            sort = np.lexsort((permuted[:, 2], permuted[:, 1], permuted[:, 0]))
+            self._indexes[name] = tuple(np.ascontiguousarray(permuted[sort, i]) for i in range(3))
+
+    def triples(self, triple_pattern, context=None):
+        """
+        The triples matching the pattern (None being a wildcard), as rdflib stores do:
+        ((s, p, o), contexts) tuples, the contexts being always empty as this store has no named graphs.
+        """
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+                continue
+            term_id = self._ids.get(term)
+            if term_id is None:
+                return  # an unknown term matches nothing
+            ids.append(term_id)
+
+        name = _PATTERN_INDEX[tuple(term_id is not None for term_id in ids)]
+        order = _PERMUTATIONS[name]
+        columns = self._indexes[name]
+        lo, hi = self._prefix_range(columns, [ids[i] for i in order if ids[i] is not None])
+
+        # put the rows back in s, p, o order
+        spo_columns = [columns[order.index(i)] for i in range(3)]
+        terms = self._terms
+        for start in range(lo, hi, _DECODE_BLOCK):
+            end = min(start + _DECODE_BLOCK, hi)
+            for s, p, o in zip(*(column[start:end].tolist() for column in spo_columns)):
+                yield (terms[s], terms[p], terms[o]), iter(())
+
+    def _prefix_range(self, columns, key):
+        """
+        The [lo, hi) rows of the permutation `columns` whose first len(key) ids are `key`, each column being sorted
+        within the range selected by the previous ones.
+        """
+        lo, hi = 0, self._len
+        for column, value in zip(columns, key):
+            block = column[lo:hi]
+            lo, hi = lo + int(np.searchsorted(block, value, 'left')), lo + int(np.searchsorted(block, value, 'right'))
+            if lo == hi:
+                break
+        return lo, hi
+
+    def __len__(self, context=None):
+        return self._len
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def nbytes(self):
+        """
+        Memory used by the permutation indexes, in bytes (the interned terms themselves not included).
+        """
+        return sum(column.nbytes for columns in self._indexes.values() for column in columns)
+
+    # read-only
+
+    def add(self, triple, context=None, quoted=False):
+        raise ModificationException()
+
+    def addN(self, quads):
+        raise ModificationException()
+
+    def remove(self, triple, context=None):
+        raise ModificationException()
+
+    # namespace bindings, which are allowed to change, are kept in a small Memory store
+
+    def bind(self, prefix, namespace, override=True):
+        self._namespaces.bind(prefix, namespace, override=override)
+
+    def namespace(self, prefix):
+        return self._namespaces.namespace(prefix)
+
+    def prefix(self, namespace):
+        return self._namespaces.prefix(namespace)
+
+    def namespaces(self):
+        return self._namespaces.namespaces()
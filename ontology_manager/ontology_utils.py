@@ -10,12 +10,134 @@ see Roadmap.md for planned features.
 """
 
 from rdflib.namespace import RDF, SKOS, RDFS, FOAF, OWL
-from rdflib import Graph, URIRef, Namespace, Literal, BNode
+from rdflib import Graph, URIRef, Namespace, Literal, BNode, Dataset
+from rdflib.graph import ReadOnlyGraphAggregate, ModificationException
+from rdflib.paths import Path
 import xml.etree.ElementTree as ET
 from urllib.parse import urlparse
-import os, warnings
+import os, warnings, time
 import re, uuid
 from typing import Union
+from concurrent.futures import ProcessPoolExecutor
+
+from .parse_cache import ParseCache, file_digest
+from .rdf_formats import guess_rdf_format, parse_rdf_file
+from .search_index import SearchIndex
+from .term_resolver import TermResolver, Terms, label_entries
+from .uid_map import UIDLabelMap, HAS_UID_LABEL, UID_MAP_FILENAME, split_iri
+from .stream_rewrite import rewrite_file
+
+# the file extensions tried when looking for the local file of an owl:imports IRI, see _resolve_import
+_ONTOLOGY_FILE_SUFFIXES = ("", ".ttl", ".owl", ".rdf", ".nt", ".nq", ".jsonld")
+
+# a label can be used as-is as the fragment of an IRI if it has no white space, no characters excluded from IRIs
+# (RFC 3987) and no '#', a '%' only as a percent-encoded octet.
+_IRI_FRAGMENT = re.compile(r'(?:[^\x00-\x20<>"{}|\\^`#%]|%[0-9A-Fa-f]{2})+')
+
+
+def _load_graph(ontology_path, cache: ParseCache = None, g: Graph = None):
+    """
+    Parse the ontology file at `ontology_path` into `g` (a new graph if None), going through the parse cache if
+    one is given: an unchanged file is rebuilt from the cache instead of being parsed, a parsed one is stored in
+    the cache.
+
+    The format is guessed from the extension or the content of the file, and compressed files are read through,
+    see rdf_formats.py.
+
+    return: (g, the label entries of g, the file_digest of the file or None), the label entries (see
+    term_resolver.label_entries) are cached with the triples, the digest is only computed for the cache key
+    and handed back so that reload() does not read the file again for it.
+    """
+    fmt = guess_rdf_format(ontology_path)
+
+    if cache is not None and not os.path.isfile(ontology_path):
+        cache = None  # a remote ontology, not cached
+
+    digest = None
+    if cache is not None:
+        digest = file_digest(ontology_path)
+        key = cache.key(ontology_path, fmt or "", digest)
+        payload = cache.get(key)
+        if payload is not None:
+            g = _graph_from_triples(payload["triples"], payload["namespaces"], g)
+            labels = payload.get("labels")  # not in the entries cached by older versions
+            return g, labels if labels is not None else label_entries(g), digest
+
+    if g is None:
+        g = Graph(bind_namespaces="rdflib")
+    parse_rdf_file(g, ontology_path, fmt)
+    labels = label_entries(g)
+
+    if cache is not None:
+        cache.put(key, {"triples": list(g), "namespaces": list(g.namespaces()), "labels": labels})
+    return g, labels, digest
+
+
+def _parse_ontology_file(onto_uri, ontology_path, cache: ParseCache = None):
+    """
+    Parse a single catalog entry, this is the unit of work handed to the process pool of `load_ontology`.
+
+    The graph itself is not sent back to the parent process, only its triples, namespace bindings and label
+    entries, which are cheap to pickle and are merged into a fresh graph by `_graph_from_triples`.
+
+    return: (onto_uri, triples, namespaces, labels, digest, seconds, error), digest as returned by _load_graph,
+    error is None on success, otherwise the message of the exception (exceptions raised by the parsers are not
+    always picklable).
+    """
+    start = time.perf_counter()
+    try:
+        g, labels, digest = _load_graph(ontology_path, cache)
+    except Exception as e:
+        return onto_uri, None, None, None, None, time.perf_counter() - start, str(e)
+    return onto_uri, list(g), list(g.namespaces()), labels, digest, time.perf_counter() - start, None
+
+
+def _graph_from_triples(triples, namespaces, g: Graph = None):
+    """
+    Rebuild a graph from the output of `_parse_ontology_file`, with the same bindings as the parsed one.
+    The triples are added to `g` if given (e.g. a named graph of a Dataset), otherwise to a new graph.
+    """
+    if g is None:
+        g = Graph(bind_namespaces="none")
+    for prefix, namespace in namespaces:
+        g.bind(prefix, namespace, replace=True)
+    g.addN((s, p, o, g) for s, p, o in triples)
+    return g
+
+
+class _UnionGraph(Graph):
+    """
+    Read-only view of the union of all the named graphs in the store of a Dataset, nothing is copied.
+
+    Unlike the Dataset itself, which iterates over quads, this behaves like any other Graph (triples,
+    subject_objects, value, query, ...), so it can be handed to code written for the per-file graphs.
+    """
+
+    def __init__(self, dataset: Dataset):
+        super().__init__(store=dataset.store, namespace_manager=dataset.namespace_manager,
+                         bind_namespaces="none")
+
+    def triples(self, triple):
+        s, p, o = triple
+        if isinstance(p, Path):
+            for s, o in p.eval(self, s, o):
+                yield s, p, o
+            return
+        # context=None is the union of all the graphs in the store.
+        for (s, p, o), _ in self.store.triples((s, p, o), context=None):
+            yield s, p, o
+
+    def __len__(self):
+        return self.store.__len__(context=None)
+
+    def add(self, triple):
+        raise ModificationException()
+
+    def addN(self, quads):
+        raise ModificationException()
+
+    def remove(self, triple):
+        raise ModificationException()
 
 
 class OntologyManager:
@@ -27,7 +149,8 @@ class OntologyManager:
     This is the main class.
     """
 
-    def __init__(self, ontology_base_path, catalog_filename):
+    def __init__(self, ontology_base_path, catalog_filename, cache_dir=None, cache_max_bytes=1 << 30,
+                 use_dataset: bool = False):
         """
         # TODO:add needed types etc.
         params:
@@ -35,6 +158,12 @@ class OntologyManager:
         ontology_base_path:  Required, the path to the folder with the ontology
         catalog_filename or ontology file:  Required, the filename of the catalog file
         or the ontology file name (if only one file, e.g, emmo inferred)
+        cache_dir: Optional, a folder for the parse cache (see parse_cache.py), unchanged files are then
+        loaded from the cache instead of being parsed again. No caching if None (default).
+        cache_max_bytes: Optional, the size limit of the parse cache, default 1 GiB.
+        use_dataset: Optional, keep all the ontologies in one rdflib Dataset (self.dataset), one named graph per
+        catalog entry, instead of one independent Graph each. Cross-ontology operations then read the union of
+        the named graphs (see union_graph) without copying them.
 
         return: An instance to this ontology manager
 
@@ -47,6 +176,14 @@ class OntologyManager:
 
 
         self.ontology_graphs[onto_uri] = g.  : maps a URI from teh catalog_map to an actual dflib graph
+        (with use_dataset, g is the view of the named graph onto_uri in self.dataset)
+
+        self.search_index: the names and labels of the terms of the loaded graphs (see search_index.py),
+        kept up to date as the graphs are loaded, reloaded or rewritten, see search(). The graphs are only
+        indexed on the first use of the index, a load that is never searched does not pay for it.
+
+        self.term_resolver: the label <--> IRI dicts of the loaded graphs (see term_resolver.py), maintained in the
+        same way, see terms and ambiguous_labels().
 
         """
         self.ontology_base_path = ontology_base_path
@@ -54,6 +191,14 @@ class OntologyManager:
         self.catalog_path = os.path.join(self.ontology_base_path, self.catalog_filename)
         self.catalog_map = {}
         self.ontology_graphs = {}
+        self.parse_cache = ParseCache(cache_dir, cache_max_bytes) if cache_dir is not None else None
+        self.dataset = Dataset(default_union=True) if use_dataset else None
+        self._sources = {}  # onto_uri --> (path, mtime, size, hash) of the loaded file, see reload()
+        self._catalog_from_imports = False  # True if the catalog_map was built by resolve_imports
+        self._frozen = set()  # the names of the graphs frozen with freeze()
+        self._search_index = SearchIndex()
+        self._search_pending = {}  # the names of the graphs loaded but not in the search index yet, in order
+        self.term_resolver = TermResolver()
 
 
     def parse_catalog(self):
@@ -108,34 +253,443 @@ class OntologyManager:
             print(f"Error reading file: {e}")
 
 
-    def load_ontology(self):
+    def load_ontology(self, jobs: int = 1):
         """
 
         Load the ontology from the files/URL's based on the catalogue,
         requires first that the class is initialised and
         that the catalogue is read-in.
 
-        Returns: None
+        params:
+        jobs: number of worker processes used to parse the catalog entries, 1 (default) parses them one
+        after the other in this process, None uses all the cores of the machine.
+        The parallel path loads the same triples (the BNode ids differ, as in any re-parse).
+
+        Returns: dict mapping each ontology URI (name) to the seconds it took to load it.
 
         Populates the self.ontology_graphs dict: A dictionary mapping ontology URIs (names) to
         their respective RDFLib graphs.
 
-        NOTE: TODO: This should work even if the catalogue file is not present, as we should be able to also create the map
-        from the local imports in the main ontology file if no catalog is needed.
+        This always (re)loads everything, use reload() to only parse again what changed since.
+
+        If the catalog_map is empty (no catalogue file was parsed), catalog_filename is taken to be the main
+        ontology file and the map is created from its owl:imports instead, see resolve_imports.
         """
 
+        if not self.catalog_map:
+            return self.resolve_imports(jobs=jobs)
+
         self.ontology_graphs = {}
+        self._sources = {}
+        self._frozen = set()
+        self._search_index = SearchIndex()
+        self._search_pending = {}
+        self.term_resolver = TermResolver()
+        if self.dataset is not None:
+            self.dataset = Dataset(default_union=True)
+
+        return self._load_entries(list(self.catalog_map), jobs)
+
+
+    def reload(self, jobs: int = 1):
+        """
+        Incremental version of load_ontology: read the catalog again and only parse the entries that were added,
+        or whose file changed (mtime/size, then content hash) since they were loaded. The graphs of the removed
+        entries are dropped, the unchanged graphs are kept in memory as they are (including any edit made to them).
+
+        If the new version of a changed file fails to parse, the error is reported and the previous graph is kept
+        (it is retried on the next reload), except with use_dataset where the named graph is parsed in place and
+        so is lost: the entry is then dropped.
+
+        params:
+        jobs: as in load_ontology, for the entries that need parsing.
 
+        return: {"added": [...], "changed": [...], "removed": [...], "unchanged": [...], "failed": [...],
+        "timings": {...}} the lists hold ontology names, failed the added or changed ones that could not be loaded,
+        timings as returned by load_ontology for the parsed entries.
+        """
+        if os.path.isfile(self.catalog_path) and not self._catalog_from_imports:
+            old_catalog_map = self.catalog_map
+            self.catalog_map = {}
+            self.parse_catalog()
+            if not self.catalog_map and old_catalog_map:
+                print(f"No ontology found in {self.catalog_path}, keeping the previous catalog")
+                self.catalog_map = old_catalog_map
+
+        removed = [onto_uri for onto_uri in self.ontology_graphs if onto_uri not in self.catalog_map]
+        for onto_uri in removed:
+            self._drop_graph(self.ontology_graphs.pop(onto_uri))
+            self._unindex_graph(onto_uri)
+            self._sources.pop(onto_uri, None)
+            self._frozen.discard(onto_uri)
+            print(f"Removed ontology: {onto_uri}")
+
+        added, changed, unchanged = [], [], []
         for onto_uri, relative_onto_path in self.catalog_map.items():
-            ontology_path = os.path.join(self.ontology_base_path, relative_onto_path)
-            g = Graph(bind_namespaces="rdflib")  #
+            if onto_uri not in self.ontology_graphs:
+                added.append(onto_uri)
+            elif self._source_changed(onto_uri, self._location(relative_onto_path)):
+                changed.append(onto_uri)
+            else:
+                unchanged.append(onto_uri)
+
+        kept = set()  # the changed graphs that stay usable until their new version is loaded
+        for onto_uri in changed:
+            g = self.ontology_graphs[onto_uri]
+            if self.dataset is not None and g.store is self.dataset.store:
+                # the new version is parsed into the same named graph
+                self._drop_graph(g)
+            else:
+                kept.add(onto_uri)
+
+        timings = self._load_entries(added + changed, jobs)
+        failed = [onto_uri for onto_uri in added + changed if onto_uri not in self._sources]
+        for onto_uri in changed:
+            if onto_uri in self._sources:
+                self._frozen.discard(onto_uri)
+            elif onto_uri in kept:
+                print(f"Keeping the previously loaded version of {onto_uri}")
+            else:
+                # the new version failed to load, and the old one is gone from the dataset already
+                self.ontology_graphs.pop(onto_uri, None)
+                self._unindex_graph(onto_uri)
+                self._frozen.discard(onto_uri)
+
+        return {"added": added, "changed": changed, "removed": removed, "unchanged": unchanged, "failed": failed,
+                "timings": timings}
+
+
+    def resolve_imports(self, ontology_file: str = None, jobs: int = 1):
+        """
+        Build the catalog_map without a catalogue file, by following the owl:imports of the main ontology file.
+
+        The owl:imports closure is walked breadth-first, all the new imports of one level are parsed concurrently
+        (in a process pool if jobs > 1), already seen imports are skipped, so duplicates and import cycles are
+        loaded only once. Each import IRI is mapped to a local file when one is found (see _resolve_import),
+        otherwise to the IRI itself, which rdflib then fetches.
+
+        params:
+        ontology_file: the main ontology file, default catalog_filename in ontology_base_path.
+        jobs: as in load_ontology.
+
+        return: as load_ontology, the timings of each loaded ontology.
+
+        Fills the catalog_map as parse_catalog would from an equivalent catalogue: import IRI --> location relative
+        to ontology_base_path (the main ontology is named after its owl:Ontology IRI), and since every ontology is
+        parsed on the way, the ontology_graphs as well.
+        """
+        if ontology_file is None:
+            ontology_file = self.catalog_path
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+
+        self.catalog_map = {}
+        self.ontology_graphs = {}
+        self._sources = {}
+        self._frozen = set()
+        self._search_index = SearchIndex()
+        self._search_pending = {}
+        self.term_resolver = TermResolver()
+        self._catalog_from_imports = True
+        if self.dataset is not None:
+            self.dataset = Dataset(default_union=True)
+
+        timings = {}
+        seen_iris = set()
+        seen_paths = {os.path.abspath(ontology_file)}
+        level = [(None, ontology_file)]  # (name, path), the name of the main ontology is only known once parsed
+
+        pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        try:
+            while level:
+                if pool is not None:
+                    results = pool.map(_parse_ontology_file, *zip(*[(name, path, self.parse_cache) for name, path in level]))
+                else:
+                    results = (_parse_ontology_file(name, path, self.parse_cache) for name, path in level)
+
+                next_level = []
+                for (name, ontology_path), (_, triples, namespaces, labels, digest, seconds, error) in zip(level, results):
+                    if error is not None:
+                        name = name or ontology_path
+                        self.catalog_map[name] = self._relative_location(ontology_path)
+                        timings[name] = seconds
+                        print(f"Error loading ontology {name}: {error}")
+                        continue
+
+                    if name is None:
+                        ontology_iris = sorted(s for s, p, o in triples if p == RDF.type and o == OWL.Ontology)
+                        name = str(ontology_iris[0]) if ontology_iris else ontology_path
+                        seen_iris.add(URIRef(name))
+
+                    self.catalog_map[name] = self._relative_location(ontology_path)
+                    self.ontology_graphs[name] = _graph_from_triples(triples, namespaces, self._new_graph(name))
+                    self._index_graph(name, labels)
+                    self._record_source(name, ontology_path, digest)
+                    timings[name] = seconds
+                    print(f"Loaded ontology: {name}")
+
+                    imports = sorted({o for s, p, o in triples if p == OWL.imports and isinstance(o, URIRef)})
+                    for import_iri in imports:
+                        if import_iri in seen_iris:
+                            continue
+                        seen_iris.add(import_iri)
+                        import_path = self._resolve_import(import_iri, os.path.dirname(ontology_path))
+                        if import_path in seen_paths or os.path.abspath(import_path) in seen_paths:
+                            # another IRI of an ontology we already have (e.g. its versionIRI)
+                            self.catalog_map[str(import_iri)] = self._relative_location(import_path)
+                            continue
+                        seen_paths.add(os.path.abspath(import_path) if os.path.isfile(import_path) else import_path)
+                        next_level.append((str(import_iri), import_path))
+                level = next_level
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        return timings
+
+
+    def _resolve_import(self, import_iri: URIRef, importer_dir: str):
+        """
+        Find the file of the ontology `import_iri` imported from a file in `importer_dir`.
+
+        Looked for in importer_dir and in ontology_base_path are the trailing segments of the IRI path, e.g. for
+        http://emmo.info/emmo/1.0.0-beta5/mereocausality: emmo/1.0.0-beta5/mereocausality,
+        1.0.0-beta5/mereocausality, mereocausality, each as is, with a known extension, and as folder/folder.ttl
+        (the EMMO layout). The IRI itself is returned if none exists (a remote ontology).
+        """
+        parsed = urlparse(str(import_iri))
+        if parsed.scheme == "file" and os.path.isfile(parsed.path):
+            return parsed.path
+        if not parsed.scheme:
+            candidate = os.path.join(importer_dir, str(import_iri))
+            if os.path.isfile(candidate):
+                return candidate
+
+        segments = [segment for segment in parsed.path.split('/') if segment]
+        for folder in dict.fromkeys([importer_dir, self.ontology_base_path]):
+            for i in range(len(segments)):
+                tail = os.path.join(folder, *segments[i:])
+                for suffix in _ONTOLOGY_FILE_SUFFIXES:
+                    if os.path.isfile(tail + suffix):
+                        return tail + suffix
+                for suffix in _ONTOLOGY_FILE_SUFFIXES[1:]:
+                    candidate = os.path.join(tail, segments[-1] + suffix)
+                    if os.path.isfile(candidate):
+                        return candidate
+        return str(import_iri)
+
+
+    def _location(self, relative_onto_path: str):
+        """
+        Where to load a catalog entry from: the path relative to ontology_base_path, or the URL for a remote one.
+        """
+        if urlparse(relative_onto_path).scheme in ("http", "https", "file"):
+            return relative_onto_path
+        return os.path.join(self.ontology_base_path, relative_onto_path)
+
+
+    def _relative_location(self, ontology_path: str):
+        """
+        The reverse of _location: the path relative to ontology_base_path if the file is under it.
+        """
+        if urlparse(ontology_path).scheme in ("http", "https", "file"):
+            return ontology_path
+        relative_path = os.path.relpath(ontology_path, self.ontology_base_path)
+        return ontology_path if relative_path.startswith(os.pardir) else relative_path
+
+
+    def _load_entries(self, onto_uris, jobs: int = 1):
+        """
+        Parse the catalog entries `onto_uris` into self.ontology_graphs, in a process pool if jobs > 1,
+        and record the state of their files for reload().
+
+        return: dict mapping each ontology URI (name) to the seconds it took to load it.
+        """
+        timings = {}
+
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+
+        paths = {onto_uri: self._location(self.catalog_map[onto_uri]) for onto_uri in onto_uris}
+
+        if jobs > 1 and len(paths) > 1:
+            results = {}
+            with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+                futures = [pool.submit(_parse_ontology_file, onto_uri, ontology_path, self.parse_cache)
+                           for onto_uri, ontology_path in paths.items()]
+                for future in futures:
+                    onto_uri, triples, namespaces, labels, digest, seconds, error = future.result()
+                    results[onto_uri] = (triples, namespaces, labels, digest, error)
+                    timings[onto_uri] = seconds
+
+            # merge in catalog order, so that the graphs are in the same order as for the serial path.
+            for onto_uri, ontology_path in paths.items():
+                triples, namespaces, labels, digest, error = results[onto_uri]
+                if error is None:
+                    self.ontology_graphs[onto_uri] = _graph_from_triples(triples, namespaces, self._new_graph(onto_uri))
+                    self._index_graph(onto_uri, labels)
+                    self._record_source(onto_uri, ontology_path, digest)
+                    print(f"Loaded ontology: {onto_uri}")
+                else:
+                    self._sources.pop(onto_uri, None)
+                    print(f"Error loading ontology {onto_uri}: {error}")
+            return timings
+
+        for onto_uri, ontology_path in paths.items():
+            start = time.perf_counter()
+            g = self._new_graph(onto_uri)
             try:
-                g.parse(ontology_path,
-                        format='turtle')  # TODO #12 load-ontology: does not check if an ontology is already loaded.
+                _, labels, digest = _load_graph(ontology_path, self.parse_cache, g)
                 self.ontology_graphs[onto_uri] = g
+                self._index_graph(onto_uri, labels)
+                self._record_source(onto_uri, ontology_path, digest)
                 print(f"Loaded ontology: {onto_uri}")
             except Exception as e:
+                self._drop_graph(g)
+                self._sources.pop(onto_uri, None)
                 print(f"Error loading ontology {onto_uri}: {e}")
+            timings[onto_uri] = time.perf_counter() - start
+
+        return timings
+
+
+    def _record_source(self, onto_uri, ontology_path, digest=None):
+        """
+        Remember the path, mtime, size and content hash of the file `onto_uri` was loaded from, see reload().
+        The file is not hashed here: digest is the one computed for the parse cache key, None without the cache.
+        Only the path is kept for a remote ontology (a URL in the catalog).
+        """
+        try:
+            stat = os.stat(ontology_path)
+            self._sources[onto_uri] = (ontology_path, stat.st_mtime_ns, stat.st_size, digest)
+        except OSError:
+            self._sources[onto_uri] = (ontology_path, None, None, None)
+
+
+    def _source_changed(self, onto_uri, ontology_path):
+        """
+        True if the file of `onto_uri` is not the one that was loaded: another path, or another content.
+        The (cheap) mtime and size are checked first, the content hash only if they differ and the hash of the
+        loaded file is known (with the parse cache), so that touching a file does not trigger a reload. Without
+        the cache a touched file is taken as changed.
+        """
+        if onto_uri not in self._sources:
+            return True
+        loaded_path, mtime_ns, size, digest = self._sources[onto_uri]
+        if mtime_ns is None:
+            return loaded_path != ontology_path
+        try:
+            stat = os.stat(ontology_path)
+        except OSError:
+            return True
+        if loaded_path == ontology_path and stat.st_mtime_ns == mtime_ns and stat.st_size == size:
+            return False
+        if loaded_path != ontology_path or stat.st_size != size or digest is None:
+            return True
+        if file_digest(ontology_path) != digest:
+            return True
+        self._sources[onto_uri] = (ontology_path, stat.st_mtime_ns, size, digest)
+        return False
+
+
+    def _index_graph(self, onto_uri, labels=None):
+        """
+        (Re)index the terms of the loaded graph `onto_uri` for search() and terms, `labels` being its label
+        entries if they are known already (see _load_graph).
+        """
+        self._search_pending[onto_uri] = None  # see search_index
+        self.term_resolver.add_graph(onto_uri, self.ontology_graphs[onto_uri], entries=labels)
+
+
+    def _unindex_graph(self, onto_uri):
+        self._search_pending.pop(onto_uri, None)
+        self._search_index.remove_graph(onto_uri)
+        self.term_resolver.remove_graph(onto_uri)
+
+
+    @property
+    def search_index(self):
+        """
+        The SearchIndex of the loaded graphs, the graphs loaded since its last use are indexed first
+        (building it is most of the cost of indexing, the term_resolver is kept up to date at once).
+        """
+        for onto_uri in self._search_pending:
+            self._search_index.add_graph(onto_uri, self.ontology_graphs[onto_uri])
+        self._search_pending.clear()
+        return self._search_index
+
+
+    def _new_graph(self, onto_uri):
+        """
+        An empty graph for the ontology `onto_uri`: a named graph of self.dataset with use_dataset, a Graph otherwise.
+        """
+        if self.dataset is not None:
+            return self.dataset.graph(URIRef(onto_uri))
+        return Graph(bind_namespaces="rdflib")
+
+
+    def _drop_graph(self, g: Graph):
+        """
+        Forget the triples of `g`, needed with use_dataset as a named graph lives on in the dataset.
+        """
+        if self.dataset is not None and g.store is self.dataset.store:
+            self.dataset.remove_graph(g)
+
+
+    def union_graph(self):
+        """
+        A read-only Graph over all the loaded ontologies, without copying them.
+
+        With use_dataset this is the union of the named graphs of self.dataset (each triple once), otherwise (or once
+        some graphs are frozen, as they are out of the dataset) an aggregate of the graphs in self.ontology_graphs
+        (a triple in several graphs is seen several times).
+        """
+        if self.dataset is not None and not self._frozen:
+            return _UnionGraph(self.dataset)
+        if not self.ontology_graphs:
+            return Graph()
+        return ReadOnlyGraphAggregate(list(self.ontology_graphs.values()))
+
+
+    def freeze(self, onto_uri: str = None):
+        """
+        Replace the loaded graph of `onto_uri` (all of them if None) by a read-only copy backed by a FrozenStore
+        (see frozen_store.py), which takes a fraction of the memory of the default store. The frozen graphs work
+        as usual for reading (triples, SPARQL, ontodot, ...), but can not be modified any more, and are left as
+        they are by reload() unless their file changed. Requires numpy.
+
+        return: the frozen graph, or the dict of them if onto_uri is None.
+        """
+        from .frozen_store import FrozenStore  # numpy is only needed here
+
+        onto_uris = list(self.ontology_graphs) if onto_uri is None else [onto_uri]
+        frozen = {}
+        for name in onto_uris:
+            g = self.ontology_graphs[name]
+            if not isinstance(g.store, FrozenStore):
+                frozen_g = Graph(store=FrozenStore(g, g.namespaces()), identifier=g.identifier)
+                self._drop_graph(g)
+                self.ontology_graphs[name] = frozen_g
+                self._frozen.add(name)
+            frozen[name] = self.ontology_graphs[name]
+
+        return frozen if onto_uri is None else frozen[onto_uri]
+
+
+    def invalidate_cache(self, onto_uri: str = None):
+        """
+        Drop the parse cache entry of the ontology `onto_uri` (a name in the catalog_map),
+        or the whole parse cache if no name is given.
+
+        return: the number of removed cache entries.
+        """
+        if self.parse_cache is None:
+            return 0
+        if onto_uri is None:
+            return self.parse_cache.invalidate()
+        ontology_path = self._location(self.catalog_map[onto_uri])
+        # the same format as in the key of _load_graph
+        return self.parse_cache.invalidate(ontology_path, guess_rdf_format(ontology_path) or "")
 
 
     def find(self, some_keyword: str = ""):
@@ -150,10 +704,62 @@ class OntologyManager:
 
         dict_keys = [key for key in self.ontology_graphs if some_keyword in key]
         # we may need to adapt if we merge catalog_map and ontology_graphs
+        # to find a term (class, property ...) rather than an ontology, see search()
 
         return dict_keys
 
 
+    def search(self, query: str, limit: int = 20, fuzzy: bool = True, ontologies: list = None):
+        """
+        Find terms of the loaded ontologies by (part of) their local name, rdfs:label, skos:prefLabel,
+        skos:altLabel or elucidation, case insensitive, from the search index instead of scanning the triples.
+
+        params:
+        query: the text looked for, e.g. "atom".
+        limit: the maximum number of hits, None for all of them.
+        fuzzy: also return the terms whose texts are close to the query (e.g. misspelt), ranked after the
+        ones containing it.
+        ontologies: only search the terms of these ontologies (names as in ontology_graphs), default all.
+
+        return: list of SearchHit(term, score, field, text, graphs), best first, see SearchIndex.search.
+
+        Example:
+            for hit in manager.search("electron"):
+                print(hit.score, hit.term, hit.field, hit.text)
+        """
+        return self.search_index.search(query, limit=limit, fuzzy=fuzzy, graphs=ontologies)
+
+
+    @property
+    def terms(self):
+        """
+        The terms of the loaded ontologies by label, per namespace prefix (see term_resolver.py):
+
+            manager.terms.emmo.Atom                 # the IRI of the class labelled Atom
+            manager.terms.emmo["Chemical Element"]  # labels that are not identifiers
+            manager.terms.label_of(iri)             # and back
+
+        The prefixes are the ones bound in the ontology files, the labels their skos:prefLabel, rdfs:label and
+        skos:altLabel in any language. An ambiguous label raises AmbiguousLabelError, see ambiguous_labels().
+        """
+        return Terms(self.term_resolver)
+
+
+    def ambiguous_labels(self, namespace: str = None):
+        """
+        Report the labels given to several terms of the same namespace with the same precedence (e.g. two
+        skos:prefLabel "Atom"@en), which terms can not resolve.
+
+        params: namespace: only this namespace (e.g. "http://emmo.info/emmo#"), default all of them.
+
+        return: dict (namespace, label) --> sorted list of the IRIs with that label
+        """
+        report = self.term_resolver.ambiguous(namespace)
+        for (ns, label), iris in sorted(report.items()):
+            print(f"ambiguous label '{label}' in {ns}: " + ", ".join(str(iri) for iri in iris))
+        return report
+
+
     def parse_uri(self, uri: URIRef = None):
         """
 
@@ -191,115 +797,147 @@ class OntologyManager:
         # no need for parsed_uri, could add later if we need the query etc.
         return {"separator": separator, "base_uri": base_uri, "fragment_uri": fragment_uri}
 
-    def emmo_to_label(self, onto_namespace: Union[URIRef, str] = None, onto_prefix: str = None, new_annotation: str = None):
+    def emmo_to_label(self, onto_namespace: Union[URIRef, str] = "http://emmo.info/emmo", onto_prefix: str = "EMMO_",
+                      new_annotation: Union[URIRef, str] = SKOS.prefLabel, map_path: str = None, graphs: dict = None):
         """
         Modify the label of ontology items produced by protege method for prefix+Global ID (a UUID with _)
-        to human friendly/collaboration easy labels.
+        to human friendly/collaboration easy labels, e.g. emmo:EMMO_eb77076b_a104_42ac_a065_798b2d2809ad --> emmo:Atom
 
-        a mapping is created and is embedded into the modified ontology (added property hasUIDLabel with the old label).
-        this is so we can map it back if needed.
+        a mapping is created and saved in a sidecar file (see uid_map.py), and the old local name is embedded into
+        the modified ontology (added annotation ontoman:hasUIDLabel with the old label).
+        this is so we can map it back if needed, see unfix_emmo_label.
 
+        The map saved by an earlier call is loaded first and extended, so graphs loaded (or reloaded) later are
+        renamed consistently with the ones already done: their references to the renamed terms follow the saved map
+        even if the labels are defined in another graph.
 
         parameters:
+        :onto_namespace is the name space, e.g, http://emmo.info/emmo that should be changed, the separator (#, /, :)
+        does not need to be provided, the IRIs starting with it are renamed.
+
         :onto_prefix: is the prefix used in the protege, see https://github.com/emmo-repo/EMMO/blob/master/doc/protege-setup.md
         the parameter should be set to PREFIX_ : a given prefix for the ontology in protege.
         e.g. EMMO_ for emmo.
 
-        :onto_namespace is the name space, e.g, http://emmo.info/emmo that should be changed, the separator (#, /, :) should not be provided.
+        :new_annotation: is the annotation property holding the new name, e.g. skos:prefLabel, rdfs:label, ...
+        (a URIRef, or a prefixed name such as "skos:prefLabel"); an english or untagged label is preferred.
 
-        :new_annotation: is the new annotation property, e.g. skos:prefLabel, rdfs:label, ...
+        :map_path: the sidecar file of the map, default uid_label_map.tsv in ontology_base_path.
 
-        Although designed for EMMO, it is intended to be general.
-
-        : internal comments for devs
-        pattern=rf'^{re.escape(prefix)}[0-9a-fA-F_\-]+'
-        matched a prefix and any UID with _ or - in the name.
-        use: if re.match(pattern, sl): where sl is the local name extraxcted by parse_uri (also check the qname method of rdflib)
-
-        Take EMMO which uses a local fragment like this: EMMO_<some UID> which makes it obscure to work with,
-        hence we have this utility that does the following:
-
-        - checks if there is a label (RDFS:label or SKOS:preflabel)
-        - extracts the obscure EMMO_<UID>` from each entity
-        - adds a new data property to each entity : hasOriginalLocalLabel
-        - sets hasOriginalLocalLabel  to the Literal of the EMMO_<UID>
-        - gets the part of the IRI without the fragment,
-        - replaces it with the new label
-
-        TODO:
-        take an ontology management data structure and
-        define the onto_IRI_prefix that is used by protege,
-        and the digit count (should be 20 usually)
-        and then build the query:
-
-        import re
-        uuid_pattern = re.compile(r"PREFIX_[0-9a-fA-F]{8}_[0-9a-fA-F]{4}_[0-9a-fA-F]{4}_[0-9a-fA-F]{4}_[0-9a-fA-F]{12}")
-        or
-        (https://bukkit.org/threads/best-way-to-check-if-a-string-is-a-uuid.258625/)
-        String uuid = ""; //define it!
-        if (uuid.matches("[0-9a-f]{8}-[0-9a-f]{4}-[1-5][0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}")) {
-
-        the above assumed UUID, but it seems protege uses something else.
-
-        (All UUID's are in the form of 8-4-4-4-12, with the numbers representing hexadecimals.)
+        :graphs: dict name --> graph to rename, default self.ontology_graphs.
 
+        Labels that are not valid IRI fragments, or shared by several terms (which would merge them), are not used
+        and are reported, the terms keep their UID IRI.
 
+        Although designed for EMMO, it is intended to be general.
 
+        return: the UIDLabelMap, as saved.
         """
-        # for _, g in self.ontology_graphs.items():
-        #    if "properties" in _:
-        #        for s,p, o in g:
-        #            print('[', str(s), str(p), str(o),']', self.parse_uri(s), '\n')
-
-        print("replacing the prefix ", onto_prefix, "with name space", onto_namespace)
-        # find the properties ontology, just for testing.
-
-        k = self.find('perceptual')
-        print(k)
-        # guid_pattern = re.compile(r"onto_prefix[0-9a-fA-F]{8}_[0-9a-fA-F]{4}_[0-9a-fA-F]{4}_[0-9a-fA-F]{4}_[0-9a-fA-F]{12}")
-
-        g1 = self.ontology_graphs[k[0]]
-        print(g1)
-
-        for g in [g1]:  # in self.ontology_graphs.values():
-            print(g)
-            for s, p, o in g:
-                for e in [s, p, o]:
-                    if isinstance(e, URIRef):
-                        parsed_uri = self.parse_uri(e)
-                        local_name = parsed_uri["fragment_uri"]
-                        name_space = parsed_uri["base_uri"]
-                        iri_separator = parsed_uri["separator"]
-                        assert (e == name_space + iri_separator + local_name)
-                        if name_space.startswith(onto_namespace) and local_name.startswith(onto_prefix):
-                            # print(onto_namespace, name_space, onto_prefix, local_name)
-                            gid = local_name.split(onto_prefix)[-1]
-                            # print(gid, self.is_custom_uuid(gid))
-                            # print(e)
+        if graphs is None:
+            graphs = self.ontology_graphs
+        if map_path is None:
+            map_path = os.path.join(self.ontology_base_path, UID_MAP_FILENAME)
+        if not isinstance(new_annotation, URIRef):
+            new_annotation = Graph().namespace_manager.expand_curie(str(new_annotation))
+        onto_namespace = str(onto_namespace)
+
+        uid_map = UIDLabelMap.load(map_path)
+        saved = len(uid_map)
+
+        # the new terms: UID IRIs of the namespace with a label, that are not in the map yet
+        labels = {}  # uid IRI --> (language rank, label)
+        for name, g in graphs.items():
+            for uid, label in g.subject_objects(new_annotation):
+                if not isinstance(uid, URIRef) or not isinstance(label, Literal) or uid in uid_map:
+                    continue
+                namespace, local_name = split_iri(uid)
+                if not namespace.startswith(onto_namespace) or not local_name.startswith(onto_prefix):
+                    continue
+                rank = 0 if label.language in (None, "en") else 1
+                if uid not in labels or (rank, str(label)) < labels[uid]:
+                    labels[uid] = rank, str(label)
+
+        uids_by_label = {}
+        invalid_labels = {}
+        for uid, (_, label) in labels.items():
+            if not _IRI_FRAGMENT.fullmatch(label):
+                invalid_labels[uid] = label
+                continue
+            uids_by_label.setdefault(URIRef(split_iri(uid)[0] + label), []).append(uid)
+        collisions = {}
+        for label_iri, uids in sorted(uids_by_label.items()):
+            if len(uids) == 1 and uid_map.add(uids[0], label_iri):
+                continue
+            renamed_before = uid_map.uid_iri(label_iri)  # a term of the saved map has that label already
+            collisions[label_iri] = sorted(uids + ([renamed_before] if renamed_before is not None else []))
+        for label_iri, uids in list(collisions.items())[:10]:
+            print(f"not renamed, {label_iri} would be shared by: " + ", ".join(str(uid) for uid in uids))
+        for uid, label in list(invalid_labels.items())[:10]:
+            print(f"not renamed, the label {label!r} of {uid} is not a valid IRI fragment")
+        if len(collisions) > 10 or len(invalid_labels) > 10:
+            print(f"... {len(collisions)} shared labels and {len(invalid_labels)} invalid labels in total")
+
+        rewritten = self.rewrite_iris(uid_map.forward(), graphs)
+
+        # the UIDs as annotations of the renamed terms, in the graphs that describe them
+        for name, g in graphs.items():
+            annotations = []
+            for uid, label_iri in uid_map:
+                if (label_iri, None, None) in g and (label_iri, HAS_UID_LABEL, None) not in g:
+                    annotations.append((label_iri, HAS_UID_LABEL, Literal(split_iri(uid)[1]), g))
+            g.addN(annotations)
+
+        uid_map.save(map_path)
+        print(f"renamed {len(uid_map) - saved} new terms ({len(uid_map)} in the map {map_path}), "
+              f"rewrote {rewritten} triples")
+        return uid_map
+
+
+    def unfix_emmo_label(self, map_path: str = None, graphs: dict = None):
+        """
+        Undo emmo_to_label: rename the label IRIs back to their UID IRIs in one pass over the graphs (see
+        rewrite_iris), and remove the hasUIDLabel annotations.
 
-                            # print(s,p,o)
-                            print("old e", e, f"({s, p, o})")
-                            # print("new e", URIRef(name_space+iri_separator+"XX"))
-                            if g.value(e, new_annotation) is not None:
-                                print(f"new anno is {g.value(e, new_annotation)}")
-                            # print(f"new anno is {(e, URIRef(new_annotation))}")
+        The pairs that were undone are removed from the sidecar file, which is saved again: a pair is kept while its
+        label IRI is still used in one of the loaded ontologies (e.g. only some of them were given in `graphs`).
 
-        # for s, p, o in self.ontology_graphs[k[0]]:
-        # replace statements with s
+        params:
+        map_path: the sidecar file saved by emmo_to_label, default uid_label_map.tsv in ontology_base_path. If there
+        is no such file the map is rebuilt from the hasUIDLabel annotations of the graphs (and no file is written).
+        graphs: dict name --> graph, default self.ontology_graphs.
 
+        return: the number of triples that were rewritten.
         """
-          now that we know got the test ontology, lets loop and change each strange local fragment to something useful, 
-          however note we cannot just simple replace the first occurrence, as the same fragment can appear in many subjects and subjects. 
-    
-          one option is to use a map store, we call it uid_label_map for example, then we need everytime to ask 
-            - is this uri a uid type, if yes, do we have already a mapping, if yes use it, if not create one. 
-    
-            note though that the mapping could be part of the new ontology, if we are copting. need to check how rdflib updates graphs.      
-        """
-
-
-    def unfix_emmo_label(self):
-        pass
+        if graphs is None:
+            graphs = self.ontology_graphs
+        if map_path is None:
+            map_path = os.path.join(self.ontology_base_path, UID_MAP_FILENAME)
+
+        saved = os.path.isfile(map_path)
+        if saved:
+            uid_map = UIDLabelMap.load(map_path)
+        else:
+            print(f"no map {map_path}, using the hasUIDLabel annotations")
+            uid_map = UIDLabelMap()
+            for g in graphs.values():
+                for uid, label_iri in UIDLabelMap.from_annotations(g):
+                    uid_map.add(uid, label_iri)
+
+        for g in graphs.values():
+            g.remove((None, HAS_UID_LABEL, None))
+        rewritten = self.rewrite_iris(uid_map.reverse(), graphs)
+        print(f"renamed {len(uid_map)} terms back to their UID, rewrote {rewritten} triples")
+
+        if saved:
+            searched = list(graphs.values()) + [g for g in self.ontology_graphs.values()
+                                                if all(g is not other for other in graphs.values())]
+            for uid, label_iri in list(uid_map):
+                if not any((label_iri, None, None) in g or (None, None, label_iri) in g or (None, label_iri, None) in g
+                           for g in searched):
+                    uid_map.remove(uid)
+            uid_map.save(map_path)
+            print(f"{len(uid_map)} terms left in the map {map_path}")
+        return rewritten
 
 
     def is_valid_uuid(self, val):
@@ -334,9 +972,21 @@ class OntologyManager:
         new_annotation: URIRef: the new label should be an existing propery, e,g. skos:prefLabel
         g:              Graph
 
+        The map is built from a single pass over the (indexed) `new_annotation` triples, rather than looking up
+        the label of every s, p and o of every triple. When an entity has several labels the first one is used,
+        as g.value() does.
+
+        Every labelled entity is the subject of its own label triple, so with the s before o before p precedence
+        of the maps it always ends up in s_map; o_map and p_map are kept (empty) for the callers.
+
+        Labels that are not usable as an IRI fragment (e.g. with spaces) and labels shared by several entities
+        (which would merge them once renamed) are left out of the maps, as in emmo_to_label: these entities keep
+        their IRI. They are reported with a warning, and returned.
 
-        return {"s_map": s_map, "o_map": o_map, "p_map": p_map}
-                a dictionary of mapping old_iri to new_iri for each s, p, and o.
+        return {"s_map": s_map, "o_map": o_map, "p_map": p_map, "conflicts": conflicts, "invalid": invalid}
+                a dictionary of mapping old_iri to new_iri for each s, p, and o,
+                conflicts: dict new_iri --> list of the old_iri's sharing it,
+                invalid: dict old_iri --> label for labels that are not valid IRI fragments.
         """
 
         onto_namespace = Namespace(onto_namespace)
@@ -344,159 +994,151 @@ class OntologyManager:
         s_map = {}
         o_map = {}
         p_map = {}
+        invalid = {}
+        labelled = set()
+        iris_by_new_iri = {}
+
+        for s, x in g.subject_objects(new_annotation):
+            if s in labelled:
+                continue
+            labelled.add(s)
+            label = str(x)
+            if not _IRI_FRAGMENT.fullmatch(label):
+                invalid[s] = label
+                continue
+            iris_by_new_iri.setdefault(onto_namespace[label], []).append(s)
+
+        conflicts = {}
+        for new_iri, old_iris in iris_by_new_iri.items():
+            if len(old_iris) > 1:
+                conflicts[new_iri] = old_iris
+            else:
+                s_map[old_iris[0]] = new_iri
+
+        if conflicts:
+            warnings.warn(f"{len(conflicts)} labels are shared by several entities, e.g. "
+                          f"{next(iter(conflicts))}: {next(iter(conflicts.values()))}", RuntimeWarning)
+        if invalid:
+            warnings.warn(f"{len(invalid)} labels are not valid IRI fragments, e.g. "
+                          f"{next(iter(invalid.values()))!r}", RuntimeWarning)
+
+        print(f"mapped {len(s_map)} IRIs to their {new_annotation} label")
+        return {"s_map": s_map, "o_map": o_map, "p_map": p_map, "conflicts": conflicts, "invalid": invalid}
+
+
+    def _label_iri_map(self, onto_namespace="http://emmo.info/emmo#", new_annotation: URIRef = SKOS.prefLabel):
+        """
+        Compute the old_iri --> new_iri map (see emmo_to_label_graph) over all the loaded ontologies,
+        merging the s, p and o maps into one dict, ready for rewrite_iris.
+        The ontologies are read through union_graph, they are not merged into a copy.
+        """
+        sop_map = self.emmo_to_label_graph(onto_namespace, new_annotation, self.union_graph())
+        print("done mapping")
 
-        # repetition, I know, but it works fine, verbatim is nice sometimes.
-        # TODO:make issue and use a function/method instead
-        for s, p, o in g:
-            x = g.value(s, new_annotation)
-            if x is not None:
-                # print(f"value found of {type(x)} with value {x}")
-                if s not in s_map:
-                    print(f"adding map between {s} and {x}")
-                    s_map[s] = onto_namespace[str(x)]
-
-            x = g.value(o, new_annotation)
-            if x is not None:
-                # print(f"value found of {type(x)} with value {x}")
-                if o not in o_map and o not in s_map:
-                    print(f"adding map between {o} and {x}")
-                    o_map[o] = onto_namespace[str(x)]
-
-            x = g.value(p, new_annotation)
-            if x is not None:
-                # print(f"value found of {type(x)} with value {x}")
-                if p not in p_map and p not in s_map and p not in o_map:
-                    print(f"adding map between {p} and {x}")
-                    p_map[p] = onto_namespace[str(x)]
-
-        """     
-        g2=Graph()
-        g2+=g
-        from itertools import chain 
-        for old_iri, new_iri in chain(s_map.items(), p_map.items(), o_map.items()):
-            for s, p, o in g:
-                if s == old_iri:
-                    g.remove((s, p, o))
-                    g.add((new_iri, p, o))
-                elif p == old_iri:
-                    g.remove((s, p, o))
-                    g.add((s, new_iri, o))
-                elif o == old_iri:
-                    g.remove((s, p, o))
-                    g.add((s, p, new_iri))
-            
+        mapping = {}
+        for k in ("s_map", "o_map", "p_map"):
+            mapping.update(sop_map[k])
+        return mapping
+
+
+    def rewrite_iris(self, mapping: dict, graphs: dict = None):
         """
-        return {"s_map": s_map, "o_map": o_map, "p_map": p_map}
+        Replace IRIs in all the graphs in one pass: every triple is visited once and each of its s, p and o
+        is looked up in `mapping`, the changed triples are then removed and added back in batches.
 
+        params:
+        mapping: dict old_iri --> new_iri (rdflib terms, e.g. URIRef), terms not in the map are kept.
+        graphs: dict name --> graph to rewrite, default self.ontology_graphs
 
-    def replace_iri(self):
+        return: the number of triples that were rewritten.
+
+        Example:
+            n = manager.rewrite_iris({URIRef("http://emmo.info/emmo#EMMO_eb77..."): URIRef("http://emmo.info/emmo#Atom")})
         """
+        if graphs is None:
+            graphs = self.ontology_graphs
+
+        get = mapping.get
+        rewritten = 0
+        total_graphs = len(graphs)
+        for done_so_far, (ontology_name, g) in enumerate(graphs.items()):
+            old_triples = []
+            new_triples = []
+            for s, p, o in g:
+                new_s, new_p, new_o = get(s, s), get(p, p), get(o, o)
+                if new_s is not s or new_p is not p or new_o is not o:
+                    old_triples.append((s, p, o))
+                    new_triples.append((new_s, new_p, new_o, g))
+
+            # the changes are only applied once the scan is done, rdflib does not like changing a graph while
+            # iterating over it.
+            for triple in old_triples:
+                g.remove(triple)
+            g.addN(new_triples)
+            if self.ontology_graphs.get(ontology_name) is g:
+                added = [quad[:3] for quad in new_triples]
+                if ontology_name not in self._search_pending:  # otherwise indexed as it is now on first use
+                    self._search_index.update(ontology_name, added=added, removed=old_triples)
+                self.term_resolver.update(ontology_name, added=added, removed=old_triples)
+
+            rewritten += len(old_triples)
+            print(f"graph {ontology_name}: No. {done_so_far}/{total_graphs}, rewrote {len(old_triples)} triples")
+
+        return rewritten
+
+
+    def rewrite_file(self, input_path: str, output_path: str, mapping: dict = None, reverse: bool = False,
+                     map_path: str = None, fmt: str = None, report_every: float = 10.0):
         """
+        Replace IRIs in an RDF file that is not loaded, e.g. instance data too large for rdflib: the file is
+        streamed line by line to output_path (see stream_rewrite.py), the memory used does not depend on its size.
+        N-Triples, N-Quads, Turtle and TriG files, possibly compressed, are supported.
 
-        mega_g = Graph()
-        for ontology_name, g in self.ontology_graphs.items():
-            mega_g += g
+        params:
+        input_path, output_path: the files, output_path is compressed if it ends in .gz, .bz2 or .xz.
+        mapping: dict old_iri --> new_iri, default the UID --> label map saved by emmo_to_label (map_path).
+        reverse: with the saved map, label --> UID instead, to undo the renaming as unfix_emmo_label does.
+        map_path: the sidecar file of emmo_to_label, default uid_label_map.tsv in ontology_base_path.
+        fmt: the rdflib format of input_path, guessed if None.
+        report_every: print the progress and throughput every so many seconds, None for no report.
 
-        sop_map = self.emmo_to_label_graph("http://emmo.info/emmo#", SKOS.prefLabel, mega_g)
-        print("done mapping")
+        return: the statistics of the rewrite, see stream_rewrite.rewrite_file
 
-        total_graphs = len(self.ontology_graphs)
-        done_so_far = 0
-        for ontology_name, g in self.ontology_graphs.items():
-            print(f"graph No. {done_so_far}/{total_graphs}")
-            done_so_far = done_so_far + 1
-
-            for k, v in sop_map.items():
-                print(k, len(v))
-                # loop over s, o, and p maps
-                for old_iri, new_iri in v.items():
-                    # print(f"old {old_iri}, new {new_iri}")
-                    # for each map, loop over s/p/o and new IRI
-                    for s, p, o in g:
-                        if s == old_iri:
-                            g.remove((s, p, o))
-                            g.add((new_iri, p, o))
-                        elif p == old_iri:
-                            g.remove((s, p, o))
-                            g.add((s, new_iri, o))
-                        elif o == old_iri:
-                            g.remove((s, p, o))
-                            g.add((s, p, new_iri))
+        Example:
+            manager.emmo_to_label()
+            manager.rewrite_file("instances.nt.gz", "instances_labels.nt.gz")
+        """
+        if mapping is None:
+            if map_path is None:
+                map_path = os.path.join(self.ontology_base_path, UID_MAP_FILENAME)
+            if not os.path.isfile(map_path):
+                raise FileNotFoundError(f"no mapping given and no map saved by emmo_to_label at {map_path}")
+            uid_map = UIDLabelMap.load(map_path)
+            mapping = uid_map.reverse() if reverse else uid_map.forward()
+        return rewrite_file(input_path, output_path, mapping, fmt=fmt, report_every=report_every)
 
 
-    def replace_iri2(self):
-        """
+    def replace_iri(self):
         """
+        Replace the EMMO_<UID> IRIs of all the loaded ontologies by their skos:prefLabel,
+        see emmo_to_label_graph for the map and rewrite_iris for the replacement.
 
-        mega_g = Graph()
-        for ontology_name, g in self.ontology_graphs.items():
-            mega_g += g
+        return: the number of triples that were rewritten.
+        """
+        return self.rewrite_iris(self._label_iri_map())
 
-        sop_map = self.emmo_to_label_graph("http://emmo.info/emmo#", SKOS.prefLabel, mega_g)
-        print("done mapping")
 
-        total_graphs = len(self.ontology_graphs)
-        done_so_far = 0
-        for ontology_name, g in self.ontology_graphs.items():
-            print(f"graph {ontology_name}: No. {done_so_far}/{total_graphs}")
-            done_so_far = done_so_far + 1
-
-            for k, v in sop_map.items():
-                print(k, len(v))
-                # loop over s, o, and p maps
-                for old_iri, new_iri in v.items():
-                    # SPARQL query to check for the IRI
-                    query = """
-                                ASK WHERE {
-                                    { <%s> ?p ?o }
-                                    UNION
-                                    { ?s <%s> ?o }
-                                    UNION
-                                    { ?s ?p <%s> }
-                                }
-                                """ % (old_iri, old_iri, old_iri)
-                    if g.query(query).askAnswer:
-                        # print(f"old {old_iri}, new {new_iri}")
-                        # for each map, loop over s/p/o and new IRI
-                        for s, p, o in g:
-                            if s == old_iri:
-                                g.remove((s, p, o))
-                                g.add((new_iri, p, o))
-                            elif p == old_iri:
-                                g.remove((s, p, o))
-                                g.add((s, new_iri, o))
-                            elif o == old_iri:
-                                g.remove((s, p, o))
-                                g.add((s, p, new_iri))
+    def replace_iri2(self):
+        """
+        Same as replace_iri, the SPARQL ASK pre-check of each IRI is not needed any more with rewrite_iris,
+        kept so that existing scripts and notebooks still run.
+        """
+        return self.replace_iri()
 
 
     def replace_iri3(self):
         """
+        Same as replace_iri, this used to issue one SPARQL UPDATE per IRI, it now goes through rewrite_iris,
+        kept so that existing scripts and notebooks still run.
         """
-
-        mega_g = Graph()
-        for ontology_name, g in self.ontology_graphs.items():
-            mega_g += g
-
-        sop_map = self.emmo_to_label_graph("http://emmo.info/emmo#", SKOS.prefLabel, mega_g)
-        print("done mapping")
-
-        total_graphs = len(self.ontology_graphs)
-        done_so_far = 0
-        for ontology_name, g in self.ontology_graphs.items():
-            print(f"graph {ontology_name}: No. {done_so_far}/{total_graphs}")
-            done_so_far = done_so_far + 1
-
-            for k, v in sop_map.items():
-
-                print(k, len(v))
-                # loop over s, o, and p maps
-                for old_iri, new_iri in v.items():
-                    # SPARQL update query
-                    update_query = """
-                                DELETE {{ ?s ?p <{old_iri}> }} INSERT {{ ?s ?p <{new_iri}> }} WHERE {{ ?s ?p <{old_iri}> }};
-                                DELETE {{ <{old_iri}> ?p ?o }} INSERT {{ <{new_iri}> ?p ?o }} WHERE {{ <{old_iri}> ?p ?o }};
-                                DELETE {{ ?s <{old_iri}> ?o }} INSERT {{ ?s <{new_iri}> ?o }} WHERE {{ ?s <{old_iri}> ?o }};
-                                    """.format(old_iri=old_iri, new_iri=new_iri)
-                    # Execute the update query
-                    g.update(update_query)
+        return self.replace_iri()
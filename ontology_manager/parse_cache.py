@@ -0,0 +1,171 @@
+"""
+parse_cache.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+An on disk cache of parsed ontology files, so that unchanged files are not parsed again on every
+(notebook) restart.
+
+Entries are keyed by the hash of the file content, the rdflib version and the format, i.e. the cache is
+content-addressed: a modified file simply gets a new key, and the stale entry ages out.
+The parsed graph is stored as a pickle of its triples and namespace bindings, which loads much faster
+than parsing turtle again.
+
+The cache is bounded by max_bytes, the least recently used entries are evicted first.
+
+"""
+
+import hashlib
+import os
+import pickle
+
+import rdflib
+
+from .rdf_formats import guess_rdf_format
+
+# the size of the blocks used for hashing the files
+_BLOCK_SIZE = 1 << 20
+
+
+def file_digest(path):
+    """
+    sha256 hex digest of the content of the file at `path`, read in blocks so that large files
+    are not loaded in memory.
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_BLOCK_SIZE), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ParseCache:
+    """
+    Content addressed cache of parsed ontologies.
+
+    cache = ParseCache('~/.cache/ontology_manager', max_bytes=2**30)
+    key = cache.key(path)
+    payload = cache.get(key)   # None if not cached
+    cache.put(key, {"triples": list(g), "namespaces": list(g.namespaces())})
+
+    The payload is any picklable dict, the OntologyManager stores the triples, the namespace bindings and the
+    label entries (see term_resolver.py).
+    """
+
+    def __init__(self, cache_dir, max_bytes=1 << 30):
+        """
+        cache_dir: the folder where the cache entries are stored, created if needed.
+        max_bytes: the maximum total size of the entries, default 1 GiB.
+        """
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, path, fmt='turtle', digest=None):
+        """
+        The cache key of the file at `path`: its content hash, the rdflib version and the format.
+        digest: the file_digest of the file if the caller has it already, so that it is not read again.
+        """
+        h = hashlib.sha256()
+        h.update((digest or file_digest(path)).encode())
+        h.update(rdflib.__version__.encode())
+        h.update(fmt.encode())
+        return h.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pickle")
+
+    def get(self, key):
+        """
+        return the payload stored under `key`, or None if there is none (or if it can not be read).
+        A hit refreshes the entry for the LRU eviction.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            print(f"Ignoring corrupt parse cache entry {entry_path}: {e}")
+            self._remove(entry_path)
+            return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass  # evicted meanwhile by another process, the payload is still good.
+        return payload
+
+    def put(self, key, payload):
+        """
+        store `payload` under `key`, then evict the least recently used entries if the cache is too large.
+        The entry is written to a temporary file first, so that concurrent readers never see a partial entry.
+        """
+        entry_path = self._entry_path(key)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+        self.evict()
+
+    def invalidate(self, path=None, fmt=None):
+        """
+        Drop the entry of the file at `path` (as it is now on disk), or every entry if no path is given.
+        fmt: the format the entry was stored with (see key), default the one guessed from the file, as the
+        OntologyManager does.
+        return: the number of removed entries.
+        """
+        if path is not None:
+            if fmt is None:
+                fmt = guess_rdf_format(path) or ""
+            entry_path = self._entry_path(self.key(path, fmt))
+            return 1 if self._remove(entry_path) else 0
+
+        removed = 0
+        for entry in self._entries():
+            if self._remove(entry.path):
+                removed += 1
+        return removed
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is within max_bytes.
+        """
+        entries = []
+        total = 0
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, entry_path in entries:
+            if total <= self.max_bytes:
+                break
+            if self._remove(entry_path):
+                total -= size
+
+    def size(self):
+        """
+        total size in bytes of the cache entries.
+        """
+        total = 0
+        for entry in self._entries():
+            try:
+                total += entry.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    def _entries(self):
+        with os.scandir(self.cache_dir) as it:
+            return [entry for entry in it if entry.is_file() and entry.name.endswith('.pickle')]
+
+    @staticmethod
+    def _remove(entry_path):
+        try:
+            os.remove(entry_path)
+            return True
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,244 @@
+"""
+rdf_formats.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+Reading ontology files of any of the usual RDF formats, not only turtle:
+
+- the format is taken from the file extension, or sniffed from the first bytes of the content
+  when the extension is missing or ambiguous (.owl files are RDF/XML or turtle, depending on the tool);
+- .gz, .bz2 and .xz files are decompressed on the fly, so large dumps can stay compressed on disk;
+- the line based formats (N-Triples, N-Quads) are streamed: the lines are parsed one at a time and the
+  triples added to the graph in batches with addN, so the memory used besides the graph itself is bounded.
+
+Example:
+    g = Graph()
+    parse_rdf_file(g, "dump.nt.gz")   # format "nt", read through gzip
+
+"""
+
+import bz2
+import codecs
+import gzip
+import lzma
+import os
+import re
+from pathlib import Path
+from urllib.parse import urlparse
+
+from rdflib import Dataset, Graph
+from rdflib.parser import InputSource
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser, ParseError, r_wspace, r_tail
+
+# compressed file suffix --> function opening it as a (decompressed) binary stream
+COMPRESSIONS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+# file extension --> rdflib parser name, None if the extension is ambiguous and the content must be sniffed
+EXTENSION_FORMATS = {
+    ".ttl": "turtle",
+    ".turtle": "turtle",
+    ".n3": "n3",
+    ".nt": "nt",
+    ".ntriples": "nt",
+    ".nq": "nquads",
+    ".nquads": "nquads",
+    ".trig": "trig",
+    ".rdf": "xml",
+    ".rdfs": "xml",
+    ".xml": "xml",
+    ".jsonld": "json-ld",
+    ".json": "json-ld",
+    ".owl": None,
+}
+
+# the formats that are read line by line
+LINE_FORMATS = ("nt", "nquads")
+
+# the other formats with named graphs: parsed into a Dataset, whose triples are then added to the graph
+DATASET_FORMATS = ("trig",)
+
+# how many bytes of the content are looked at to sniff the format
+_SNIFF_BYTES = 4096
+
+# an N-Triples/N-Quads statement: subject, predicate, object, optional graph name, and the final dot.
+_TERM = r'(?:<[^>\s]*>|_:\S+)'
+_LITERAL = r'"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9-]+|\^\^<[^>\s]*>)?'
+_LINE_STATEMENT = re.compile(rf'^\s*{_TERM}\s+<[^>\s]*>\s+(?:{_TERM}|{_LITERAL})\s*({_TERM})?\s*\.\s*(?:#.*)?$')
+
+
+def split_compression(path):
+    """
+    return (path without the compression suffix, function opening the compressed file) e.g.
+    ("dump.nt", gzip.open) for "dump.nt.gz", or (path, None) if the file is not compressed.
+    """
+    root, extension = os.path.splitext(path)
+    opener = COMPRESSIONS.get(extension.lower())
+    if opener is None:
+        return path, None
+    return root, opener
+
+
+def open_rdf(path):
+    """
+    Open the file at `path` as a binary stream, decompressed on the fly if it is a .gz, .bz2 or .xz file.
+    """
+    _, opener = split_compression(path)
+    if opener is None:
+        return open(path, 'rb')
+    return opener(path, 'rb')
+
+
+def sniff_format(head: bytes):
+    """
+    Guess the rdflib format of a content starting with the bytes `head`, "turtle" if nothing else matches
+    (turtle being a superset of N-Triples, that is a safe default).
+    """
+    text = head.decode('utf-8', errors='ignore').lstrip('\ufeff \t\r\n')
+    if text.startswith(('{', '[')):
+        return "json-ld"
+    if re.match(r'<(?:[!?]|[A-Za-z_][\w.-]*(?::[A-Za-z_][\w.-]*)?[\s/>])', text):
+        return "xml"
+
+    statements = 0
+    quads = 0
+    lines = text.splitlines()
+    if len(head) >= _SNIFF_BYTES or not text.endswith(('\n', '\r')):
+        lines = lines[:-1]  # the last line may be cut
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if re.match(r'(@prefix|@base|PREFIX|BASE)\b', line, re.IGNORECASE):
+            return "turtle"
+        match = _LINE_STATEMENT.match(line)
+        if match is None:
+            return "turtle"
+        statements += 1
+        if match.group(1):
+            quads += 1
+    if statements and quads == statements:
+        return "nquads"
+    if statements:
+        return "nt"
+    return "turtle"
+
+
+def guess_rdf_format(path):
+    """
+    The rdflib format of the file at `path`, from its extension (ignoring a compression suffix),
+    or from its content if the extension is missing or ambiguous.
+    For a remote ontology (an URL) the extension only is used, None lets rdflib choose.
+    """
+    root, _ = split_compression(path)
+    extension = os.path.splitext(urlparse(root).path if _is_url(root) else root)[1].lower()
+    fmt = EXTENSION_FORMATS.get(extension)
+    if fmt is not None or _is_url(path):
+        return fmt
+    with open_rdf(path) as f:
+        return sniff_format(f.read(_SNIFF_BYTES))
+
+
+def parse_rdf_file(g: Graph, path, fmt=None, batch_size=10000):
+    """
+    Parse the RDF file at `path` into the graph `g`.
+
+    params:
+    g: the graph the triples are added to.
+    path: the file, possibly compressed (.gz, .bz2, .xz), or an URL.
+    fmt: the rdflib format, guessed with guess_rdf_format if None.
+    batch_size: for the line based formats, the number of triples added at once with addN.
+
+    The graph names of N-Quads and TriG are dropped, all the statements of the file end up in `g`
+    (a catalog entry is one graph).
+
+    return: g
+    """
+    if fmt is None:
+        fmt = guess_rdf_format(path)
+
+    if fmt in DATASET_FORMATS and not isinstance(g, Dataset):
+        return _add_dataset(g, parse_rdf_file(Dataset(), path, fmt, batch_size))
+
+    if _is_url(path):
+        return g.parse(path, format=fmt)
+
+    if fmt in LINE_FORMATS:
+        sink = _BatchSink(g, batch_size)
+        with open_rdf(path) as f:
+            _LineParser(sink, quads=(fmt == "nquads")).parse(codecs.getreader('utf-8')(f), bnode_context={})
+        sink.flush()
+        return g
+
+    root, opener = split_compression(path)
+    if opener is None:
+        return g.parse(path, format=fmt)
+    # relative IRIs are resolved against the (uncompressed) file location, as rdflib does for a plain file
+    with open_rdf(path) as f:
+        source = InputSource(Path(root).absolute().as_uri())
+        source.setByteStream(f)
+        return g.parse(source=source, format=fmt)
+
+
+def _is_url(path):
+    return urlparse(str(path)).scheme in ("http", "https")
+
+
+def _add_dataset(g: Graph, dataset: Dataset):
+    """
+    Add the triples of all the graphs of `dataset` to `g`, with its namespace bindings, return g.
+    """
+    for prefix, namespace in dataset.namespaces():
+        g.bind(prefix, namespace, override=False)
+    g.addN((s, p, o, g) for s, p, o, _ in dataset.quads((None, None, None, None)))
+    return g
+
+
+class _BatchSink:
+    """
+    Sink of the line parser: collects the triples and adds them to the graph `batch_size` at a time.
+    """
+
+    def __init__(self, g: Graph, batch_size: int):
+        self.g = g
+        self.batch_size = batch_size
+        self.batch = []
+
+    def triple(self, s, p, o):
+        self.batch.append((s, p, o, self.g))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.g.addN(self.batch)
+            self.batch = []
+
+
+class _LineParser(W3CNTriplesParser):
+    """
+    The rdflib N-Triples parser (which reads its input line by line), extended to also accept N-Quads lines,
+    whose graph name is dropped.
+    """
+
+    def __init__(self, sink, quads=False):
+        super().__init__(sink)
+        self.quads = quads
+
+    def parseline(self, bnode_context=None):
+        if not self.quads:
+            return super().parseline(bnode_context)
+
+        self.eat(r_wspace)
+        if (not self.line) or self.line.startswith("#"):
+            return  # The line is empty or a comment
+
+        subject = self.subject(bnode_context)
+        self.eat(r_wspace)
+        predicate = self.predicate()
+        self.eat(r_wspace)
+        obj = self.object(bnode_context)
+        self.eat(r_wspace)
+        self.uriref() or self.nodeid(bnode_context)  # the graph name, if any
+        self.eat(r_tail)
+
+        if self.line:
+            raise ParseError("Trailing garbage: {}".format(self.line))
+        self.sink.triple(subject, predicate, obj)
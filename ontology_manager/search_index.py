@@ -0,0 +1,242 @@
+"""
+search_index.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+A search index over the terms of the loaded ontologies, to find a term by (part of) its name or labels without
+scanning every triple:
+
+- the texts indexed for each IRI are its local name (for the IRIs with an rdf:type), and its rdfs:label,
+  skos:prefLabel, skos:altLabel and EMMO elucidation;
+- each text is lowercased and cut in trigrams (3 characters), the postings trigram --> texts give the candidate
+  texts of a query from a few set lookups: a substring query keeps the texts that have all its trigrams (then
+  checks them), a fuzzy one ranks the texts by the trigrams they share with it (Dice coefficient);
+- the texts are counted per graph, so a graph can be added, removed or edited (update with the added and removed
+  triples) without rebuilding the rest.
+
+    index = SearchIndex()
+    index.add_graph("emmo", g)
+    index.search("atom")    # [SearchHit(term, score, field, text, graphs), ...], best first
+"""
+
+import heapq
+import re
+from collections import namedtuple, Counter, defaultdict
+
+from rdflib import Graph, URIRef, Literal
+from rdflib.namespace import RDF, RDFS, SKOS, Namespace
+
+EMMO = Namespace("http://emmo.info/emmo#")
+
+# annotation property --> name of the field its text is indexed as
+SEARCH_PROPERTIES = {
+    RDFS.label: "label",
+    SKOS.prefLabel: "prefLabel",
+    SKOS.altLabel: "altLabel",
+    EMMO.EMMO_967080e5_2f42_4eb2_a3a9_c58143e835f9: "elucidation",
+}
+
+# how much a match in each field counts, a name or label match comes before a match in an elucidation
+FIELD_WEIGHTS = {"name": 1.0, "prefLabel": 1.0, "label": 1.0, "altLabel": 0.9, "elucidation": 0.5}
+
+SearchHit = namedtuple("SearchHit", "term score field text graphs")
+
+
+def local_name(iri):
+    """
+    The last segment of an IRI, after its last '#', '/' or ':'.
+    """
+    return re.split(r'[#/:]', str(iri).rstrip('#/'))[-1]
+
+
+def normalise(text):
+    """
+    The form texts and queries are compared in: lowercase, '_' as a space, white space collapsed.
+    """
+    return " ".join(str(text).lower().replace("_", " ").split())
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    Trigram index of the names and labels of the terms of several graphs, see the module doc.
+
+    params:
+    properties: the annotation properties indexed, dict property --> field name, default SEARCH_PROPERTIES.
+    """
+
+    def __init__(self, properties=None):
+        self.properties = dict(SEARCH_PROPERTIES if properties is None else properties)
+        self._graphs = {}  # graph name --> Counter of its (term, field, text) entries
+        self._ids = {}  # (term, field, text) --> text id
+        self._texts = {}  # text id --> (term, field, text, normalised text, number of trigrams)
+        self._counts = Counter()  # text id --> number of entries for it, over all the graphs
+        self._postings = defaultdict(set)  # trigram --> text ids
+        self._next_id = 0
+
+    def __len__(self):
+        """
+        The number of distinct (term, field, text) indexed.
+        """
+        return len(self._texts)
+
+    def graphs(self):
+        return list(self._graphs)
+
+    def add_graph(self, name, g: Graph):
+        """
+        Index the terms of the graph g under `name`, replacing what was indexed under that name before.
+        """
+        self.remove_graph(name)
+        entries = Counter()
+        for predicate in [RDF.type] + list(self.properties):
+            for triple in g.triples((None, predicate, None)):
+                entry = self._entry(*triple)
+                if entry is not None:
+                    entries[entry] += 1
+        self._graphs[name] = Counter()
+        self._add(name, entries)
+
+    def remove_graph(self, name):
+        """
+        Forget the terms indexed under `name`, the texts also found in other graphs are kept for those.
+        """
+        entries = self._graphs.pop(name, None)
+        if entries:
+            for entry, n in entries.items():
+                self._release(entry, n)
+
+    def update(self, name, added=(), removed=()):
+        """
+        Apply the triples added to and removed from the graph `name`, the ones that do not hold a name or label
+        being ignored.
+        """
+        entries = self._graphs.setdefault(name, Counter())
+        for triple in removed:
+            entry = self._entry(*triple)
+            if entry is not None and entries[entry] > 0:
+                entries[entry] -= 1
+                if entries[entry] == 0:
+                    del entries[entry]
+                self._release(entry, 1)
+        added_entries = Counter()
+        for triple in added:
+            entry = self._entry(*triple)
+            if entry is not None:
+                added_entries[entry] += 1
+        self._add(name, added_entries)
+
+    def _entry(self, s, p, o):
+        if not isinstance(s, URIRef):
+            return None
+        if p == RDF.type:
+            return s, "name", local_name(s)
+        field = self.properties.get(p)
+        if field is not None and isinstance(o, Literal):
+            return s, field, str(o)
+        return None
+
+    def _add(self, name, entries):
+        graph_entries = self._graphs[name]
+        for entry, n in entries.items():
+            graph_entries[entry] += n
+            text_id = self._ids.get(entry)
+            if text_id is None:
+                text_id = self._ids[entry] = self._next_id
+                self._next_id += 1
+                normalised = normalise(entry[2])
+                text_trigrams = trigrams(f" {normalised} ")
+                self._texts[text_id] = entry + (normalised, len(text_trigrams))
+                for trigram in text_trigrams:
+                    self._postings[trigram].add(text_id)
+            self._counts[text_id] += n
+
+    def _release(self, entry, n):
+        text_id = self._ids.get(entry)
+        if text_id is None:
+            return
+        self._counts[text_id] -= n
+        if self._counts[text_id] > 0:
+            return
+        del self._counts[text_id]
+        del self._ids[entry]
+        normalised = self._texts.pop(text_id)[3]
+        for trigram in trigrams(f" {normalised} "):
+            postings = self._postings[trigram]
+            postings.discard(text_id)
+            if not postings:
+                del self._postings[trigram]
+
+    def search(self, query, limit=20, fuzzy=True, min_similarity=0.4, graphs=None):
+        """
+        The terms whose name or labels contain `query` (case insensitive), ranked: a whole text matched first,
+        then a prefix, then a substring anywhere, weighted by the field (FIELD_WEIGHTS). With fuzzy, the texts
+        that do not contain the query but share enough trigrams with it (Dice coefficient >= min_similarity)
+        come after those, e.g. "elektron" finds "electron".
+
+        params:
+        query: the text looked for.
+        limit: the number of hits returned, None for all of them.
+        fuzzy: also look for the texts close to query.
+        min_similarity: the Dice coefficient of the trigrams from which a text is a fuzzy match.
+        graphs: only the terms indexed from these graph names (default: all of them).
+
+        return: list of SearchHit(term, score, field, text, graphs), one per term (its best match), best first;
+                graphs is the sorted list of the names of the graphs the matched text was found in.
+        """
+        query = normalise(query)
+        if not query:
+            return []
+        allowed = None
+        if graphs is not None:
+            allowed = {self._ids[entry] for name in graphs for entry in self._graphs.get(name, ())}
+
+        scores = {}  # text id --> score
+        query_trigrams = trigrams(query)
+        if query_trigrams:
+            candidates = set.intersection(*(self._postings.get(trigram, set()) for trigram in query_trigrams))
+        else:
+            candidates = self._texts.keys()  # 1 or 2 characters, no trigram to look up
+        for text_id in candidates:
+            normalised = self._texts[text_id][3]
+            if normalised == query:
+                scores[text_id] = 1.0
+            elif normalised.startswith(query):
+                scores[text_id] = 0.9
+            elif query in normalised:
+                scores[text_id] = 0.8
+
+        if fuzzy:
+            padded = trigrams(f" {query} ")
+            shared = Counter()
+            for trigram in padded:
+                shared.update(self._postings.get(trigram, ()))
+            texts = self._texts
+            for text_id, n in shared.items():
+                similarity = 2 * n / (len(padded) + texts[text_id][4])
+                if similarity >= min_similarity and text_id not in scores:
+                    scores[text_id] = 0.7 * similarity
+
+        best = {}  # term --> (score, -length of the text, text id), the shorter text first for the same score
+        for text_id, score in scores.items():
+            if allowed is not None and text_id not in allowed:
+                continue
+            term, field, text = self._texts[text_id][:3]
+            candidate = (score * FIELD_WEIGHTS.get(field, 1.0), -len(text), text_id)
+            if term not in best or candidate[:2] > best[term][:2]:
+                best[term] = candidate
+
+        def rank(item):
+            return -item[1][0], -item[1][1], str(item[0])
+
+        if limit is None:
+            ranked = sorted(best.items(), key=rank)
+        else:
+            ranked = heapq.nsmallest(limit, best.items(), key=rank)
+        hits = []
+        for term, (score, _, text_id) in ranked:
+            entry = self._texts[text_id][:3]
+            found_in = sorted(name for name, entries in self._graphs.items() if entry in entries)
+            hits.append(SearchHit(term, round(score, 4), entry[1], entry[2], found_in))
+        return hits
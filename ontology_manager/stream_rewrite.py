@@ -0,0 +1,215 @@
+"""
+stream_rewrite.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+Rewriting the IRIs of an RDF file into another file without loading it in a graph, for the instance data files
+that are too large for rdflib (replace_iri and rewrite_iris work on loaded graphs):
+
+- the file is read one line at a time and each line is cut in tokens with one regular expression: IRIs are looked
+  up in the mapping, literals and comments are copied as they are; nothing is parsed into rdflib terms;
+- N-Triples and N-Quads need nothing more; for Turtle (and TriG) the @prefix/PREFIX and @base/BASE directives are
+  followed, the prefixed names are expanded to look them up (a rewritten one is written back prefixed if a prefix
+  fits, as a full <IRI> otherwise), and the long (triple quoted) strings spanning several lines are carried over;
+- the output is written in chunks of about chunk_bytes to a temporary file, moved in place at the end;
+- the memory used is the mapping plus one chunk, whatever the size of the file.
+
+Compressed files (.gz, .bz2, .xz) are read and written through, see rdf_formats.py.
+
+    stats = rewrite_file("data.nt.gz", "data_renamed.nt.gz", {old_iri: new_iri})
+"""
+
+import io
+import os
+import re
+import time
+from urllib.parse import urljoin
+
+from .rdf_formats import split_compression, guess_rdf_format
+
+# the formats that can be rewritten line by line
+STREAM_FORMATS = ("nt", "nquads", "turtle", "trig")
+
+_STRING = r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\''
+_IRI = r'<([^<>"{}|^`\\\s]*)>'
+
+# N-Triples: a literal (with its language or datatype) is copied, an IRI (group 1) is looked up
+_NT_TOKENS = re.compile(rf'"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9-]+|\^\^<[^>]*>)?|{_IRI}')
+
+# Turtle: a long string opening (group 1), a string with its language or datatype, an IRI (group 2), a comment,
+# or a prefixed name (prefix: group 3, local name: group 4) not preceded by a name character
+_PN_LOCAL = r'(?:[\w:%-]|\\[^\s])(?:(?:[\w.:%-]|\\[^\s])*(?:[\w:%-]|\\[^\s]))?'
+_TTL_TOKENS = re.compile(
+    rf'("""|\'\'\')'
+    rf'|(?:{_STRING})(?:@[A-Za-z0-9-]+|\^\^(?:<[^>]*>|[A-Za-z_][\w.-]*:{_PN_LOCAL}?))?'
+    rf'|{_IRI}'
+    rf'|#.*'
+    rf'|(?<![\w.:\\-])([A-Za-z][\w.-]*)?:({_PN_LOCAL})?')
+_PREFIX = re.compile(r'\s*(?:@prefix|PREFIX)\s+([A-Za-z][\w.-]*)?:\s*<([^>]*)>', re.IGNORECASE)
+_BASE = re.compile(r'\s*(?:@base|BASE)\s+<([^>]*)>', re.IGNORECASE)
+_SIMPLE_LOCAL = re.compile(r'[A-Za-z0-9_][\w-]*')
+
+
+class _LineRewriter:
+    """
+    Rewrites the IRIs of the lines of a file, one after the other (the Turtle directives and long strings met
+    in a line apply to the next ones).
+    """
+
+    def __init__(self, mapping, turtle):
+        self.mapping = mapping
+        self.turtle = turtle
+        self.prefixes = {}  # prefix --> namespace
+        self.base = None
+        self.long_string = None  # the delimiter of the long string the current line starts in, if any
+        self.rewritten = 0
+
+    def line(self, line):
+        if not self.turtle:
+            return _NT_TOKENS.sub(self._nt_token, line)
+        if self.long_string is None:
+            directive = _PREFIX.match(line)
+            if directive:
+                self.prefixes[directive.group(1) or ""] = self._absolute(directive.group(2))
+                return line
+            directive = _BASE.match(line)
+            if directive:
+                self.base = self._absolute(directive.group(1))
+                return line
+
+        parts = []
+        position = 0
+        while position < len(line):
+            if self.long_string is not None:
+                end = line.find(self.long_string, position)
+                if end < 0:
+                    parts.append(line[position:])
+                    break
+                end += len(self.long_string)
+                parts.append(line[position:end])
+                position = end
+                self.long_string = None
+                continue
+            match = _TTL_TOKENS.search(line, position)
+            if match is None:
+                parts.append(line[position:])
+                break
+            parts.append(line[position:match.start()])
+            position = match.end()
+            if match.group(1):
+                self.long_string = match.group(1)
+                parts.append(match.group(1))
+            else:
+                parts.append(self._ttl_token(match))
+        return "".join(parts)
+
+    def _nt_token(self, match):
+        iri = match.group(1)
+        if iri is None:
+            return match.group(0)
+        new = self.mapping.get(iri)
+        if new is None:
+            return match.group(0)
+        self.rewritten += 1
+        return f"<{new}>"
+
+    def _ttl_token(self, match):
+        iri = match.group(2)
+        if iri is not None:
+            new = self.mapping.get(self._absolute(iri))
+            if new is None:
+                return match.group(0)
+            self.rewritten += 1
+            return self._write(new)
+        local = match.group(4)
+        prefix = match.group(3) or ""
+        if match.group(0).startswith(("'", '"', "#")) or prefix == "_" or prefix not in self.prefixes:
+            return match.group(0)  # a literal, a comment, a blank node or an unknown prefix
+        iri = self.prefixes[prefix] + re.sub(r'\\(.)', r'\1', local or "")
+        new = self.mapping.get(iri)
+        if new is None:
+            return match.group(0)
+        self.rewritten += 1
+        return self._write(new)
+
+    def _absolute(self, iri):
+        return urljoin(self.base, iri) if self.base and not re.match(r'[A-Za-z][\w+.-]*:', iri) else iri
+
+    def _write(self, iri):
+        """
+        The IRI prefixed if one of the prefixes fits (with a plain local name), as <iri> otherwise.
+        """
+        for prefix, namespace in self.prefixes.items():
+            if iri.startswith(namespace) and _SIMPLE_LOCAL.fullmatch(iri[len(namespace):]):
+                return f"{prefix}:{iri[len(namespace):]}"
+        return f"<{iri}>"
+
+
+def rewrite_file(input_path, output_path, mapping: dict, fmt=None, chunk_bytes=1 << 20, report_every=10.0):
+    """
+    Copy the RDF file `input_path` to `output_path`, replacing the IRIs found in `mapping`, streaming, see the
+    module doc.
+
+    params:
+    input_path: an N-Triples, N-Quads, Turtle or TriG file, possibly compressed.
+    output_path: the file written, compressed if its name ends in .gz, .bz2 or .xz. It is written to a temporary
+    file first, so it is only replaced once the rewrite succeeded.
+    mapping: dict old_iri --> new_iri (strings or URIRef).
+    fmt: the rdflib format of the input, guessed with guess_rdf_format if None.
+    chunk_bytes: the size of the chunks written to the output.
+    report_every: print the progress every so many seconds (None: never).
+
+    return: {"lines", "rewritten" (IRIs replaced), "bytes_read", "bytes_written" (the sizes of the files on disk),
+    "seconds", "mb_per_second" (read)}
+    """
+    if fmt is None:
+        fmt = guess_rdf_format(input_path)
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"can not rewrite {input_path} line by line, its format is {fmt}, not one of {STREAM_FORMATS}")
+
+    mapping = {str(old): str(new) for old, new in mapping.items()}
+    rewriter = _LineRewriter(mapping, turtle=fmt in ("turtle", "trig"))
+    total_bytes = os.path.getsize(input_path)
+    start = last_report = time.perf_counter()
+    lines = 0
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    _, output_opener = split_compression(output_path)
+    try:
+        with open(input_path, 'rb') as raw, open(tmp_path, 'wb') as raw_out:
+            _, input_opener = split_compression(input_path)
+            binary_in = input_opener(raw, 'rb') if input_opener is not None else raw
+            binary_out = output_opener(raw_out, 'wb') if output_opener is not None else raw_out
+            with io.TextIOWrapper(binary_in, encoding='utf-8', newline='') as f_in, \
+                    io.TextIOWrapper(binary_out, encoding='utf-8', newline='') as f_out:
+                chunk = []
+                chunk_size = 0
+                for line in f_in:
+                    new_line = rewriter.line(line)
+                    chunk.append(new_line)
+                    chunk_size += len(new_line)
+                    lines += 1
+                    if chunk_size >= chunk_bytes:
+                        f_out.write("".join(chunk))
+                        chunk = []
+                        chunk_size = 0
+                        now = time.perf_counter()
+                        if report_every is not None and now - last_report >= report_every:
+                            last_report = now
+                            _report(raw.tell(), total_bytes, lines, rewriter.rewritten, now - start)
+                f_out.write("".join(chunk))
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    seconds = time.perf_counter() - start
+    if report_every is not None:
+        _report(total_bytes, total_bytes, lines, rewriter.rewritten, seconds)
+    return {"lines": lines, "rewritten": rewriter.rewritten, "bytes_read": total_bytes, "bytes_written": os.path.getsize(output_path),
+            "seconds": seconds, "mb_per_second": total_bytes / 1e6 / seconds if seconds else None}
+
+
+def _report(done, total, lines, rewritten, seconds):
+    percent = 100 * done / total if total else 100
+    speed = done / 1e6 / seconds if seconds else 0
+    print(f"{percent:5.1f}% {done / 1e6:.1f}/{total / 1e6:.1f} MB, {lines} lines, {rewritten} IRIs rewritten, "
+          f"{speed:.1f} MB/s")
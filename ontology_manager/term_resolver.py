@@ -0,0 +1,292 @@
+"""
+term_resolver.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+Referring to the terms of an ontology by their labels instead of their opaque IRIs (EMMO_<uuid>):
+
+- TermResolver keeps, for the loaded graphs, the dicts (namespace, label) --> IRIs and IRI --> labels, built from
+  the skos:prefLabel, rdfs:label and skos:altLabel of the terms, in all their languages; resolving a label is a
+  dict lookup, not a g.value() or a SPARQL query;
+- a label may be given to several terms of a namespace: a skos:prefLabel wins over an rdfs:label, which wins over
+  a skos:altLabel, then the requested language (default "en") over an untagged label over the other languages;
+  if several IRIs are still tied the label is ambiguous, resolving it raises AmbiguousLabelError and
+  ambiguous() lists them all;
+- Terms gives attribute access through the namespace prefixes bound in the graphs:
+
+    manager.terms.emmo.Atom             # URIRef('http://emmo.info/emmo#EMMO_eb77076b_a104_42ac_a065_798b2d2809ad')
+    manager.terms.emmo["Chemical Element"]
+    manager.terms.label_of(iri)         # 'Atom'
+
+  every attribute of manager.terms.emmo is a label, so that terms labelled "label" or "namespace" are reachable.
+
+The label entries of a file are computed once when it is parsed (label_entries) and stored in the parse cache
+with its triples, so a cached ontology is indexed without reading its graph again.
+"""
+
+from collections import Counter, defaultdict
+
+from rdflib import Graph, URIRef, Literal
+from rdflib.namespace import RDFS, SKOS
+
+# label property --> field name, in order of precedence
+LABEL_PROPERTIES = {
+    SKOS.prefLabel: "prefLabel",
+    RDFS.label: "label",
+    SKOS.altLabel: "altLabel",
+}
+_FIELD_RANKS = {field: rank for rank, field in enumerate(LABEL_PROPERTIES.values())}
+
+
+class AmbiguousLabelError(LookupError):
+    """
+    A label given to several terms of a namespace with the same precedence, see TermResolver.resolve.
+    """
+
+    def __init__(self, namespace, label, iris):
+        self.namespace = namespace
+        self.label = label
+        self.iris = iris
+        super().__init__(f"'{label}' is the label of {len(iris)} terms of {namespace}: "
+                         + ", ".join(str(iri) for iri in iris))
+
+
+def namespace_of(iri):
+    """
+    The namespace of an IRI: up to and including its last '#', or its last '/' if it has no '#'.
+    """
+    iri = str(iri)
+    separator = iri.rfind('#')
+    if separator < 0:
+        separator = iri.rfind('/')
+    return iri[:separator + 1]
+
+
+def label_entries(triples):
+    """
+    The (iri, field, label, language) label entries of the triples (or graph), for TermResolver.add_graph.
+    A graph is read with one triples() pattern per label property.
+    """
+    if isinstance(triples, Graph):
+        g = triples
+        triples = (triple for predicate in LABEL_PROPERTIES for triple in g.triples((None, predicate, None)))
+    entries = []
+    for s, p, o in triples:
+        field = LABEL_PROPERTIES.get(p)
+        if field is not None and isinstance(s, URIRef) and isinstance(o, Literal):
+            entries.append((s, field, str(o), o.language))
+    return entries
+
+
+class TermResolver:
+    """
+    The labels of the terms of several graphs, both ways, see the module doc.
+
+    params:
+    language: the language preferred when a label is tied between languages.
+    """
+
+    def __init__(self, language="en"):
+        self.language = language
+        self._graphs = {}  # graph name --> Counter of its label entries
+        self._prefixes = {}  # graph name --> {prefix: namespace} bound in the graph
+        self._counts = Counter()  # label entry --> number of graphs/triples it is in
+        self._by_label = defaultdict(set)  # (namespace, label) --> label entries
+        self._by_iri = defaultdict(set)  # iri --> label entries
+
+    def __len__(self):
+        """
+        The number of (namespace, label) known.
+        """
+        return len(self._by_label)
+
+    def add_graph(self, name, g: Graph = None, entries=None, namespaces=None):
+        """
+        Index the labels of the graph `name`, replacing what was indexed under that name before.
+
+        params:
+        g: the graph, read for the label entries and namespace bindings that are not given.
+        entries: its label entries if known already (e.g. from the parse cache), see label_entries.
+        namespaces: its (prefix, namespace) bindings.
+        """
+        self.remove_graph(name)
+        if entries is None:
+            entries = label_entries(g)
+        if namespaces is None:
+            namespaces = g.namespaces() if g is not None else ()
+        self._graphs[name] = Counter()
+        self._prefixes[name] = {prefix: str(namespace) for prefix, namespace in namespaces}
+        self._add(name, entries)
+
+    def remove_graph(self, name):
+        entries = self._graphs.pop(name, None)
+        self._prefixes.pop(name, None)
+        for entry, n in (entries or {}).items():
+            self._release(entry, n)
+
+    def update(self, name, added=(), removed=()):
+        """
+        Apply the triples added to and removed from the graph `name`, the ones that are not labels being ignored.
+        """
+        entries = self._graphs.setdefault(name, Counter())
+        for entry in label_entries(removed):
+            if entries[entry] > 0:
+                entries[entry] -= 1
+                if entries[entry] == 0:
+                    del entries[entry]
+                self._release(entry, 1)
+        self._add(name, label_entries(added))
+
+    def _add(self, name, entries):
+        graph_entries = self._graphs[name]
+        for entry in entries:
+            graph_entries[entry] += 1
+            if self._counts[entry] == 0:
+                iri, _, label, _ = entry
+                self._by_label[namespace_of(iri), label].add(entry)
+                self._by_iri[iri].add(entry)
+            self._counts[entry] += 1
+
+    def _release(self, entry, n):
+        self._counts[entry] -= n
+        if self._counts[entry] > 0:
+            return
+        del self._counts[entry]
+        iri, _, label, _ = entry
+        for index, key in ((self._by_label, (namespace_of(iri), label)), (self._by_iri, iri)):
+            index[key].discard(entry)
+            if not index[key]:
+                del index[key]
+
+    def _rank(self, entry, language):
+        language = language or self.language
+        entry_language = entry[3]
+        language_rank = 0 if entry_language == language else 1 if entry_language is None else 2
+        return _FIELD_RANKS[entry[1]], language_rank
+
+    def candidates(self, label, namespace, language=None):
+        """
+        The IRIs labelled `label` in `namespace` with the best precedence (see the module doc), sorted:
+        none if the label is unknown, more than one if it is ambiguous.
+        """
+        entries = self._by_label.get((str(namespace), label))
+        if not entries:
+            return []
+        best = min(self._rank(entry, language) for entry in entries)
+        return sorted({entry[0] for entry in entries if self._rank(entry, language) == best})
+
+    def resolve(self, label, namespace, language=None):
+        """
+        The IRI of the term labelled `label` in `namespace`.
+
+        raise: KeyError if no term of the namespace has this label, AmbiguousLabelError if several have it
+        with the same precedence.
+        """
+        iris = self.candidates(label, namespace, language)
+        if not iris:
+            raise KeyError(f"no term labelled '{label}' in {namespace}")
+        if len(iris) > 1:
+            raise AmbiguousLabelError(str(namespace), label, iris)
+        return iris[0]
+
+    def label(self, iri, language=None):
+        """
+        The best label of `iri` (its prefLabel in the preferred language if it has one), None if it has none.
+        """
+        entries = self._by_iri.get(URIRef(iri))
+        if not entries:
+            return None
+        return min(entries, key=lambda entry: (self._rank(entry, language), entry[2]))[2]
+
+    def labels(self, iri):
+        """
+        All the labels of `iri`: sorted list of (field, label, language).
+        """
+        return sorted((entry[1:] for entry in self._by_iri.get(URIRef(iri), ())),
+                      key=lambda x: (_FIELD_RANKS[x[0]], x[1], x[2] or ""))
+
+    def namespace_labels(self, namespace):
+        return sorted({label for ns, label in self._by_label if ns == str(namespace)})
+
+    def ambiguous(self, namespace=None, language=None):
+        """
+        The ambiguous labels: dict (namespace, label) --> the sorted IRIs it resolves to.
+        """
+        report = {}
+        for (ns, label) in self._by_label:
+            if namespace is None or ns == str(namespace):
+                iris = self.candidates(label, ns, language)
+                if len(iris) > 1:
+                    report[ns, label] = iris
+        return report
+
+    def prefixes(self):
+        """
+        The prefix --> namespace bindings of the indexed graphs, the first graph binding a prefix wins.
+        """
+        prefixes = {}
+        for bindings in self._prefixes.values():
+            for prefix, namespace in bindings.items():
+                prefixes.setdefault(prefix, namespace)
+        return prefixes
+
+
+class Terms:
+    """
+    Attribute access to the namespaces of a TermResolver by their prefix: terms.emmo, or terms["emmo"],
+    or terms["http://emmo.info/emmo#"]; and the other way round with label_of(iri).
+    """
+
+    def __init__(self, resolver: TermResolver):
+        self._resolver = resolver
+
+    def __getattr__(self, prefix):
+        if prefix.startswith("__"):
+            raise AttributeError(prefix)
+        namespace = self._resolver.prefixes().get(prefix)
+        if namespace is None:
+            raise AttributeError(f"no namespace bound to the prefix '{prefix}'")
+        return NamespaceTerms(self._resolver, namespace)
+
+    def __getitem__(self, prefix_or_namespace):
+        namespace = self._resolver.prefixes().get(prefix_or_namespace, prefix_or_namespace)
+        return NamespaceTerms(self._resolver, namespace)
+
+    def __dir__(self):
+        return sorted(self._resolver.prefixes())
+
+    def label_of(self, iri, language=None):
+        """
+        The best label of `iri`, None if it has none, see TermResolver.label.
+        """
+        return self._resolver.label(iri, language)
+
+
+class NamespaceTerms:
+    """
+    The terms of one namespace by label: terms.emmo.Atom, or terms.emmo["Chemical Element"] for the labels
+    that are not identifiers. An unknown label raises AttributeError (KeyError with []), an ambiguous one
+    AmbiguousLabelError. It has no public attribute or method, these would hide the terms with the same label.
+    """
+
+    def __init__(self, resolver: TermResolver, namespace):
+        self._resolver = resolver
+        self._namespace = str(namespace)
+
+    def __getattr__(self, label):
+        if label.startswith("__"):
+            raise AttributeError(label)
+        try:
+            return self._resolver.resolve(label, self._namespace)
+        except KeyError as e:
+            raise AttributeError(e.args[0]) from None
+
+    def __getitem__(self, label):
+        return self._resolver.resolve(label, self._namespace)
+
+    def __contains__(self, label):
+        return bool(self._resolver.candidates(label, self._namespace))
+
+    def __dir__(self):
+        return [label for label in self._resolver.namespace_labels(self._namespace) if label.isidentifier()]
+
+    def __repr__(self):
+        return f"NamespaceTerms({self._namespace!r})"
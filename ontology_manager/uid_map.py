@@ -0,0 +1,146 @@
+"""
+uid_map.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+The map between the UID IRIs of an ontology (EMMO_<uuid>) and the label IRIs they were renamed to by
+OntologyManager.emmo_to_label, kept in a sidecar file so that the renaming can be undone (unfix_emmo_label)
+and applied to more graphs later without scanning the renamed ones again.
+
+The file is a two column, tab separated table, sorted on the UID IRI, one line per renamed term:
+
+    # ontology_manager uid map 1
+    http://emmo.info/emmo#EMMO_eb77076b_a104_42ac_a065_798b2d2809ad<TAB>http://emmo.info/emmo#Atom
+
+It is read into two dicts (UID --> label IRI and back), a lookup is then a hash lookup either way.
+The renamed terms also carry their UID in the ontology itself, as an annotation
+<label IRI> ontoman:hasUIDLabel "EMMO_eb77076b_a104_42ac_a065_798b2d2809ad", the map can be rebuilt from these
+if the file is lost (see from_annotations).
+"""
+
+import os
+
+from rdflib import Graph, URIRef, Literal, Namespace
+
+ONTOMAN = Namespace("urn:ontology_manager:")
+HAS_UID_LABEL = ONTOMAN.hasUIDLabel
+
+UID_MAP_FILENAME = "uid_label_map.tsv"
+_HEADER = "# ontology_manager uid map 1\n"
+
+
+def split_iri(iri):
+    """
+    (namespace, local name) of an IRI, split after its last '#', or its last '/' if it has no '#'.
+    """
+    iri = str(iri)
+    separator = iri.rfind('#')
+    if separator < 0:
+        separator = iri.rfind('/')
+    return iri[:separator + 1], iri[separator + 1:]
+
+
+class UIDLabelMap:
+    """
+    UID IRI <--> label IRI, both ways, see the module doc.
+
+    params:
+    pairs: (uid IRI, label IRI) to start with.
+    """
+
+    def __init__(self, pairs=()):
+        self._labels = {}  # uid IRI --> label IRI
+        self._uids = {}  # label IRI --> uid IRI
+        for uid, label in pairs:
+            self.add(uid, label)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __contains__(self, uid):
+        return URIRef(uid) in self._labels
+
+    def __iter__(self):
+        return iter(sorted(self._labels.items()))
+
+    def label_iri(self, uid):
+        return self._labels.get(URIRef(uid))
+
+    def uid_iri(self, label):
+        return self._uids.get(URIRef(label))
+
+    def add(self, uid, label):
+        """
+        Record that `uid` was renamed to `label`.
+
+        return: False (and nothing recorded) if either is mapped to another IRI already, True otherwise.
+        """
+        uid, label = URIRef(uid), URIRef(label)
+        if self._labels.get(uid, label) != label or self._uids.get(label, uid) != uid:
+            return False
+        self._labels[uid] = label
+        self._uids[label] = uid
+        return True
+
+    def remove(self, uid):
+        """
+        Forget the renaming of `uid`, e.g. once it was undone.
+
+        return: the label IRI it was renamed to, None if it is not in the map.
+        """
+        label = self._labels.pop(URIRef(uid), None)
+        if label is not None:
+            del self._uids[label]
+        return label
+
+    def forward(self):
+        """
+        dict uid IRI --> label IRI, for rewrite_iris.
+        """
+        return dict(self._labels)
+
+    def reverse(self):
+        """
+        dict label IRI --> uid IRI, for rewrite_iris.
+        """
+        return dict(self._uids)
+
+    @classmethod
+    def load(cls, path):
+        """
+        The map saved in the file at `path`, an empty map if there is no such file.
+        """
+        uid_map = cls()
+        if not os.path.isfile(path):
+            return uid_map
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if line.startswith("#") or not line.strip():
+                    continue
+                try:
+                    uid, label = line.rstrip("\n").split("\t")
+                except ValueError:
+                    raise ValueError(f"{path}:{line_number}: expected two tab separated IRIs") from None
+                uid_map.add(uid, label)
+        return uid_map
+
+    def save(self, path):
+        """
+        Write the map to `path`, sorted on the UID IRI. The file is written to a temporary file first and then
+        moved in place, so a reader never sees half of it.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(_HEADER)
+            f.writelines(f"{uid}\t{label}\n" for uid, label in self)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_annotations(cls, g: Graph):
+        """
+        The map of the terms of g renamed by emmo_to_label, read from their hasUIDLabel annotations: the UID IRI
+        is the UID local name in the namespace of the label IRI.
+        """
+        uid_map = cls()
+        for label, uid in g.subject_objects(HAS_UID_LABEL):
+            if isinstance(label, URIRef) and isinstance(uid, Literal):
+                uid_map.add(split_iri(label)[0] + str(uid), label)
+        return uid_map
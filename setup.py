@@ -13,5 +13,9 @@ setup(
     install_requires=[
         'rdflib',  # Add other dependencies as needed
     ],
+    extras_require={
+        'frozen': ['numpy'],  # OntologyManager.freeze
+        'sparse': ['numpy', 'scipy'],  # OntoVis.adjacency_matrix, OntoVis.zoom_in_many
+    },
 )
 
@@ -0,0 +1,57 @@
+"""
+conftest.py  Copyright (C) 2024 The Materials informatics and Data Driven Materials Discovery Group at UCL
+
+Shared fixtures of the tests: small EMMO-shaped ontologies written with benchmarks/emmo_generator.py.
+"""
+
+import os
+import sys
+
+import pytest
+from rdflib import BNode
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "benchmarks"))
+
+from emmo_generator import generate  # noqa: E402
+
+# the ElementTree scratch script, run by hand from this folder
+collect_ignore = ["test_et.py"]
+
+
+def write_catalog(folder, entries, file_name="catalog-v001.xml"):
+    """
+    Write a protege catalog with the (name, file) entries to folder, return its file name.
+    """
+    lines = ['<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+             '<catalog prefer="public" xmlns="urn:oasis:names:tc:entity:resolver:catalog">']
+    lines += [f'    <uri id="Imports Wizard Entry" name="{name}" uri="{uri}"/>' for name, uri in entries]
+    lines.append('</catalog>')
+    with open(os.path.join(folder, file_name), "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return file_name
+
+
+@pytest.fixture
+def emmo_like(tmp_path):
+    """
+    A 3 module EMMO-shaped ontology in tmp_path: the dict returned by generate, plus its "folder".
+    """
+    folder = str(tmp_path / "emmo_like")
+    info = generate(folder, modules=3, classes=40, properties=5)
+    info["folder"] = folder
+    return info
+
+
+def same_triples(a, b):
+    """
+    True if the graphs (or triple iterables) have as many triples and the same triples without blank nodes:
+    rdflib.compare.isomorphic is far too slow on the restriction BNodes of the EMMO-shaped ontologies.
+    """
+    a, b = list(a), list(b)
+
+    def named(triples):
+        return {t for t in triples if not any(isinstance(x, BNode) for x in t)}
+
+    return len(a) == len(b) and named(a) == named(b)
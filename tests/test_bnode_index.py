@@ -0,0 +1,108 @@
+import os
+
+from rdflib import BNode, Graph, Namespace, RDF, RDFS, OWL
+
+from ontodot.bnode_index import BNodeIndex, ClassExpression, Cycle, Restriction, concise_bounded_description
+from ontodot.ontodot import OntoVis
+
+EX = Namespace("http://example.org/")
+
+NESTED = """
+@prefix ex: <http://example.org/> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+ex:A rdfs:subClassOf [ a owl:Restriction ; owl:onProperty ex:hasPart ;
+        owl:someValuesFrom [ a owl:Class ;
+            owl:unionOf ( ex:B [ a owl:Restriction ; owl:onProperty ex:hasPart ; owl:allValuesFrom ex:C ] ex:D ) ] ] ,
+    [ a owl:Restriction ; owl:onProperty ex:hasPart ; owl:qualifiedCardinality "2"^^xsd:nonNegativeInteger ;
+        owl:onClass ex:E ] .
+ex:F owl:equivalentClass [ owl:complementOf ex:B ] .
+"""
+
+
+def old_dig_into_bnode(g, node, depth=0):
+    """dig_into_bnode as it was, recursive."""
+    for s, p, o in g.triples((node, None, None)):
+        print(f"\t*depth {s} \t {p} \t {o}")
+        if isinstance(o, BNode) and o != node:
+            old_dig_into_bnode(g, o, depth + 1)
+
+
+def printed(capsys, function, *args, **kwargs):
+    capsys.readouterr()
+    function(*args, **kwargs)
+    return sorted(capsys.readouterr().out.splitlines())
+
+
+def nested_graph():
+    return Graph().parse(data=NESTED, format="turtle")
+
+
+def superclass(g, cls, kind):
+    for o in g.objects(cls, RDFS.subClassOf):
+        if (o, kind, None) in g:
+            return o
+
+
+def test_cbd_matches_the_old_recursion(capsys):
+    g = nested_graph()
+    index = BNodeIndex(g)
+    for bnode in {x for t in g for x in t if isinstance(x, BNode)}:
+        old = printed(capsys, old_dig_into_bnode, g, bnode)
+        assert printed(capsys, OntoVis.dig_into_bnode, g, bnode, index=index) == old
+        assert printed(capsys, OntoVis.dig_into_bnode, g, bnode) == old
+        assert sorted(index.cbd(bnode)) == sorted(concise_bounded_description(g, bnode))
+        assert len(index.cbd(bnode)) == len(old)
+
+
+def test_explode_nested_restrictions_and_lists():
+    g = nested_graph()
+    index = BNodeIndex(g)
+    some = superclass(g, EX.A, OWL.someValuesFrom)
+    expected = Restriction(EX.hasPart, "some",
+                           ClassExpression("unionOf", (EX.B, Restriction(EX.hasPart, "only", EX.C, None), EX.D)),
+                           None)
+    assert OntoVis.explode_bnode(g, some, index=index) == expected
+    assert OntoVis.explode_bnode(g, some) == expected
+
+    qualified = superclass(g, EX.A, OWL.qualifiedCardinality)
+    assert OntoVis.explode_bnode(g, qualified, index=index) == Restriction(EX.hasPart, "exactly", EX.E, 2)
+    complement = g.value(EX.F, OWL.equivalentClass)
+    assert OntoVis.explode_bnode(g, complement, index=index) == ClassExpression("complementOf", (EX.B,))
+
+    union = g.value(g.value(some, OWL.someValuesFrom), OWL.unionOf)
+    assert index.decode(union)[0] == EX.B and isinstance(index.decode(union)[1], BNode)
+    assert sorted((s, r) for s, r in index.restrictions() if s == EX.A) == sorted(
+        [(EX.A, index.decode(some)), (EX.A, Restriction(EX.hasPart, "exactly", EX.E, 2))])
+
+
+def test_cycles_are_followed_once(capsys):
+    g = Graph()
+    a, b = BNode(), BNode()
+    g.add((a, RDF.type, OWL.Restriction))
+    g.add((a, OWL.onProperty, EX.p))
+    g.add((a, OWL.someValuesFrom, b))
+    g.add((b, OWL.complementOf, a))
+    index = BNodeIndex(g)
+    assert sorted(index.cbd(a)) == sorted(g)
+    assert index.has_cycle(a)
+    assert OntoVis.explode_bnode(g, a, index=index) == Restriction(
+        EX.p, "some", ClassExpression("complementOf", (Cycle(a),)), None)
+    assert len(printed(capsys, OntoVis.dig_into_bnode, g, a, index=index)) == 4
+
+
+def test_emmo_like_restrictions(capsys, emmo_like):
+    g = Graph().parse(os.path.join(emmo_like["folder"], "module1.ttl"))
+    vis = OntoVis(g)
+    index = vis.bnode_index()
+    restrictions = [o for o in g.objects(None, RDFS.subClassOf) if isinstance(o, BNode)]
+    assert restrictions
+    for bnode in restrictions:
+        assert printed(capsys, OntoVis.dig_into_bnode, g, bnode, index=index) == \
+            printed(capsys, old_dig_into_bnode, g, bnode)
+        exploded = OntoVis.explode_bnode(g, bnode, index=index)
+        assert exploded == Restriction(g.value(bnode, OWL.onProperty), "some", g.value(bnode, OWL.someValuesFrom),
+                                       None)
+        assert exploded == OntoVis.explode_bnode(g, bnode)
@@ -0,0 +1,117 @@
+import os
+
+import pytest
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDFS
+
+from ontodot.class_hierarchy import ClassHierarchyIndex
+from ontodot.ontodot import OntoVis
+
+EX = "http://example.org/"
+
+
+@pytest.fixture
+def graph(emmo_like):
+    g = Graph()
+    for m in range(3):
+        g.parse(os.path.join(emmo_like["folder"], f"module{m}.ttl"))
+    return g
+
+
+def closure(g):
+    """class --> all its superclasses, itself included, by walking the graph."""
+    result = {}
+    for cls in set(g.subjects(RDFS.subClassOf)) | set(g.objects(None, RDFS.subClassOf)):
+        seen = {cls}
+        stack = [cls]
+        while stack:
+            for sup in g.objects(stack.pop(), RDFS.subClassOf):
+                if sup not in seen:
+                    seen.add(sup)
+                    stack.append(sup)
+        result[cls] = seen
+    return result
+
+
+def assert_matches(index, g):
+    expected = closure(g)
+    assert set(index) >= set(expected)
+    for cls, ancestors in expected.items():
+        assert set(index.ancestors(cls)) == ancestors - {cls}
+        for other in expected:
+            assert index.is_subclass(cls, other) == (other in ancestors)
+
+
+def old_zoom_in_classes(g, root_class, depth):
+    """zoom_in_classes as it was, one SPARQL query per visited class."""
+    sub_graph = Graph()
+
+    def add(class_uri, depth, down):
+        if depth == 0:
+            return
+        if down:
+            query = "SELECT ?x WHERE { ?x rdfs:subClassOf <%s> . }" % class_uri
+        else:
+            query = "SELECT ?x WHERE { <%s> rdfs:subClassOf ?x . }" % class_uri
+        for row in g.query(query, initNs={"rdfs": RDFS}):
+            sub_graph.add((row.x, RDFS.subClassOf, class_uri) if down else (class_uri, RDFS.subClassOf, row.x))
+            add(row.x, depth - 1, down)
+
+    add(URIRef(root_class), depth[1], True)
+    add(URIRef(root_class), depth[0], False)
+    return sub_graph
+
+
+def test_ancestor_bitsets(graph):
+    assert_matches(ClassHierarchyIndex(graph), graph)
+
+
+def test_add_and_remove(graph, emmo_like):
+    index = ClassHierarchyIndex(graph)
+    classes = emmo_like["classes"]
+    edges = [(classes[5], classes[-1]), (classes[0], classes[7])]  # the second one makes a cycle
+    for sub, sup in edges:
+        graph.add((sub, RDFS.subClassOf, sup))
+        index.add(sub, sup)
+        assert_matches(index, graph)
+
+    removed = [(sub, sup) for sub, sup in graph.subject_objects(RDFS.subClassOf) if sup == classes[1]][:3]
+    removed += edges
+    for sub, sup in removed:
+        graph.remove((sub, RDFS.subClassOf, sup))
+        index.remove(sub, sup)
+        assert_matches(index, graph)
+
+    added = [(URIRef(EX + "A"), RDFS.subClassOf, classes[3]), (URIRef(EX + "A"), RDFS.seeAlso, classes[4])]
+    removed = [(classes[3], RDFS.subClassOf, sup) for sup in graph.objects(classes[3], RDFS.subClassOf)]
+    for triple in added:
+        graph.add(triple)
+    for triple in removed:
+        graph.remove(triple)
+    index.update(added=added, removed=removed)
+    assert_matches(index, graph)
+    assert index.parents(URIRef(EX + "A")) == {classes[3]}
+    assert not index.parents(classes[3])
+
+
+def test_zoom_in_classes_matches_the_old_traversal(graph, emmo_like):
+    classes = emmo_like["classes"]
+    vis = OntoVis(graph)
+    roots = classes[::17]
+
+    def check():
+        for root in roots:
+            for depth in [(1, 1), (2, 3), (0, 2), (3, 0)]:
+                assert set(vis.zoom_in_classes(root, depth)) == set(old_zoom_in_classes(graph, root, depth))
+
+    check()
+    new_edge = (classes[30], classes[2])
+    graph.add((new_edge[0], RDFS.subClassOf, new_edge[1]))
+    vis.class_hierarchy().add(*new_edge)
+    check()
+
+    old_edge = next(iter(graph.subject_objects(RDFS.subClassOf)))
+    for sub, sup in (new_edge, old_edge):
+        graph.remove((sub, RDFS.subClassOf, sup))
+        vis.class_hierarchy().remove(sub, sup)
+    check()
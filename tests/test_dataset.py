@@ -0,0 +1,48 @@
+from rdflib import Literal
+from rdflib.namespace import SKOS
+
+from ontology_manager.ontology_utils import OntologyManager
+from conftest import same_triples
+
+
+def loaded_manager(info, **kwargs):
+    manager = OntologyManager(info["folder"], info["catalog"], **kwargs)
+    manager.parse_catalog()
+    manager.load_ontology()
+    return manager
+
+
+def test_dataset_graphs_match_the_plain_graphs(emmo_like):
+    plain = loaded_manager(emmo_like)
+    dataset = loaded_manager(emmo_like, use_dataset=True)
+    assert list(dataset.ontology_graphs) == list(plain.ontology_graphs)
+    for name, g in plain.ontology_graphs.items():
+        assert same_triples(dataset.ontology_graphs[name], g)
+    assert {str(g.identifier) for g in dataset.dataset.graphs() if len(g)} == set(plain.ontology_graphs)
+
+
+def test_union_graph(emmo_like):
+    plain = loaded_manager(emmo_like)
+    dataset = loaded_manager(emmo_like, use_dataset=True)
+    union = dataset.union_graph()
+
+    # each triple once: the modules share the triples of their owl:Ontology headers, the BNodes differ per file
+    all_triples = {t for g in plain.ontology_graphs.values() for t in g}
+    assert len(union) == len(all_triples)
+    assert len(plain.union_graph()) == sum(len(g) for g in plain.ontology_graphs.values())
+
+    labels = {(s, o) for s, p, o in all_triples if p == SKOS.prefLabel}
+    rows = union.query("SELECT ?c ?l WHERE { ?c skos:prefLabel ?l }", initNs={"skos": SKOS})
+    assert {(row.c, row.l) for row in rows} == labels
+    rows = union.query("SELECT ?c WHERE { ?c skos:prefLabel ?l } ", initNs={"skos": SKOS},
+                       initBindings={"l": Literal("Class2x5", lang="en")})
+    assert [row.c for row in rows] == [s for s, l in labels if l == Literal("Class2x5", lang="en")]
+
+
+def test_replace_iri_on_the_dataset(emmo_like):
+    plain = loaded_manager(emmo_like)
+    dataset = loaded_manager(emmo_like, use_dataset=True)
+    assert dataset.replace_iri() == plain.replace_iri() > 0
+    for name, g in plain.ontology_graphs.items():
+        assert same_triples(dataset.ontology_graphs[name], g)
+    assert len(dataset.union_graph()) == len({t for g in plain.ontology_graphs.values() for t in g})
@@ -0,0 +1,113 @@
+import re
+import shutil
+import subprocess
+import xml.etree.ElementTree as ET
+
+import pytest
+from rdflib import BNode, Graph, Literal, Namespace, RDFS, XSD
+from rdflib.namespace import SKOS
+
+from ontodot.dot_writer import graph_to_dot, shorten
+
+EX = Namespace("http://example.org/onto#")
+
+_STATEMENT = re.compile(r"\t(node\d+) (?:-> (node\d+) )?\[ (.*?)label=< (.*?) > \] ;\n", re.DOTALL)
+
+
+def parse_dot(text):
+    """
+    Read the DOT written by graph_to_dot back: the statements must follow one another up to the closing brace,
+    and each html label must be well-formed XML (graphviz reads them with expat).
+
+    return: ({node id: label element}, [(tail id, head id, label element)])
+    """
+    header = 'digraph { \n node [ fontname="DejaVu Sans" ] ; \n'
+    assert text.startswith(header) and text.endswith("}\n")
+    body = text[len(header):-2]
+    nodes, edges = {}, []
+    position = 0
+    while position < len(body):
+        match = _STATEMENT.match(body, position)
+        assert match is not None, body[position:position + 200]
+        tail, head, attributes, label = match.groups()
+        element = ET.fromstring(f"<label>{label}</label>")
+        if head is None:
+            assert attributes == "shape=none, color=black "
+            nodes[tail] = element
+        else:
+            assert attributes == "color=BLACK, "
+            edges.append((tail, head, element))
+        position = match.end()
+    for tail, head, _ in edges:
+        assert tail in nodes and head in nodes
+    return nodes, edges
+
+
+def texts(element):
+    return ["".join(cell.itertext()) for cell in element.iter("td")]
+
+
+def tricky_graph():
+    g = Graph()
+    g.bind("ex", EX)
+    g.add((EX.A, SKOS.prefLabel, Literal('Say "hi" & <bye>', lang="en")))
+    g.add((EX.A, RDFS.comment, Literal("first line\nsecond line with 'quotes'")))
+    g.add((EX.A, EX.size, Literal("1.5", datatype=XSD.decimal)))
+    g.add((EX.A, RDFS.subClassOf, EX["B\"C"]))
+    g.add((EX["B\"C"], RDFS.label, Literal("Ångström — 原子 ✓")))
+    g.add((EX.A, EX["has<part>"], BNode("b0")))
+    return g
+
+
+def test_labels_are_escaped():
+    text = graph_to_dot(tricky_graph(), tricky_graph().namespace_manager)
+    nodes, edges = parse_dot(text)
+    assert len(nodes) == 3
+    cells = {node_id: texts(element) for node_id, element in nodes.items()}
+
+    a = next(values for values in cells.values() if values[0] == 'Say "hi" & <bye>')
+    assert a[1] == "ex:A"
+    assert "\"first line\nsecond line with 'quotes'\"" in a
+    assert '"1.5"^^xsd:decimal' in a
+    assert 'Say "hi" & <bye>' not in text  # only ever written escaped
+
+    b = next(values for values in cells.values() if values[0] == "Ångström — 原子 ✓")
+    assert b[1] == str(EX["B\"C"])
+    assert any(values[0] == "_:b0" for values in cells.values())
+    assert sorted("".join(label.itertext()) for _, _, label in edges) == [str(EX["has<part>"]), "rdfs:subClassOf"]
+
+
+def test_shortened_labels_stay_well_formed():
+    g = Graph()
+    g.add((EX.A, RDFS.label, Literal("&" * 30)))
+    g.add((EX.A, RDFS.comment, Literal('"<&>"' * 20)))
+    nodes, _ = parse_dot(graph_to_dot(g, max_label_length=10, max_literal_length=7))
+    (values,) = [texts(element) for element in nodes.values()]
+    assert values[0] == shorten("&" * 30, 10)
+    assert values[2:] == [str(RDFS.comment), '"' + shorten('"<&>"' * 20, 7) + '"']
+
+
+def test_control_characters_are_dropped():
+    g = Graph()
+    g.add((EX.A, RDFS.label, Literal("bell\x07 and\x0bvertical tab")))
+    g.add((EX.A, RDFS.comment, Literal("form\x0cfeed\ttab")))
+    nodes, _ = parse_dot(graph_to_dot(g))
+    (values,) = [texts(element) for element in nodes.values()]
+    assert values[0] == "bell andvertical tab"
+    assert values[3] == '"formfeed\ttab"'
+
+
+def test_the_emmo_like_graph_parses(emmo_like):
+    g = Graph()
+    g.parse(f"{emmo_like['folder']}/module1.ttl")
+    nodes, edges = parse_dot(graph_to_dot(g, g.namespace_manager, max_literal_length=25))
+    assert len(nodes) == len(set(g.subjects()) | {o for o in g.objects() if not isinstance(o, Literal)})
+    assert len(edges) == len({(s, p, o) for s, p, o in g if not isinstance(o, Literal)})
+
+
+@pytest.mark.skipif(shutil.which("dot") is None, reason="graphviz is not installed")
+def test_graphviz_reads_it():
+    completed = subprocess.run(["dot", "-Tcanon"], input=graph_to_dot(tricky_graph()).encode("utf-8"),
+                               capture_output=True)
+    assert completed.returncode == 0, completed.stderr
+    assert not completed.stderr
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import OWL, RDF, RDFS, SKOS
+
+from ontology_manager.ontology_utils import OntologyManager
+from ontology_manager.uid_map import UIDLabelMap, UID_MAP_FILENAME
+
+EMMO = Namespace("http://emmo.info/emmo#")
+
+
+def test_emmo_to_label_graph_leaves_out_shared_and_invalid_labels():
+    g = Graph()
+    first, second, atom, spaced = (EMMO[f"EMMO_{i}"] for i in range(4))
+    for cls, label in ((first, "Matter"), (second, "Matter"), (atom, "Atom"), (spaced, "Chemical Element")):
+        g.add((cls, RDF.type, OWL.Class))
+        g.add((cls, SKOS.prefLabel, Literal(label, lang="en")))
+    g.add((atom, RDFS.subClassOf, first))
+
+    with pytest.warns(RuntimeWarning):
+        sop_map = OntologyManager.emmo_to_label_graph(EMMO, SKOS.prefLabel, g)
+
+    assert sop_map["s_map"] == {atom: EMMO.Atom}
+    assert list(sop_map["conflicts"]) == [EMMO.Matter]
+    assert sorted(sop_map["conflicts"][EMMO.Matter]) == [first, second]
+    assert sop_map["invalid"] == {spaced: "Chemical Element"}
+
+
+def copies(graphs):
+    copied = {}
+    for name, g in graphs.items():
+        copied[name] = Graph()
+        copied[name] += g
+    return copied
+
+
+@pytest.mark.parametrize("sidecar", [True, False])
+def test_emmo_to_label_round_trip(emmo_like, sidecar):
+    manager = OntologyManager(emmo_like["folder"], emmo_like["catalog"])
+    manager.parse_catalog()
+    manager.load_ontology()
+    original = copies(manager.ontology_graphs)
+    map_path = os.path.join(emmo_like["folder"], UID_MAP_FILENAME)
+
+    uid_map = manager.emmo_to_label()
+    assert len(uid_map) == len(emmo_like["classes"]) + len(emmo_like["properties"])
+    assert os.path.isfile(map_path)
+    atom = uid_map.label_iri(emmo_like["classes"][1])
+    assert atom == EMMO.Class0x0
+    assert manager.terms.emmo.Class0x0 == atom
+    assert UIDLabelMap.load(map_path).forward() == uid_map.forward()
+    assert not any(emmo_like["classes"][1] in triple for g in manager.ontology_graphs.values() for triple in g)
+
+    if not sidecar:
+        os.remove(map_path)  # rebuilt from the hasUIDLabel annotations
+    manager.unfix_emmo_label()
+
+    for name, g in manager.ontology_graphs.items():
+        assert set(g) == set(original[name]), name
+    assert manager.terms.emmo.Class0x0 == emmo_like["classes"][1]
+    if sidecar:
+        assert len(UIDLabelMap.load(map_path)) == 0
+    else:
+        assert not os.path.isfile(map_path)
+
+
+def test_unfix_emmo_label_of_some_graphs_keeps_the_others_in_the_map(emmo_like):
+    manager = OntologyManager(emmo_like["folder"], emmo_like["catalog"])
+    manager.parse_catalog()
+    manager.load_ontology()
+    map_path = os.path.join(emmo_like["folder"], UID_MAP_FILENAME)
+    manager.emmo_to_label()
+    last = list(manager.ontology_graphs)[-1]
+
+    manager.unfix_emmo_label(graphs={last: manager.ontology_graphs[last]})
+
+    uid_map = UIDLabelMap.load(map_path)
+    class2 = manager.term_resolver.resolve("Class2x0", "http://emmo.info/emmo#")
+    assert class2 not in uid_map and uid_map.uid_iri(EMMO.Class2x0) is None
+    # the terms of the other modules are still renamed, and the classes of module 2 refer to them
+    assert uid_map.label_iri(emmo_like["classes"][1]) == EMMO.Class0x0
+    assert len(uid_map) > 0
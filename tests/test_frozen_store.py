@@ -0,0 +1,58 @@
+import itertools
+import os
+import random
+
+import pytest
+from rdflib import Graph, Literal, URIRef
+from rdflib.graph import ModificationException
+from rdflib.namespace import RDF, RDFS, SKOS
+
+pytest.importorskip("numpy")
+
+from ontology_manager.frozen_store import FrozenStore  # noqa: E402
+
+
+@pytest.fixture
+def graphs(emmo_like):
+    g = Graph()
+    for m in range(3):
+        g.parse(os.path.join(emmo_like["folder"], f"module{m}.ttl"))
+    return g, Graph(store=FrozenStore(g, g.namespaces()))
+
+
+def test_triple_patterns(graphs):
+    g, frozen = graphs
+    assert len(frozen) == len(g)
+    assert set(frozen) == set(g)
+
+    rng = random.Random(0)
+    sample = rng.sample(sorted(g, key=str), 20) + [(URIRef("http://example.org/unknown"), RDF.type, Literal("x"))]
+    for triple in sample:
+        for bound in itertools.product((True, False), repeat=3):
+            pattern = tuple(term if keep else None for term, keep in zip(triple, bound))
+            assert set(frozen.triples(pattern)) == set(g.triples(pattern)), pattern
+
+
+SPARQL_QUERIES = [
+    "SELECT ?s ?label WHERE { ?s skos:prefLabel ?label }",
+    "SELECT ?sub ?sup WHERE { ?sub rdfs:subClassOf ?sup . ?sup a owl:Class }",
+    "SELECT ?cls ?prop ?filler WHERE { ?cls rdfs:subClassOf ?r . ?r owl:onProperty ?prop ; owl:someValuesFrom ?filler }",
+    "SELECT ?s WHERE { ?s a owl:ObjectProperty FILTER NOT EXISTS { ?s rdfs:subPropertyOf ?p } }",
+    "SELECT (COUNT(?s) AS ?n) WHERE { ?s ?p ?o }",
+    "SELECT ?ancestor WHERE { ?cls skos:prefLabel 'Class2x7'@en ; rdfs:subClassOf+ ?ancestor }",
+]
+
+
+@pytest.mark.parametrize("query", SPARQL_QUERIES)
+def test_sparql(graphs, query):
+    g, frozen = graphs
+    namespaces = {"skos": SKOS, "rdfs": RDFS, "owl": URIRef("http://www.w3.org/2002/07/owl#")}
+    expected = sorted(tuple(row) for row in g.query(query, initNs=namespaces))
+    assert expected
+    assert sorted(tuple(row) for row in frozen.query(query, initNs=namespaces)) == expected
+
+
+def test_read_only(graphs):
+    _, frozen = graphs
+    with pytest.raises(ModificationException):
+        frozen.add((URIRef("http://example.org/a"), RDF.type, RDFS.Class))
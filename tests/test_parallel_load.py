@@ -0,0 +1,23 @@
+from ontology_manager.ontology_utils import OntologyManager
+from conftest import same_triples
+
+
+def load(info, jobs):
+    manager = OntologyManager(info["folder"], info["catalog"])
+    manager.parse_catalog()
+    timings = manager.load_ontology(jobs=jobs)
+    return manager, timings
+
+
+def test_parallel_load_matches_the_serial_load(emmo_like):
+    serial, serial_timings = load(emmo_like, 1)
+    parallel, parallel_timings = load(emmo_like, 2)
+
+    assert list(parallel.ontology_graphs) == list(serial.ontology_graphs)
+    assert set(parallel_timings) == set(serial_timings) == set(serial.catalog_map)
+    for name, g in serial.ontology_graphs.items():
+        other = parallel.ontology_graphs[name]
+        assert same_triples(other, g)
+        assert sorted(other.namespaces()) == sorted(g.namespaces())
+    assert sum(len(g) for g in parallel.ontology_graphs.values()) == emmo_like["triples"]
+    assert parallel.search("Class1x3", fuzzy=False)[0].term == serial.search("Class1x3", fuzzy=False)[0].term
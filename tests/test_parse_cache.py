@@ -0,0 +1,94 @@
+import os
+
+from rdflib import Graph
+
+from ontology_manager import ontology_utils
+from ontology_manager.ontology_utils import OntologyManager
+from ontology_manager.parse_cache import ParseCache
+from conftest import write_catalog
+
+
+def test_invalidate_cache_of_non_turtle_files(emmo_like, tmp_path):
+    folder = emmo_like["folder"]
+    g = Graph().parse(os.path.join(folder, "module0.ttl"))
+    g.serialize(os.path.join(folder, "module0.nt"), format="nt")
+    g.serialize(os.path.join(folder, "module0.owl"), format="xml")
+    g.serialize(os.path.join(folder, "module0.jsonld"), format="json-ld")
+    entries = [("nt", "module0.nt"), ("owl", "module0.owl"), ("jsonld", "module0.jsonld"), ("ttl", "module0.ttl")]
+    catalog = write_catalog(folder, entries, "formats.xml")
+
+    manager = OntologyManager(folder, catalog, cache_dir=str(tmp_path / "cache"))
+    manager.parse_catalog()
+    manager.load_ontology()
+    assert len(list(manager.parse_cache._entries())) == len(entries)
+
+    for name, _ in entries:
+        assert manager.invalidate_cache(name) == 1, name
+        assert manager.invalidate_cache(name) == 0, name
+    assert manager.parse_cache.size() == 0
+
+
+def cached_manager(info, cache_dir):
+    manager = OntologyManager(info["folder"], info["catalog"], cache_dir=cache_dir)
+    manager.parse_catalog()
+    manager.load_ontology()
+    return manager
+
+
+def test_second_load_is_served_from_the_cache(emmo_like, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = cached_manager(emmo_like, cache_dir)
+
+    parsed = []
+    parse = ontology_utils.parse_rdf_file
+
+    def counting_parse(g, path, fmt):
+        parsed.append(path)
+        return parse(g, path, fmt)
+
+    monkeypatch.setattr(ontology_utils, "parse_rdf_file", counting_parse)
+    second = cached_manager(emmo_like, cache_dir)
+
+    assert parsed == []
+    for name, g in first.ontology_graphs.items():
+        assert set(second.ontology_graphs[name]) == set(g)  # the cached blank nodes are the parsed ones
+        assert dict(second.ontology_graphs[name].namespaces()) == dict(g.namespaces())
+    assert second.terms.emmo.Class1x3 == first.terms.emmo.Class1x3
+
+    # a changed file misses the cache, the others still hit
+    module = os.path.join(emmo_like["folder"], "module1.ttl")
+    with open(module, "a") as f:
+        f.write("\n<http://example.org/a> <http://example.org/b> <http://example.org/c> .\n")
+    third = cached_manager(emmo_like, cache_dir)
+    assert parsed == [module]
+    name = list(first.catalog_map)[1]
+    assert len(third.ontology_graphs[name]) == len(first.ontology_graphs[name]) + 1
+
+
+def test_key_depends_on_content_and_format(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    path = tmp_path / "a.ttl"
+    path.write_text("<http://example.org/a> <http://example.org/b> <http://example.org/c> .\n")
+    key = cache.key(str(path), "turtle")
+    assert cache.key(str(path), "turtle") == key
+    assert cache.key(str(path), "nt") != key
+    cache.put(key, {"triples": []})
+    path.write_text("<http://example.org/a> <http://example.org/b> <http://example.org/d> .\n")
+    assert cache.get(cache.key(str(path), "turtle")) is None
+    assert cache.get(key) == {"triples": []}
+
+
+def test_put_evicts_the_least_recently_used_entries(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"), max_bytes=1 << 40)
+    payload = {"triples": ["x" * 1000]}
+    for i, key in enumerate("abc"):
+        cache.put(key, payload)
+        os.utime(cache._entry_path(key), (1000 + i, 1000 + i))  # a, b, c from the oldest
+    entry_size = os.path.getsize(cache._entry_path("a"))
+    assert cache.get("a") == payload  # a hit refreshes a, b is now the least recently used
+
+    cache.max_bytes = 3 * entry_size
+    cache.put("d", payload)
+    assert cache.get("b") is None
+    assert all(cache.get(key) == payload for key in "acd")
+    assert cache.size() <= cache.max_bytes
@@ -0,0 +1,126 @@
+from rdflib import Graph, Literal, Namespace, RDF, RDFS, OWL
+
+from ontodot import query
+from ontodot.ontodot import Filter_Proxy, _vis_triples
+from ontodot.query import TripleQuery
+
+EX = Namespace("http://example.org/")
+
+
+class CountingGraph:
+    """A graph that records the patterns it is asked for and the number of triples it yields."""
+
+    def __init__(self, g):
+        self.g = g
+        self.patterns = []
+        self.read = 0
+
+    def triples(self, pattern):
+        self.patterns.append(pattern)
+        for triple in self.g.triples(pattern):
+            self.read += 1
+            yield triple
+
+
+def sample_graph():
+    g = Graph()
+    for i in range(20):
+        c = EX[f"C{i}"]
+        g.add((c, RDF.type, OWL.Class))
+        g.add((c, RDFS.label, Literal(f"C{i}")))
+        g.add((c, RDFS.comment, Literal(f"the class C{i}")))
+        if i:
+            g.add((c, RDFS.subClassOf, EX[f"C{i // 2}"]))
+    return g
+
+
+def test_where_is_pushed_down():
+    g = sample_graph()
+    source = CountingGraph(g)
+    q = TripleQuery(source).where(p=RDFS.subClassOf).where(o=[EX.C1, EX.C2])
+    patterns, residual = q.patterns()
+    assert sorted(patterns) == sorted([(None, RDFS.subClassOf, EX.C1), (None, RDFS.subClassOf, EX.C2)])
+    assert residual == [None, None, None]
+
+    result = set(q)
+    assert result == {(s, p, o) for s, p, o in g if p == RDFS.subClassOf and o in (EX.C1, EX.C2)}
+    assert source.read == len(result)
+    assert sorted(source.patterns) == sorted(patterns)
+
+
+def test_where_intersection_and_too_many_patterns(monkeypatch):
+    g = sample_graph()
+    assert TripleQuery(g).where(s=EX.C1).where(s=EX.C2).patterns()[0] == []
+    assert list(TripleQuery(g).where(s=EX.C1).where(s=EX.C2)) == []
+
+    monkeypatch.setattr(query, "MAX_PATTERNS", 4)
+    subjects = [EX[f"C{i}"] for i in range(5)]
+    q = TripleQuery(g).where(s=subjects, p=[RDF.type, RDFS.label])
+    patterns, residual = q.patterns()
+    assert sorted(patterns) == sorted([(None, RDF.type, None), (None, RDFS.label, None)])
+    assert residual == [frozenset(subjects), None, None]
+    assert set(q) == {t for t in g if t[0] in subjects and t[1] in (RDF.type, RDFS.label)}
+
+
+def test_where_not_filter_and_count():
+    g = sample_graph()
+    q = TripleQuery(g).where_not(p=[RDFS.comment, RDFS.label])
+    assert set(q) == {t for t in g if t[1] not in (RDFS.comment, RDFS.label)}
+    assert q.count() == 20 + 19
+
+    q = q.filter(lambda s, p, o: p == RDFS.subClassOf and o == EX.C0)
+    assert set(q) == {(EX.C1, RDFS.subClassOf, EX.C0)}
+    assert q.count() == 1
+    assert list(q.select("s")) == [EX.C1]
+
+    # an iterable source is scanned
+    assert TripleQuery(list(g)).where(p=RDFS.subClassOf).count() == 19
+
+
+def test_limit_applies_in_call_order():
+    g = sample_graph()
+    first = list(TripleQuery(g).limit(10))
+    after = list(TripleQuery(g).limit(10).where(p=RDFS.label))
+    assert after == [t for t in first if t[1] == RDFS.label]
+
+    before = list(TripleQuery(g).where(p=RDFS.label).limit(5))
+    assert len(before) == 5
+    assert all(p == RDFS.label for _, p, _ in before)
+
+    only_first = TripleQuery(g).limit(10).filter(lambda s, p, o: p == RDFS.label)
+    assert list(only_first) == [t for t in first if t[1] == RDFS.label]
+    assert TripleQuery(g).filter(lambda s, p, o: p == RDFS.label).limit(3).count() == 3
+
+    # the where() after limit() is not pushed down in front of the limit
+    source = CountingGraph(g)
+    list(TripleQuery(source).limit(10).where(p=RDFS.label))
+    assert source.patterns == [(None, None, None)]
+    assert TripleQuery(g).limit(10).limit(3).count() == 3
+    assert TripleQuery(g).limit(3).limit(10).count() == 3
+
+
+def test_map_and_graph():
+    g = sample_graph()
+    g.bind("ex", EX)
+    q = TripleQuery(g).where(p=RDFS.label).map(lambda s, p, o: (s, p, Literal(str(o).lower())))
+    assert set(q.where(o=Literal("c3"))) == {(EX.C3, RDFS.label, Literal("c3"))}
+    out = q.graph()
+    assert len(out) == 20
+    assert ("ex", EX) in {(prefix, Namespace(str(ns))) for prefix, ns in out.namespaces()}
+
+
+def test_filter_proxy():
+    g = sample_graph()
+    px = Filter_Proxy(g, lambda s, p, o: p != RDFS.comment, pattern=(EX.C3, None, None))
+    assert set(px) == {t for t in g.triples((EX.C3, None, None)) if t[1] != RDFS.comment}
+    assert set(px.triples((None, RDFS.label, None))) == {(EX.C3, RDFS.label, Literal("C3"))}
+    assert px.value(EX.C3, RDFS.subClassOf) == EX.C1
+    assert px.value(EX.C3, RDFS.comment) is None
+    assert px.namespace_manager is g.namespace_manager
+
+
+def test_vis_triples_skips_comments():
+    g = sample_graph()
+    vis_g, triples = _vis_triples(g)
+    assert vis_g is g
+    assert set(triples) == {t for t in g if t[1] != RDFS.comment}
@@ -0,0 +1,159 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+
+import pytest
+from rdflib import BNode, Dataset, Graph, Literal, Namespace, URIRef, RDF, RDFS, OWL, XSD
+from rdflib.compare import isomorphic
+from rdflib.namespace import SKOS
+
+from ontology_manager import rdf_formats
+from ontology_manager.ontology_utils import OntologyManager
+from ontology_manager.rdf_formats import guess_rdf_format, parse_rdf_file, sniff_format
+from conftest import write_catalog
+
+EX = Namespace("http://example.org/onto#")
+
+# rdflib serializer name --> file extension
+FORMATS = {"turtle": ".ttl", "n3": ".n3", "nt": ".nt", "nquads": ".nq", "trig": ".trig", "xml": ".rdf",
+           "json-ld": ".jsonld"}
+
+COMPRESSORS = {"": None, ".gz": gzip.compress, ".bz2": bz2.compress, ".xz": lzma.compress}
+
+
+def sample_graph():
+    g = Graph()
+    g.bind("ex", EX)
+    g.add((URIRef("http://example.org/onto"), RDF.type, OWL.Ontology))
+    for i in range(5):
+        c = EX[f"Class{i}"]
+        g.add((c, RDF.type, OWL.Class))
+        g.add((c, SKOS.prefLabel, Literal(f"Class {i}", lang="en")))
+        g.add((c, RDFS.comment, Literal('a "quoted"\nmulti-line comment, Ångström')))
+        g.add((c, EX.rank, Literal(i, datatype=XSD.integer)))
+        restriction = BNode()
+        g.add((c, RDFS.subClassOf, restriction))
+        g.add((restriction, RDF.type, OWL.Restriction))
+        g.add((restriction, OWL.onProperty, EX.hasPart))
+        g.add((restriction, OWL.someValuesFrom, EX[f"Class{(i + 1) % 5}"]))
+    return g
+
+
+def serialize(g, fmt):
+    if fmt in ("nquads", "trig"):
+        ds = Dataset()
+        ds.bind("ex", EX)
+        named = ds.graph(URIRef("http://example.org/graph"))
+        for triple in g:
+            named.add(triple)
+        return ds.serialize(format=fmt, encoding="utf-8")
+    return g.serialize(format=fmt, encoding="utf-8")
+
+
+def write(folder, name, data, compression=""):
+    path = os.path.join(folder, name + compression)
+    compress = COMPRESSORS[compression]
+    with open(path, "wb") as f:
+        f.write(compress(data) if compress else data)
+    return path
+
+
+def reference_graph(data, fmt):
+    """The triples rdflib parses from the uncompressed data, the graph names dropped."""
+    ds = Dataset()
+    ds.parse(data=data, format=fmt)
+    g = Graph()
+    for s, p, o, _ in ds.quads((None, None, None, None)):
+        g.add((s, p, o))
+    return g
+
+
+@pytest.mark.parametrize("fmt, extension", sorted(FORMATS.items()))
+def test_guess_by_extension(tmp_path, fmt, extension):
+    for compression in COMPRESSORS:
+        name = f"onto{extension}{compression}"
+        assert guess_rdf_format(str(tmp_path / name)) == fmt
+        assert guess_rdf_format(f"https://example.org/{name}") == fmt
+    assert guess_rdf_format(str(tmp_path / f"ONTO{extension.upper()}")) == fmt
+
+
+@pytest.mark.parametrize("fmt", ["turtle", "nt", "nquads", "xml", "json-ld"])
+@pytest.mark.parametrize("compression", list(COMPRESSORS))
+def test_guess_by_content(tmp_path, fmt, compression):
+    data = serialize(sample_graph(), fmt)
+    for name in ("onto.owl", "onto"):
+        path = write(str(tmp_path), name, data, compression)
+        assert guess_rdf_format(path) == fmt
+
+
+def test_sniff_format():
+    assert sniff_format(b'\xef\xbb\xbf  <?xml version="1.0"?>\n<rdf:RDF/>') == "xml"
+    assert sniff_format(b'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">') == "xml"
+    assert sniff_format(b'[{"@id": "http://example.org/a"}]') == "json-ld"
+    assert sniff_format(b'@prefix ex: <http://example.org/> .\nex:a ex:b ex:c .\n') == "turtle"
+    assert sniff_format(b'<http://example.org/a> <http://example.org/b> "c"@en .\n'
+                        b'# a comment\n<http://example.org/a> <http://example.org/b> _:b0 .\n') == "nt"
+    assert sniff_format(b'<http://example.org/a> <http://example.org/b> "c" <http://example.org/g> .\n') == "nquads"
+    # a turtle statement that is not N-Triples, and a last line that may be cut
+    assert sniff_format(b'<http://example.org/a> a <http://example.org/C> .\n') == "turtle"
+    assert sniff_format(b'<http://example.org/a> <http://example.org/b> "cut') == "turtle"
+    assert sniff_format(b'') == "turtle"
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+@pytest.mark.parametrize("compression", list(COMPRESSORS))
+def test_parse_rdf_file(tmp_path, fmt, compression):
+    data = serialize(sample_graph(), fmt)
+    path = write(str(tmp_path), "onto" + FORMATS[fmt], data, compression)
+    g = parse_rdf_file(Graph(), path)
+    assert len(g) == len(sample_graph())
+    assert isomorphic(g, reference_graph(data, fmt))
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+@pytest.mark.parametrize("compression", list(COMPRESSORS))
+def test_load_ontology_per_format(tmp_path, fmt, compression):
+    data = serialize(sample_graph(), fmt)
+    file_name = os.path.basename(write(str(tmp_path), "onto" + FORMATS[fmt], data, compression))
+    catalog = write_catalog(str(tmp_path), [("http://example.org/onto", file_name)])
+    manager = OntologyManager(str(tmp_path), catalog)
+    manager.parse_catalog()
+    manager.load_ontology()
+    assert isomorphic(manager.ontology_graphs["http://example.org/onto"], reference_graph(data, fmt))
+
+
+@pytest.mark.parametrize("quads", [False, True])
+def test_line_parser_streams_in_batches(quads):
+    lines = []
+    for i in range(25):
+        graph = " <http://example.org/g>" if quads and i % 2 else ""
+        lines.append(f'<http://example.org/s{i}> <http://example.org/p> "v{i}"@en{graph} .')
+        lines.append(f'_:b{i} <http://example.org/p> <http://example.org/o{i}>{graph} .')
+    lines.insert(3, "# a comment")
+    lines.insert(5, "")
+
+    g = Graph()
+    batches = []
+    sink = rdf_formats._BatchSink(g, batch_size=10)
+    flush = sink.flush
+
+    def counting_flush():
+        batches.append(len(sink.batch))
+        flush()
+
+    sink.flush = counting_flush
+    rdf_formats._LineParser(sink, quads=quads).parse(io.StringIO("\n".join(lines) + "\n"), bnode_context={})
+    sink.flush()
+    assert len(g) == 50
+    assert max(batches) == 10
+    assert isomorphic(g, reference_graph("\n".join(lines), "nquads" if quads else "nt"))
+
+
+def test_line_parser_rejects_trailing_garbage():
+    sink = rdf_formats._BatchSink(Graph(), batch_size=10)
+    with pytest.raises(Exception):
+        rdf_formats._LineParser(sink, quads=True).parse(
+            io.StringIO('<http://example.org/s> <http://example.org/p> "o" <http://example.org/g> x .\n'),
+            bnode_context={})
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from ontology_manager import ontology_utils, parse_cache
+from ontology_manager.ontology_utils import OntologyManager
+from ontology_manager.parse_cache import file_digest
+
+
+def loaded_manager(info, **kwargs):
+    manager = OntologyManager(info["folder"], info["catalog"], **kwargs)
+    manager.parse_catalog()
+    manager.load_ontology()
+    return manager
+
+
+def break_file(path):
+    with open(path, "a") as f:
+        f.write("\nthis is not turtle .\n")
+
+
+def test_reload_keeps_the_graph_of_a_file_that_fails_to_parse(emmo_like):
+    manager = loaded_manager(emmo_like)
+    name = list(manager.catalog_map)[1]
+    old_graph = manager.ontology_graphs[name]
+    n_triples = len(old_graph)
+    module = os.path.join(emmo_like["folder"], manager.catalog_map[name])
+    with open(module) as f:
+        content = f.read()
+    break_file(module)
+
+    report = manager.reload()
+    assert report["changed"] == [name]
+    assert report["failed"] == [name]
+    assert manager.ontology_graphs[name] is old_graph
+    assert len(old_graph) == n_triples
+    assert manager.search("Class1x3", fuzzy=False)[0].graphs == [name]
+    assert manager.terms.emmo.Class1x3 in emmo_like["classes"]
+
+    with open(module, "w") as f:
+        f.write(content)
+    report = manager.reload()
+    assert report["changed"] == [name] and report["failed"] == []
+    assert manager.ontology_graphs[name] is not old_graph
+    assert len(manager.ontology_graphs[name]) == n_triples
+
+
+def test_reload_drops_the_named_graph_that_fails_to_parse(emmo_like):
+    manager = loaded_manager(emmo_like, use_dataset=True)
+    name = list(manager.catalog_map)[1]
+    break_file(os.path.join(emmo_like["folder"], manager.catalog_map[name]))
+
+    report = manager.reload()
+    assert report["failed"] == [name]
+    assert name not in manager.ontology_graphs
+    assert manager.search("Class1x3", fuzzy=False) == []
+    with pytest.raises(AttributeError):
+        manager.terms.emmo.Class1x3
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_load_reads_each_file_once(emmo_like, tmp_path, monkeypatch, cached):
+    hashed = []
+
+    def counting_digest(path):
+        hashed.append(path)
+        return file_digest(path)
+
+    monkeypatch.setattr(ontology_utils, "file_digest", counting_digest)
+    monkeypatch.setattr(parse_cache, "file_digest", counting_digest)
+    manager = loaded_manager(emmo_like, cache_dir=str(tmp_path / "cache") if cached else None)
+    assert len(hashed) == (len(manager.catalog_map) if cached else 0)
+
+    # a touched file is only parsed again if its content is not known to be the same
+    module = os.path.join(emmo_like["folder"], manager.catalog_map[list(manager.catalog_map)[0]])
+    os.utime(module, ns=(0, 0))
+    assert manager.reload()["changed"] == ([] if cached else [list(manager.catalog_map)[0]])
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+from rdflib import Graph, Literal, Namespace, RDFS
+
+from ontodot import ontodot
+from ontodot.render_cache import RenderIndex, graph_fingerprint
+
+EX = Namespace("http://example.org/")
+
+
+def small_graph():
+    g = Graph()
+    g.add((EX.A, RDFS.subClassOf, EX.B))
+    g.add((EX.A, RDFS.label, Literal("A")))
+    return g
+
+
+def test_next_serial_does_not_reserve(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert ontodot.next_serial() == 0
+    assert ontodot.next_serial() == 0
+    assert not os.path.exists("OnoVis.Output")
+
+    assert ontodot.reserve_serial() == 0
+    assert ontodot.next_serial() == 1
+    assert ontodot.reserve_serial() == 1
+    assert RenderIndex("OnoVis.Output").next_serial() == 2
+
+
+def test_next_serial_skips_files_written_without_the_index(tmp_path):
+    folder = tmp_path / "out"
+    folder.mkdir()
+    (folder / "OntoVis-0.dot").write_text("digraph {}")
+    index = RenderIndex(str(folder))
+    (folder / "OntoVis-1.dot").write_text("digraph {}")
+    assert index.next_serial() == 2
+    assert index.reserve_serial() == 2
+    assert RenderIndex(str(folder)).reserve_serial() == 3
+
+
+def test_fingerprint_depends_on_the_namespaces():
+    triples = list(small_graph())
+    plain = graph_fingerprint(triples, {"fmt": "png"})
+    bound = graph_fingerprint(triples, {"fmt": "png"}, [("ex", EX), ("rdfs", RDFS)])
+    assert plain != bound
+    assert bound == graph_fingerprint(reversed(triples), {"fmt": "png"}, [("rdfs", RDFS), ("ex", EX)])
+    assert bound != graph_fingerprint(triples, {"fmt": "png"}, [("other", EX), ("rdfs", RDFS)])
+
+
+def test_vis_reserves_the_serial_after_rendering(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ontodot, "_display_image", lambda image, fmt: None)
+
+    def fail(dot_text, fmt):
+        raise RuntimeError("graphviz failed")
+
+    monkeypatch.setattr(ontodot, "render_dot", fail)
+    with pytest.raises(RuntimeError):
+        ontodot.vis(small_graph())
+    assert ontodot.next_serial() == 0
+
+    monkeypatch.setattr(ontodot, "render_dot", lambda dot_text, fmt: b"image")
+    assert ontodot.vis(small_graph()) == "OnoVis.Output/OntoVis-0.png"
+
+    # another prefix binding draws other labels: not served from the cache
+    g = small_graph()
+    g.bind("ex", EX)
+    assert ontodot.vis(g) == "OnoVis.Output/OntoVis-1.png"
+    assert ontodot.vis(g) == "OnoVis.Output/OntoVis-1.png"
+
+
+def test_vis_batch_records_through_the_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(ontodot, "render_dot", lambda dot_text, fmt: b"image")
+    folder = str(tmp_path / "out")
+    index = RenderIndex(folder)
+    index.record("stale", os.path.join(folder, "OntoVis-0.png"))
+
+    results = ontodot.vis_batch([small_graph()], output_folder=folder)
+    assert results[0]["path"] == os.path.join(folder, "OntoVis-0.png")
+    renders = RenderIndex(folder).data["renders"]
+    assert "stale" not in renders
+    assert list(renders.values()) == ["OntoVis-0.png"]
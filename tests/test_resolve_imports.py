@@ -0,0 +1,25 @@
+import pytest
+
+from ontology_manager.ontology_utils import OntologyManager
+from conftest import same_triples
+
+
+def from_catalog(info):
+    manager = OntologyManager(info["folder"], info["catalog"])
+    manager.parse_catalog()
+    manager.load_ontology()
+    return manager
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_resolve_imports_builds_the_catalog_map(emmo_like, jobs):
+    expected = from_catalog(emmo_like)
+    main_file = expected.catalog_map[list(expected.catalog_map)[-1]]  # the last module imports the others
+
+    manager = OntologyManager(emmo_like["folder"], main_file)
+    manager.load_ontology(jobs=jobs)
+    assert manager.catalog_map == expected.catalog_map
+    assert set(manager.ontology_graphs) == set(expected.ontology_graphs)
+    for name, g in expected.ontology_graphs.items():
+        assert same_triples(manager.ontology_graphs[name], g)
+
@@ -0,0 +1,64 @@
+import pytest
+from rdflib import Graph
+from rdflib.namespace import SKOS
+
+from ontology_manager.ontology_utils import OntologyManager
+
+
+def baseline_label_map(g, onto_namespace="http://emmo.info/emmo#", new_annotation=SKOS.prefLabel):
+    """
+    The s/o/p maps as the first emmo_to_label_graph computed them: a g.value() lookup for every s, p and o.
+    """
+    s_map, o_map, p_map = {}, {}, {}
+    for s, p, o in g:
+        x = g.value(s, new_annotation)
+        if x is not None and s not in s_map:
+            s_map[s] = onto_namespace + str(x)
+        x = g.value(o, new_annotation)
+        if x is not None and o not in o_map and o not in s_map:
+            o_map[o] = onto_namespace + str(x)
+        x = g.value(p, new_annotation)
+        if x is not None and p not in p_map and p not in s_map and p not in o_map:
+            p_map[p] = onto_namespace + str(x)
+    return {"s_map": s_map, "o_map": o_map, "p_map": p_map}
+
+
+def baseline_replace_iri(graphs):
+    """
+    The first replace_iri: one scan of the graph per mapped IRI, replacing the triples one by one.
+    """
+    mega_g = Graph()
+    for g in graphs.values():
+        mega_g += g
+    sop_map = baseline_label_map(mega_g)
+    for g in graphs.values():
+        for v in sop_map.values():
+            for old_iri, new_iri in v.items():
+                for s, p, o in list(g):
+                    if s == old_iri:
+                        g.remove((s, p, o))
+                        g.add((type(s)(new_iri), p, o))
+                    elif p == old_iri:
+                        g.remove((s, p, o))
+                        g.add((s, type(p)(new_iri), o))
+                    elif o == old_iri:
+                        g.remove((s, p, o))
+                        g.add((s, p, type(o)(new_iri)))
+
+
+@pytest.mark.parametrize("method", ["replace_iri", "replace_iri2", "replace_iri3"])
+def test_replace_iri_matches_the_baseline(emmo_like, method):
+    manager = OntologyManager(emmo_like["folder"], emmo_like["catalog"])
+    manager.parse_catalog()
+    manager.load_ontology()
+    expected = {name: Graph() for name in manager.ontology_graphs}
+    for name, g in manager.ontology_graphs.items():
+        expected[name] += g
+    baseline_replace_iri(expected)
+
+    rewritten = getattr(manager, method)()
+
+    assert rewritten > 0
+    for name, g in manager.ontology_graphs.items():
+        assert set(g) == set(expected[name]), name  # the same blank nodes, the graphs are copied not parsed
+    assert manager.search("Class1x3", fuzzy=False)[0].term == manager.terms.emmo.Class1x3
@@ -0,0 +1,89 @@
+from rdflib import Graph, Literal, Namespace, RDF, OWL
+from rdflib.namespace import SKOS
+
+from ontology_manager.ontology_utils import OntologyManager
+from ontology_manager.search_index import EMMO, SearchIndex
+
+EX = Namespace("http://example.org/")
+ELUCIDATION = EMMO.EMMO_967080e5_2f42_4eb2_a3a9_c58143e835f9
+
+
+def labelled(*entries):
+    g = Graph()
+    for term, label in entries:
+        g.add((term, RDF.type, OWL.Class))
+        g.add((term, SKOS.prefLabel, Literal(label, lang="en")))
+    return g
+
+
+def test_exact_prefix_substring_ranking():
+    g = labelled((EX.T1, "Positive Electron"), (EX.T2, "Electron Mass"), (EX.T3, "Electron"),
+                 (EX.T4, "Photon"))
+    g.add((EX.T4, ELUCIDATION, Literal("A quantum that is not an electron.")))
+    index = SearchIndex()
+    index.add_graph("g", g)
+
+    hits = index.search("electron", fuzzy=False)
+    assert [hit.term for hit in hits] == [EX.T3, EX.T2, EX.T1, EX.T4]
+    assert [hit.score for hit in hits] == [1.0, 0.9, 0.8, 0.4]
+    assert [hit.field for hit in hits] == ["prefLabel"] * 3 + ["elucidation"]
+    assert hits[0].graphs == ["g"]
+
+    assert [hit.term for hit in index.search("T3")] == [EX.T3]  # the local name
+    assert index.search("ELECTRON_mass", fuzzy=False)[0].term == EX.T2  # normalised
+    assert len(index.search("electron", limit=2)) == 2
+    assert index.search("  ") == []
+
+
+def test_fuzzy_hit():
+    index = SearchIndex()
+    index.add_graph("g", labelled((EX.Electron, "electron"), (EX.Proton, "proton")))
+    assert index.search("elektron", fuzzy=False) == []
+    hits = index.search("elektron")
+    assert hits[0].term == EX.Electron
+    assert 0 < hits[0].score < 0.8
+    assert EX.Proton not in [hit.term for hit in index.search("elektron", min_similarity=0.5)]
+
+
+def test_graphs_filter_after_remove_graph_and_update():
+    index = SearchIndex()
+    index.add_graph("a", labelled((EX.Atom, "Atom"), (EX.Shared, "Nucleus")))
+    index.add_graph("b", labelled((EX.Shared, "Nucleus"), (EX.Bond, "Bond")))
+    assert index.search("nucleus")[0].graphs == ["a", "b"]
+    assert [hit.term for hit in index.search("atom", graphs=["b"])] == []
+
+    index.remove_graph("a")
+    assert index.graphs() == ["b"]
+    assert index.search("atom", graphs=["a"]) == [] and index.search("atom", fuzzy=False) == []
+    assert index.search("nucleus", graphs=["b"])[0].graphs == ["b"]
+    assert index.search("nucleus", graphs=["a"]) == []
+
+    label = (EX.Shared, SKOS.prefLabel, Literal("Nucleus", lang="en"))
+    renamed = (EX.Shared, SKOS.prefLabel, Literal("Atomic Nucleus", lang="en"))
+    index.update("b", added=[renamed], removed=[label])
+    assert index.search("nucleus", graphs=["b"], fuzzy=False)[0].text == "Atomic Nucleus"
+    assert [hit.term for hit in index.search("atomic", graphs=["b"])] == [EX.Shared]
+    assert index.search("atomic", graphs=["a"]) == []
+
+    index.update("c", added=[(EX.Atom, RDF.type, OWL.Class)])
+    assert [hit.graphs for hit in index.search("atom", graphs=["c"], fuzzy=False)] == [["c"]]
+
+
+def test_manager_index_follows_rewrites(emmo_like):
+    manager = OntologyManager(emmo_like["folder"], emmo_like["catalog"])
+    manager.parse_catalog()
+    manager.load_ontology()
+    name = list(manager.ontology_graphs)[1]
+    old = manager.terms.emmo.Class1x3
+
+    # rewritten before the first search: the graph is indexed as it is then
+    manager.rewrite_iris({old: EX.Renamed})
+    hits = manager.search("Renamed", fuzzy=False)
+    assert [(hit.term, hit.field, hit.graphs) for hit in hits] == [(EX.Renamed, "name", [name])]
+    assert manager.search("Class1x3", fuzzy=False)[0].term == EX.Renamed
+
+    # rewritten after: the index is updated
+    manager.rewrite_iris({EX.Renamed: EX.Again})
+    assert manager.search("Renamed", fuzzy=False) == []
+    assert manager.search("Again", ontologies=[name], fuzzy=False)[0].term == EX.Again
+    assert manager.search("Again", ontologies=[list(manager.ontology_graphs)[0]], fuzzy=False) == []
@@ -0,0 +1,63 @@
+import gzip
+import os
+
+import pytest
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import SKOS
+
+from ontology_manager.ontology_utils import OntologyManager
+from ontology_manager.stream_rewrite import rewrite_file
+from conftest import same_triples
+
+TRICKY = URIRef("http://emmo.info/emmo#Tricky")
+
+
+@pytest.fixture
+def source(emmo_like):
+    """
+    module1 of emmo_like with a long multi-line string quoting IRIs and prefixed names, and the UID --> label map.
+    """
+    g = Graph().parse(os.path.join(emmo_like["folder"], "module1.ttl"))
+    uid = g.value(predicate=SKOS.prefLabel, object=Literal("Class1x0", lang="en"))
+    g.add((TRICKY, SKOS.note, Literal(f'a "quoted" <{uid}> and emmo:{uid.split("#")[1]}\n'
+                                      f'over # lines \'\'\' with """ inside\nemmo:{uid.split("#")[1]} .')))
+    g.add((TRICKY, SKOS.related, uid))
+    mapping = {s: URIRef(f"http://emmo.info/emmo#{o}") for s, o in g.subject_objects(SKOS.prefLabel)}
+    return g, mapping
+
+
+def rewritten_in_memory(g, mapping, tmp_path):
+    """
+    g rewritten with OntologyManager.rewrite_iris.
+    """
+    manager = OntologyManager(str(tmp_path), "none.xml")
+    expected = Graph()
+    expected += g
+    manager.rewrite_iris(mapping, {"source": expected})
+    return expected
+
+
+@pytest.mark.parametrize("input_name, fmt, output_name", [
+    ("in.nt", "nt", "out.nt"),
+    ("in.nt.gz", "nt", "out.nt.gz"),
+    ("in.ttl", "turtle", "out.ttl"),
+])
+def test_rewrite_file_matches_rewrite_iris(source, tmp_path, input_name, fmt, output_name):
+    g, mapping = source
+    input_path = str(tmp_path / input_name)
+    data = g.serialize(format=fmt, encoding="utf-8")
+    if fmt == "turtle":
+        assert b'"""' in data  # the long string is written as such
+    with (gzip.open if input_name.endswith(".gz") else open)(input_path, "wb") as f:
+        f.write(data)
+    output_path = str(tmp_path / output_name)
+
+    stats = rewrite_file(input_path, output_path, mapping, report_every=None, chunk_bytes=1 << 12)
+
+    assert stats["rewritten"] > 0
+    with (gzip.open if output_name.endswith(".gz") else open)(output_path, "rb") as f:
+        result = Graph().parse(data=f.read(), format=fmt)
+    assert same_triples(result, rewritten_in_memory(g, mapping, tmp_path))
+    note = result.value(TRICKY, SKOS.note)
+    assert note == g.value(TRICKY, SKOS.note)  # the IRIs quoted in the literal are left alone
+    assert result.value(TRICKY, SKOS.related) == mapping[g.value(TRICKY, SKOS.related)]
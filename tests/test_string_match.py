@@ -0,0 +1,69 @@
+import random
+import re
+
+import pytest
+from rdflib import Graph, Literal, Namespace, RDFS
+
+from ontodot import string_match
+from ontodot.ontodot import filter_graph_by_strings
+from ontodot.string_match import AUTOMATON_MIN_PATTERNS, AhoCorasick, MultiPatternMatcher
+
+EX = Namespace("http://example.org/")
+
+
+def random_words(rng, n, alphabet="abcé", max_length=4):
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, max_length))) for _ in range(n)]
+
+
+def plain_search(words, text):
+    return {index for index, word in enumerate(words) if word in text}
+
+
+def test_automaton_matches_in():
+    rng = random.Random(0)
+    words = random_words(rng, 200) + ["", "abcabc", "a", "a"]  # the empty word and duplicates
+    automaton = AhoCorasick(words)
+    for text in random_words(rng, 300, max_length=12) + ["", "x"]:
+        assert automaton.search(text) == plain_search(words, text), text
+
+
+def test_empty_pattern():
+    assert AhoCorasick([""]).search("") == {0}
+    assert AhoCorasick(["", "b"]).search("abc") == {0, 1}
+    assert AhoCorasick(["b"]).search("") == set()
+    patterns = [""] + [f"word{i}" for i in range(AUTOMATON_MIN_PATTERNS)]
+    assert MultiPatternMatcher(patterns).match("") == MultiPatternMatcher(patterns[:2]).match("") == {0}
+
+
+@pytest.mark.parametrize("n", [AUTOMATON_MIN_PATTERNS, 150])
+def test_matcher_paths_agree(monkeypatch, n):
+    rng = random.Random(n)
+    patterns = random_words(rng, n - 2, alphabet="abAB") + ["", "ÅB"]
+    terms = random_words(rng, 200, alphabet="abABå", max_length=10) + ["", EX.abba, Literal("ÅBBA")]
+
+    automaton = MultiPatternMatcher(patterns)
+    assert automaton._automaton is not None
+    monkeypatch.setattr(string_match, "AUTOMATON_MIN_PATTERNS", n + 1)
+    plain = MultiPatternMatcher(patterns)
+    assert plain._automaton is None
+    for term in terms:
+        assert automaton.match(term) == plain.match(term), term
+        assert plain.match(term) == {i for i, pattern in enumerate(patterns) if pattern.lower() in str(term).lower()}
+
+
+def test_filter_graph_by_strings_with_many_patterns():
+    g = Graph()
+    for i in range(100):
+        g.add((EX[f"Class{i}"], RDFS.label, Literal(f"Label {i}")))
+        g.add((EX[f"Class{i}"], RDFS.subClassOf, EX[f"Class{i // 3}"]))
+    patterns = [f"class{i}" for i in range(70)] + ["LABEL 7", "", re.compile(r"Label \d$")]
+    assert len(patterns) > AUTOMATON_MIN_PATTERNS
+
+    filtered = filter_graph_by_strings(g, patterns)
+    for pattern in patterns:
+        if isinstance(pattern, str):
+            expected = {t for t in g if any(pattern.lower() in str(x).lower() for x in t)}
+        else:
+            expected = {t for t in g if any(pattern.search(str(x)) for x in t)}
+        assert set(filtered[pattern]) == expected, pattern
+    assert len(filtered[""]) == len(g)
@@ -0,0 +1,38 @@
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDFS
+
+from ontodot.summarise import summarise, count_nodes
+
+EX = Namespace("http://example.org/deep#")
+
+
+def deep_hierarchy(levels=66, siblings=3):
+    """
+    A chain Level0 > Level1 > ... with `siblings` leaf subclasses at each level, and two leaves under the last one.
+    """
+    g = Graph()
+    for i in range(levels):
+        g.add((EX[f"Level{i}"], RDFS.label, Literal(f"level {i}")))
+        if i > 0:
+            g.add((EX[f"Level{i}"], RDFS.subClassOf, EX[f"Level{i - 1}"]))
+        for j in range(siblings):
+            g.add((EX[f"Leaf{i}x{j}"], RDFS.subClassOf, EX[f"Level{i}"]))
+    for j in range(2):
+        g.add((EX[f"Deepest{j}"], RDFS.subClassOf, EX[f"Level{levels - 1}"]))
+    return g
+
+
+def test_expand_a_class_beyond_the_budget():
+    g = deep_hierarchy()
+    summary = summarise(g, max_nodes=50, expand=[EX.Level65])
+
+    for i in range(1, 66):
+        assert (EX[f"Level{i}"], RDFS.subClassOf, EX[f"Level{i - 1}"]) in summary, i
+    for j in range(2):
+        assert (EX[f"Deepest{j}"], RDFS.subClassOf, EX.Level65) in summary
+
+
+def test_no_expand_keeps_the_budget():
+    summary = summarise(deep_hierarchy(), max_nodes=50)
+    assert count_nodes(summary) <= 50
+    assert (EX.Level65, RDFS.subClassOf, EX.Level64) not in summary
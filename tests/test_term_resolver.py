@@ -0,0 +1,39 @@
+import pytest
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDFS, SKOS
+
+from ontology_manager.term_resolver import AmbiguousLabelError, TermResolver, Terms
+
+EX = Namespace("http://example.org/onto#")
+
+
+@pytest.fixture
+def terms():
+    g = Graph()
+    g.bind("ex", EX)
+    for local, label in (("T1", "label"), ("T2", "namespace"), ("T3", "Atom"), ("T4", "Chemical Element"),
+                         ("T5", "Twin"), ("T6", "Twin")):
+        g.add((EX[local], SKOS.prefLabel, Literal(label, lang="en")))
+    g.add((EX.T3, RDFS.label, Literal("Atome", lang="fr")))
+    resolver = TermResolver()
+    resolver.add_graph("onto", g)
+    return Terms(resolver)
+
+
+def test_labels_named_like_helpers(terms):
+    assert terms.ex.label == EX.T1
+    assert terms.ex.namespace == EX.T2
+    assert "label" in dir(terms.ex) and "namespace" in dir(terms.ex)
+
+
+def test_lookups(terms):
+    assert terms.ex.Atom == EX.T3
+    assert terms["http://example.org/onto#"]["Chemical Element"] == EX.T4
+    assert "Atom" in terms.ex and "Molecule" not in terms.ex
+    assert terms.label_of(EX.T3) == "Atom"
+    assert terms.label_of(EX.T3, language="fr") == "Atom"  # a prefLabel comes before an rdfs:label
+    assert terms.label_of(EX.Unknown) is None
+    with pytest.raises(AttributeError):
+        terms.ex.Molecule
+    with pytest.raises(AmbiguousLabelError):
+        terms.ex.Twin
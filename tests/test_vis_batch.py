@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+
+from rdflib import Graph, Literal, Namespace, RDFS
+
+from ontodot import ontodot
+from ontodot.render_cache import RenderIndex
+
+EX = Namespace("http://example.org/")
+
+
+def graph(i):
+    g = Graph()
+    g.add((EX[f"C{i}"], RDFS.subClassOf, EX.Root))
+    g.add((EX[f"C{i}"], RDFS.label, Literal(f"class {i}")))
+    return g
+
+
+class FakeGraphviz:
+    """render_dot stand-in: records the DOT it is given and the threads it runs on, slowly enough to overlap."""
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.threads = set()
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def __call__(self, dot_text, fmt):
+        time.sleep(0.02)
+        with self.lock:
+            self.calls.append(dot_text)
+            self.threads.add(threading.get_ident())
+        if self.fail_on is not None and self.fail_on in dot_text:
+            raise RuntimeError("graphviz failed")
+        return f"{fmt}:{len(dot_text)}".encode()
+
+
+def test_duplicates_are_rendered_once(tmp_path, monkeypatch):
+    fake = FakeGraphviz()
+    monkeypatch.setattr(ontodot, "render_dot", fake)
+    folder = str(tmp_path / "out")
+
+    results = ontodot.vis_batch({"a": graph(0), "b": graph(1), "a again": graph(0)}, jobs=4, output_folder=folder)
+    assert len(fake.calls) == 2
+    assert results["a again"]["path"] == results["a"]["path"] != results["b"]["path"]
+    assert results["a again"]["cached"] and not results["a"]["cached"]
+
+    # a second batch is served from the index
+    again = ontodot.vis_batch([graph(1), graph(0)], output_folder=folder)
+    assert len(fake.calls) == 2
+    assert [result["path"] for result in again] == [results["b"]["path"], results["a"]["path"]]
+    assert all(result["cached"] for result in again)
+
+
+def test_serials_are_not_reused_across_threads(tmp_path, monkeypatch):
+    fake = FakeGraphviz()
+    monkeypatch.setattr(ontodot, "render_dot", fake)
+    folder = str(tmp_path / "out")
+
+    results = ontodot.vis_batch([graph(i) for i in range(12)], jobs=4, output_folder=folder)
+    paths = [result["path"] for result in results]
+    assert len(set(paths)) == 12
+    assert len(fake.threads) > 1
+    assert sorted(os.listdir(folder)) == sorted(["index.json"] + [f"OntoVis-{i}.{ext}" for i in range(12)
+                                                                  for ext in ("png", "dot")])
+    # each file holds the render of its own graph
+    for i, path in enumerate(paths):
+        with open(path[:-len("png")] + "dot") as f:
+            assert f"class {i}" in f.read()
+    assert RenderIndex(folder).next_serial() == 12
+
+    # batches run from several threads at once do not share serials either
+    batches = [[graph(100 + 10 * t + i) for i in range(3)] for t in range(4)]
+    outputs = [None] * len(batches)
+
+    def run(t):
+        outputs[t] = ontodot.vis_batch(batches[t], jobs=2, output_folder=folder, use_cache=False)
+
+    threads = [threading.Thread(target=run, args=(t,)) for t in range(len(batches))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    paths = [result["path"] for output in outputs for result in output]
+    assert len(set(paths)) == 12
+
+
+def test_a_failed_render_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(ontodot, "render_dot", FakeGraphviz(fail_on="class 1"))
+    folder = str(tmp_path / "out")
+    results = ontodot.vis_batch([graph(0), graph(1), graph(1)], output_folder=folder)
+    assert results[0]["path"] is not None and "error" not in results[0]
+    assert results[1]["path"] is None and results[1]["error"] == "graphviz failed"
+    assert results[2]["path"] is None and results[2]["error"] == "graphviz failed"
+    assert list(RenderIndex(folder).data["renders"].values()) == [os.path.basename(results[0]["path"])]
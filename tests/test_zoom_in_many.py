@@ -0,0 +1,38 @@
+import os
+
+import pytest
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import RDFS
+
+from ontodot.ontodot import OntoVis
+
+pytest.importorskip("scipy")
+
+
+@pytest.fixture
+def vis(emmo_like):
+    g = Graph()
+    for m in range(3):
+        g.parse(os.path.join(emmo_like["folder"], f"module{m}.ttl"))
+    return OntoVis(g)
+
+
+def test_zoom_in_many_matches_zoom_in(vis, emmo_like):
+    seeds = [str(iri) for iri in emmo_like["classes"][::9]] + ["http://example.org/not_in_the_graph"]
+    for distance in (1, 2, 3):
+        zoomed = vis.zoom_in_many(seeds, distance)
+        assert list(zoomed) == seeds  # keyed by the seeds as given, here strings
+        for seed in seeds:
+            assert set(zoomed[seed]) == set(vis.zoom_in(seed, distance)), (seed, distance)
+
+
+def test_zoom_in_many_rebuild(vis, emmo_like):
+    seed = emmo_like["classes"][1]
+    new_class = URIRef("http://example.org/NewClass")
+    before = vis.zoom_in_many([seed], 2)[seed]
+    vis.g.add((new_class, RDFS.subClassOf, seed))
+    vis.g.add((new_class, RDFS.label, Literal("new")))
+    assert set(vis.zoom_in_many([seed], 2)[seed]) == set(before)  # the matrices are kept
+    after = vis.zoom_in_many([seed], 2, rebuild=True)[seed]
+    assert (new_class, RDFS.subClassOf, seed) in after
+    assert set(after) == set(vis.zoom_in(seed, 2))